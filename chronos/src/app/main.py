@@ -1,9 +1,10 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request
 from asyncio import get_running_loop
 from ..router.chat import router as chat_router
 from ..router.search import router as search_router
 from fastapi.middleware.cors import CORSMiddleware
 from ..producer.chat_producer import ChatProducer
+from ..common import tracing
 from contextlib import asynccontextmanager
 import logging
 import asyncio
@@ -19,6 +20,8 @@ async def lifespan(app: FastAPI):
         handlers=[logging.StreamHandler()]
     )
 
+    tracing.configure_tracing("chronos")
+
     loop = get_running_loop()
     task = loop.create_task(ChatProducer.connect(loop))
     logger = logging.getLogger("uvicorn.access")
@@ -43,6 +46,22 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Continue the caller's trace when it sent one; hermes continues ours through the AMQP headers
+    with tracing.start_span(
+        f"{request.method} {request.url.path}",
+        tracing.SERVER,
+        parent=tracing.extract(request.headers),
+        method=request.method,
+        path=request.url.path,
+    ) as span:
+        response = await call_next(request)
+        span.set_attribute("status_code", response.status_code)
+        response.headers[tracing.TRACEPARENT] = span.context.traceparent()
+        return response
+
+
 app.include_router(chat_router, tags=["chat"], prefix="/api/v1")
 app.include_router(search_router, tags=["search"], prefix="/api/v1")
 
@@ -1,10 +1,10 @@
 from pydantic import BaseModel
-import uuid
-import json
+import time
 import aio_pika
 from dotenv import load_dotenv
 import os
 import logging
+from ..common import codec, tracing
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -21,6 +21,13 @@ class History(BaseModel):
     access_token: str
     refresh_token: str
 
+class RegenerateRequest(History):
+    # Assistant message whose answer is generated again from its stored documents
+    message_id: str
+
+# Message types hermes dispatches on; plain chat messages carry no type
+REGENERATE = "regenerate"
+
 class ChatProducer:
     conn = None
     channel = None
@@ -41,7 +48,7 @@ class ChatProducer:
         return conn
     
     @classmethod
-    async def publish(klass, message: History, message_id: str = None):
+    async def publish(klass, message: History, message_id: str = None, message_type: str = None):
         logger.info(f"DEBUG: publish() called, conn={klass.conn}, is_closed={klass.conn.is_closed if klass.conn else 'N/A'}")
 
         if klass.conn is None or klass.conn.is_closed:
@@ -61,15 +68,22 @@ class ChatProducer:
             if message_id:
                 body["message_id"] = message_id
                 logger.info(f"DEBUG: Including message_id in payload: {message_id}")
+            if message_type:
+                body["type"] = message_type
 
             logger.info(f"DEBUG: Publishing to queue {klass.publish_queue.name}")
-            await klass.channel.default_exchange.publish(
-                aio_pika.Message(
-                    body=json.dumps(body).encode(),
-                    correlation_id=str(uuid.uuid4()),
-                ),
-                routing_key=klass.publish_queue.name,
-            )
+            with tracing.start_span("rabbitmq.publish", tracing.PRODUCER, queue=klass.publish_queue.name,
+                                    message_id=message_id or "", type=message_type or "chat") as span:
+                await klass.channel.default_exchange.publish(
+                    aio_pika.Message(
+                        body=codec.dumpb(body),
+                        content_type=codec.WIRE_CONTENT_TYPE,
+                        # The trace id doubles as the correlation id, so both sides log the same value
+                        correlation_id=span.context.trace_id,
+                        headers=tracing.inject({tracing.PUBLISHED_AT_HEADER: time.time_ns()}),
+                    ),
+                    routing_key=klass.publish_queue.name,
+                )
             logger.info("DEBUG: Message published successfully")
             return {"status": "Message sent successfully"}
         except Exception as e:
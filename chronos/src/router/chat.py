@@ -1,6 +1,7 @@
 from fastapi import APIRouter
-from ..producer.chat_producer import ChatProducer, History
+from ..producer.chat_producer import REGENERATE, ChatProducer, History, RegenerateRequest
 from ..common.supabase_client import client as supabase
+from ..common import tracing
 from datetime import datetime, timezone
 import logging
 
@@ -18,9 +19,10 @@ async def chat_producer(message: History):
         )
 
         # Update session last_updated_at
-        supabase.table("session").update({
-            "last_updated_at": datetime.now().isoformat(),
-        }).eq("id", message.session_uid).execute()
+        with tracing.start_span("supabase.update_session", tracing.CLIENT):
+            supabase.table("session").update({
+                "last_updated_at": datetime.now().isoformat(),
+            }).eq("id", message.session_uid).execute()
 
         # Create assistant message BEFORE publishing to RabbitMQ
         # This ensures frontend subscription catches the INSERT event
@@ -39,11 +41,12 @@ async def chat_producer(message: History):
 
         logger.info(f"DEBUG: Chat data to insert: {chat_data}")
 
-        message_ref = (
-            supabase.table("chat")
-            .insert(chat_data)
-            .execute()
-        )
+        with tracing.start_span("supabase.insert_chat", tracing.CLIENT):
+            message_ref = (
+                supabase.table("chat")
+                .insert(chat_data)
+                .execute()
+            )
 
         message_id = message_ref.data[0]["id"]
         logger.info(f"DEBUG: Assistant message created with id: {message_id}")
@@ -54,4 +57,30 @@ async def chat_producer(message: History):
 
     except Exception as e:
         logger.error(f"ERROR: Failed to create assistant message or publish: {e}")
-        return {"status": "Error", "message": str(e)}
\ No newline at end of file
+        return {"status": "Error", "message": str(e)}
+
+@router.post("/chat/regenerate")
+async def regenerate_answer(message: RegenerateRequest):
+    """Generate an existing answer again; hermes reuses its stored documents instead of searching again."""
+    try:
+        supabase.auth.set_session(
+            access_token=message.access_token,
+            refresh_token=message.refresh_token,
+        )
+
+        # Reset the row so the frontend shows it loading again; documents stay for hermes to reuse
+        with tracing.start_span("supabase.reset_chat", tracing.CLIENT, message_id=message.message_id):
+            supabase.table("chat").update({
+                "content": "",
+                "state": "loading",
+                "citations": None,
+                "thinking_start_time": datetime.now(timezone.utc).isoformat(),
+                "thinking_duration": None,
+            }).eq("id", message.message_id).execute()
+
+        status = await ChatProducer.publish(message, message.message_id, message_type=REGENERATE)
+        return status
+
+    except Exception as e:
+        logger.error(f"ERROR: Failed to reset message {message.message_id} or publish regeneration: {e}")
+        return {"status": "Error", "message": str(e)}
@@ -1,6 +1,7 @@
 import httpx
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Response
 import os
+from ..common import codec
 
 router = APIRouter()
 
@@ -14,17 +15,19 @@ async def search_proxy(request: Request):
     which handles the actual Elasticsearch query.
     """
     try:
-        search_query = await request.json()
+        # Forward the body as-is; hermes parses it, so there is no decode/encode round trip here
+        search_query = await request.body()
         hermes_search_url = f"{HERMES_URL}/api/v1/search"
 
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 hermes_search_url,
-                json=search_query,
+                content=search_query,
+                headers={"Content-Type": codec.WIRE_CONTENT_TYPE},
                 timeout=60.0,  # Setting a 60-second timeout for the search request
             )
             response.raise_for_status()  # Raises an exception for 4xx/5xx responses
-            return response.json()
+            return Response(content=response.content, media_type=codec.WIRE_CONTENT_TYPE)
 
     except httpx.HTTPStatusError as e:
         # Forward the error response from the hermes service
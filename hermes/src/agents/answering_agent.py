@@ -1,7 +1,7 @@
 import time
-import json
 from datetime import datetime, timezone
-from src.common.gemini_client import client as gemini_client
+from src.common.llm_gateway import STREAM, llm_gateway
+from src.common.prompt_cache import CHATBOT, prompt_cache
 from google.genai import types
 from ..config.llm import MODEL_NAME, CHATBOT_SYSTEM_PROMPT, ANSWERING_AGENT_PROMPT
 from ..model.search import History, QnAList, Questions
@@ -9,11 +9,21 @@ from src.tools.retrieve_document_metadata import get_document_metadata, get_docu
 from src.common.supabase_client import client as supabase
 from src.utils.citation_processor import CitationProcessor
 from src.utils.logger import HermesLogger
+from src.utils import codec, tracing
+from src.utils.metrics import (
+    FALLBACKS,
+    PLANNING_SECONDS,
+    STREAM_SECONDS,
+    SUPABASE_WRITE_SECONDS,
+    TIME_TO_FIRST_TOKEN_SECONDS,
+)
 
 logger = HermesLogger("answer")
 
+@tracing.traced("agent.planner")
 def answer_generated_questions(history: History, documents: list[dict], serilized_check_res: Questions):
-    answer_res = gemini_client.models.generate_content(
+    with PLANNING_SECONDS.time():
+        answer_res = llm_gateway.generate_content(
             model=MODEL_NAME,
             contents=history,
             config=types.GenerateContentConfig(
@@ -22,11 +32,34 @@ def answer_generated_questions(history: History, documents: list[dict], serilize
                 response_schema=QnAList,
                 temperature=0.2,
             ),
+            caller="planner",
         )
     serialized_answer_res = QnAList.model_validate(answer_res.parsed)
     logger.debug("Planned answer generated", answer_count=len(serialized_answer_res.answers))
     return serialized_answer_res
 
+@tracing.traced("supabase.write_final_answer", tracing.CLIENT)
+def write_final_answer(message_id: str, content: str, citations: list, documents: list[dict]):
+    """Store the finished answer on the chat row."""
+    with SUPABASE_WRITE_SECONDS.time(operation="final_answer"):
+        supabase.table("chat").update({
+            "content": content,
+            "state": "done",
+            "documents": codec.dumps(documents) if documents else "[]",
+            "citations": citations if citations else None,
+        }).eq("id", message_id).execute()
+
+def answer_context(serialized_answer_res: QnAList, documents: list[dict]) -> str:
+    """Per-message part of the answer prompt; it always follows the static chatbot prompt."""
+    return f"""
+                Planned Answer:
+                {codec.dumps(serialized_answer_res)}
+
+                Retrieved Context:
+                {codec.dumps(documents) if documents else ""}
+                """
+
+@tracing.traced("agent.answer_stream")
 def stream_answer_user(context: History, message_id: str, documents: list[dict], serialized_answer_res: QnAList):
     """Stream the response and update the database with debounced updates"""
     full_content = ""
@@ -45,32 +78,36 @@ def stream_answer_user(context: History, message_id: str, documents: list[dict],
             start_time_str = msg_res.data.get("thinking_start_time")
             start_time_str = start_time_str.replace('Z', '+00:00')
             thinking_start_time = datetime.fromisoformat(start_time_str)
-            logger.info("Thinking start time retrieved", start_time=start_time_str, message_id=message_id)
+            logger.debug("Thinking start time retrieved", start_time=start_time_str, message_id=message_id)
     except Exception as e:
         logger.warning("Failed to get thinking start time", error=str(e))
 
     try:
-        stream = gemini_client.models.generate_content_stream(
+        config, contents = prompt_cache.config(
+            CHATBOT,
+            context,
+            answer_context(serialized_answer_res, documents),
+            stop_sequences=["Referensi", "Daftar Pustaka", "Sumber:"],
+        )
+        stream_start = time.monotonic()
+        first_token = True
+        stream = llm_gateway.generate_content_stream(
             model=MODEL_NAME,
-            contents=context,
-            config=types.GenerateContentConfig(
-                system_instruction=CHATBOT_SYSTEM_PROMPT + f"""
-                Planned Answer:
-                {serialized_answer_res.model_dump_json()}
-
-                Retrieved Context:
-                {json.dumps(documents, indent=2) if documents else ""}
-                """,
-                stop_sequences=["Referensi", "Daftar Pustaka", "Sumber:"],
-            ),
+            contents=contents,
+            config=config,
+            caller="answer_stream",
         )
 
         for chunk in stream:
             if chunk.text:
+                if first_token:
+                    TIME_TO_FIRST_TOKEN_SECONDS.observe(time.monotonic() - stream_start)
+                    tracing.current_span().set_attribute("ttft_ms", round((time.monotonic() - stream_start) * 1000, 1))
+                    first_token = False
                 if thinking_start_time is not None and not thinking_duration_sent:
                     now = datetime.now(timezone.utc)
                     thinking_duration_ms = int((now - thinking_start_time).total_seconds() * 1000)
-                    logger.info(
+                    logger.debug(
                         "FIRST CHUNK ARRIVED - Calculating thinking duration",
                         message_id=message_id,
                         start_time=thinking_start_time.isoformat(),
@@ -83,7 +120,7 @@ def stream_answer_user(context: History, message_id: str, documents: list[dict],
                             "thinking_duration": thinking_duration_ms
                         }).eq("id", message_id).execute()
                         thinking_duration_sent = True
-                        logger.info(
+                        logger.debug(
                             "Thinking duration SENT to database",
                             message_id=message_id,
                             duration_ms=thinking_duration_ms,
@@ -111,7 +148,9 @@ def stream_answer_user(context: History, message_id: str, documents: list[dict],
                             "citations": references if references else None,
                         }
 
-                        supabase.table("chat").update(update_payload).eq("id", message_id).execute()
+                        with tracing.start_span("supabase.stream_update", tracing.CLIENT), \
+                                SUPABASE_WRITE_SECONDS.time(operation="stream_update"):
+                            supabase.table("chat").update(update_payload).eq("id", message_id).execute()
 
                         chunk_count = 0
                         last_update_time = current_time
@@ -119,6 +158,7 @@ def stream_answer_user(context: History, message_id: str, documents: list[dict],
                     except Exception as db_error:
                         logger.error("Failed to update streaming content", error=str(db_error))
                         continue
+        STREAM_SECONDS.observe(time.monotonic() - stream_start)
 
         # Final update with complete state
         try:
@@ -148,36 +188,36 @@ def stream_answer_user(context: History, message_id: str, documents: list[dict],
             final_content = full_content
             references = []
 
-        supabase.table("chat").update({
-            "content": final_content,
-            "state": "done",
-            "documents": json.dumps(documents, indent=2) if documents else "[]",
-            "citations": references if references else None,
-        }).eq("id", message_id).execute()
-        
+        write_final_answer(message_id, final_content, references, documents)
+
         # Create a mock response object for compatibility
         class MockResponse:
             def __init__(self, text):
                 self.text = text
-        
+                # What was written to the chat row, so it can be replayed for the same question
+                self.final_answer = {"content": final_content, "citations": references, "documents": documents}
+
         return MockResponse(full_content)
 
     except Exception as e:
         logger.error("Streaming failed, falling back to regular generation", error=str(e))
+        FALLBACKS.inc(fallback="stream_to_generate")
         # Fallback to regular generation
-        response = gemini_client.models.generate_content(
+        response = llm_gateway.generate_content(
             model=MODEL_NAME,
             contents=context,
             config=types.GenerateContentConfig(
                 system_instruction=CHATBOT_SYSTEM_PROMPT,
             ),
+            priority=STREAM,
+            caller="answer",
         )
         
         # Update with final content (no post-processing in fallback path)
         supabase.table("chat").update({
             "content": response.text,
             "state": "done",
-            "documents": json.dumps(documents, indent=2) if documents else "[]",
+            "documents": codec.dumps(documents) if documents else "[]",
             # No citation post-processing in this fallback path
             "citations": None,
         }).eq("id", message_id).execute()
@@ -246,19 +286,18 @@ def answer_user(history: History, documents: list[dict], serialized_answer_res:
 
         return stream_answer_user(history, message_id, documents + metadata, serialized_answer_res)
     else:
-        res = gemini_client.models.generate_content(
+        config, contents = prompt_cache.config(
+            CHATBOT,
+            history,
+            answer_context(serialized_answer_res, documents),
+            stop_sequences=["Referensi", "Daftar Pustaka", "Sumber:"],
+        )
+        res = llm_gateway.generate_content(
             model=MODEL_NAME,
-            contents=history,
-            config=types.GenerateContentConfig(
-                system_instruction=CHATBOT_SYSTEM_PROMPT + f"""
-                Planned Answer:
-                {serialized_answer_res.model_dump_json()}
-
-                Retrieved Context:
-                {json.dumps(documents, indent=2) if documents else ""}
-                """,
-                stop_sequences=["Referensi", "Daftar Pustaka", "Sumber:"],
-            ),
+            contents=contents,
+            config=config,
+            priority=STREAM,
+            caller="answer",
         )
 
         id_to_fetch = []
@@ -275,6 +314,6 @@ def answer_user(history: History, documents: list[dict], serialized_answer_res:
         supabase.table("chat").update({
             "content": res.text,
             "state": "done",
-            "documents": json.dumps(documents + metadata, indent=2) if documents else "[]",
+            "documents": codec.dumps(documents + metadata) if documents else "[]",
         }).eq("id", message_id).execute()
         return res
\ No newline at end of file
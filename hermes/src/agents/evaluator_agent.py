@@ -1,18 +1,21 @@
 
 import time
-from src.common.gemini_client import client as gemini_client
+from src.common.llm_gateway import llm_gateway
+from src.utils import tracing
 from src.utils.logger import HermesLogger
+from src.utils.metrics import EVALUATOR_SECONDS, FALLBACKS
 from google.genai import types
 from ..config.llm import EVALUATOR_AGENT_PROMPT_INIT
 from ..model.search import Questions, History
 
 logger = HermesLogger("evaluator")
 
+@tracing.traced("agent.evaluator")
 def evaluate_question(history: History):
     start_time = time.time()
 
     try:
-        check_res = gemini_client.models.generate_content(
+        check_res = llm_gateway.generate_content(
             model="gemini-2.5-flash",
             contents=history,
             config=types.GenerateContentConfig(
@@ -21,17 +24,29 @@ def evaluate_question(history: History):
                 response_schema=Questions,
                 temperature=0.2,
             ),
+            caller="evaluator",
         )
 
         duration_ms = int((time.time() - start_time) * 1000)
+        EVALUATOR_SECONDS.observe(duration_ms / 1000)
         logger.debug("Question evaluated", duration_ms=duration_ms)
         return Questions.model_validate(check_res.parsed)
 
     except Exception as e:
         duration_ms = int((time.time() - start_time) * 1000)
         logger.error("Question evaluation failed", duration_ms=duration_ms, error=str(e))
+        EVALUATOR_SECONDS.observe(duration_ms / 1000)
+        FALLBACKS.inc(fallback="evaluator_default")
+        # Fall back to retrieving for the user's own words rather than answering without documents
         return Questions(
-            questions=["Apa yang ingin Anda ketahui?"],
-            is_sufficient=True,
+            questions=[_last_user_text(history) or "Apa yang ingin Anda ketahui?"],
+            is_sufficient=False,
             classification="general"
-        )
\ No newline at end of file
+        )
+
+
+def _last_user_text(history: History) -> str:
+    for turn in reversed(history):
+        if turn.get("role") == "user":
+            return " ".join(part.get("text", "") for part in turn.get("parts", [])).strip()
+    return ""
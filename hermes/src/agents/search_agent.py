@@ -2,10 +2,11 @@
 
 import time
 import json
-from src.common.gemini_client import client as gemini_client
+from src.common.llm_gateway import llm_gateway
+from src.common.prompt_cache import SEARCH, prompt_cache
 from src.utils.logger import HermesLogger
-from google.genai import types
-from ..config.llm import MODEL_NAME, SEARCH_AGENT_PROMPT, REWRITE_PROMPT
+from src.utils import codec, tracing
+from ..config.llm import MODEL_NAME, REWRITE_PROMPT
 from ..tools.search_legal_document import legal_document_search
 
 logger = HermesLogger("search_agent")
@@ -18,6 +19,7 @@ def evaluate_es_query(query: dict):
         logger.error("Legal document search failed", error=str(e))
         return (None, str(e))
 
+@tracing.traced("agent.search")
 def generate_and_execute_es_query(questions: list[str]):
     time.sleep(1)
     last_no_hit = False
@@ -25,9 +27,10 @@ def generate_and_execute_es_query(questions: list[str]):
     max_attempt = 3
     while True and max_attempt > 0:
         max_attempt -= 1
-        es_query_res = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[{
+        # Static search prompt first, the rewrite hint for a failed query after it
+        config, contents = prompt_cache.config(
+            SEARCH,
+            [{
                 "role": "user",
                 "parts": [
                     {
@@ -35,22 +38,26 @@ def generate_and_execute_es_query(questions: list[str]):
                     }
                 ],
             }],
-            config=types.GenerateContentConfig(
-                system_instruction=SEARCH_AGENT_PROMPT + \
-                    "" if not last_no_hit else REWRITE_PROMPT(prev_query),
-                response_mime_type="application/json",
-                temperature=0.2,
-            ),
+            REWRITE_PROMPT(prev_query) if last_no_hit else "",
+            response_mime_type="application/json",
+            temperature=0.2,
+        )
+        es_query_res = llm_gateway.generate_content(
+            model=MODEL_NAME,
+            contents=contents,
+            config=config,
+            caller="search_agent",
         )
         query_json = None
         try:
-            query_json = json.loads(es_query_res.text)
+            query_json = codec.loads(es_query_res.text)
         except json.JSONDecodeError:
             logger.warning("Failed to decode Gemini JSON response")
             continue
         documents, error = evaluate_es_query(query_json)
         if len(documents) == 0:
             last_no_hit = True
+            prev_query = query_json
             continue
         if error is None:
             return documents[:5]
@@ -1,4 +1,5 @@
 
+from src.utils import tracing
 from src.utils.logger import HermesLogger
 
 
@@ -7,7 +8,9 @@ import json
 from src.common.gemini_client import client as gemini_client
 from google.genai import types
 from ..config.llm import SEARCH_KUHP_AGENT_PROMPT, REWRITE_PROMPT
-from ..tools.kuhp_search import kuhp_document_search as legal_document_search, search_dense_kuhp_documents
+from ..tools.kuhp_search import kuhp_document_search as legal_document_search, search_dense_kuhp_documents_batch
+from src.local_index.corpus_engine import get_local_engine
+from src.utils.embedding_helper import batch_embed_queries
 
 logger = HermesLogger("kuhp_agent")
 
@@ -19,6 +22,7 @@ def evaluate_es_query(query: dict):
         logger.error("Search failed", error=str(e))
         return (None, str(e))
 
+@tracing.traced("agent.search_kuhp")
 def generate_and_execute_es_query_kuhp(questions: list[str]):
     time.sleep(1)
     max_attempt = 3
@@ -50,8 +54,19 @@ def generate_and_execute_es_query_kuhp(questions: list[str]):
         #     del doc["values"]
         #     doc["metadata"]["_type"] = "kuhp"
 
-        # Use empty dense_documents (ES only mode)
+        # Use empty dense_documents (ES only mode) unless the vectors are served in-process
         dense_documents = []
+        engine = get_local_engine("kuhp")
+        if engine is not None and engine.has_vectors:
+            try:
+                embeddings = batch_embed_queries(questions)
+                for matches in search_dense_kuhp_documents_batch(embeddings, 5):
+                    dense_documents.extend(matches)
+                for doc in dense_documents:
+                    doc["metadata"]["_type"] = "kuhp"
+            except Exception as e:
+                logger.warning("Local dense search failed", error=str(e))
+                dense_documents = []
 
         if len(documents) == 0:
             continue
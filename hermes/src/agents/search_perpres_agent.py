@@ -1,12 +1,15 @@
 import time
 import json
-from concurrent.futures import ThreadPoolExecutor
 from src.common.gemini_client import client as gemini_client
+from src.utils import tracing
 from src.utils.logger import HermesLogger
+from src.utils.metrics import FALLBACKS
 from google.genai import types
 from ..config.llm import SEARCH_PERPRES_AGENT_PROMPT, REWRITE_PROMPT
-from ..tools.perpres_search import perpres_document_search, search_dense_perpres_documents
+from ..tools.perpres_search import perpres_document_search, search_dense_perpres_documents_batch
 from src.utils.embedding_helper import batch_embed_queries
+from src.common.executors import ELASTICSEARCH, get_executor
+from ..tools.hybrid_search import hybrid_enabled, hybrid_document_search
 
 logger = HermesLogger("perpres_agent")
 
@@ -18,7 +21,18 @@ def evaluate_es_query(query: dict):
         logger.error("Perpres search failed", error=str(e))
         return (None, str(e))
 
+@tracing.traced("agent.search_perpres")
 def generate_and_execute_es_query_perpres(questions: list[str]):
+    # Single ES request with BM25 + kNN fused server-side; Pinecone path stays as the fallback
+    if hybrid_enabled("perpres"):
+        try:
+            hits = hybrid_document_search("perpres", questions, batch_embed_queries(questions))
+            if hits:
+                return hits, []
+        except Exception as e:
+            logger.warning("Hybrid search failed, using ES + Pinecone", error=str(e))
+            FALLBACKS.inc(fallback="hybrid_to_separate")
+
     max_attempt = 3
     while True and max_attempt > 0:
         max_attempt -= 1
@@ -30,7 +44,8 @@ def generate_and_execute_es_query_perpres(questions: list[str]):
                 ]
             }
         }
-        documents, error = evaluate_es_query(query_json)
+        # The lexical search runs on the ES executor while this thread embeds and queries Pinecone
+        es_future = get_executor(ELASTICSEARCH).submit(evaluate_es_query, query_json)
 
         try:
             start_time = time.time()
@@ -39,15 +54,8 @@ def generate_and_execute_es_query_perpres(questions: list[str]):
             embeddings = batch_embed_queries(questions)
             logger.debug("Batch embedding complete", queries=len(questions))
 
-            # Parallel Pinecone queries with pre-computed embeddings
-            max_workers = min(len(questions), 5)
-
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(search_dense_perpres_documents, embeddings[i], 5)
-                    for i in range(len(questions))
-                ]
-                dense_results = [future.result() for future in futures]
+            # Concurrent dense queries with pre-computed embeddings (no vector payloads)
+            dense_results = search_dense_perpres_documents_batch(embeddings, 5)
 
             result = []
             for dense_result in dense_results:
@@ -61,6 +69,7 @@ def generate_and_execute_es_query_perpres(questions: list[str]):
             logger.warning("Pinecone search failed", error=str(e))
             result = []
 
+        documents, error = es_future.result()
         if documents and error is None:
             return documents, result
         else:
@@ -1,13 +1,16 @@
 import time
+from src.utils import tracing
 from src.utils.logger import HermesLogger
+from src.utils.metrics import FALLBACKS
 
 import json
-from concurrent.futures import ThreadPoolExecutor
 from src.common.gemini_client import client as gemini_client
 from google.genai import types
 from ..config.llm import SEARCH_UNDANG_UNDANG_AGENT_PROMPT, REWRITE_PROMPT
-from ..tools.undang_undang_search import undang_undang_document_search, search_dense_undang_undang_documents
+from ..tools.undang_undang_search import undang_undang_document_search, search_dense_undang_undang_documents_batch
 from src.utils.embedding_helper import batch_embed_queries
+from src.common.executors import ELASTICSEARCH, get_executor
+from ..tools.hybrid_search import hybrid_enabled, hybrid_document_search
 
 logger = HermesLogger("uu_agent")
 
@@ -19,7 +22,18 @@ def evaluate_es_query(query: dict):
         logger.error("Search failed", error=str(e))
         return (None, str(e))
 
+@tracing.traced("agent.search_undang_undang")
 def generate_and_execute_es_query_undang_undang(questions: list[str]):
+    # Single ES request with BM25 + kNN fused server-side; Pinecone path stays as the fallback
+    if hybrid_enabled("undang-undang"):
+        try:
+            hits = hybrid_document_search("undang-undang", questions, batch_embed_queries(questions))
+            if hits:
+                return hits, []
+        except Exception as e:
+            logger.warning("Hybrid search failed, using ES + Pinecone", error=str(e))
+            FALLBACKS.inc(fallback="hybrid_to_separate")
+
     max_attempt = 3
     while True and max_attempt > 0:
         max_attempt -= 1
@@ -31,7 +45,8 @@ def generate_and_execute_es_query_undang_undang(questions: list[str]):
                 ]
             }
         }
-        documents, error = evaluate_es_query(query_json)
+        # The lexical search runs on the ES executor while this thread embeds and queries Pinecone
+        es_future = get_executor(ELASTICSEARCH).submit(evaluate_es_query, query_json)
 
         # Pinecone dense search with batch embedding optimization
         try:
@@ -41,25 +56,15 @@ def generate_and_execute_es_query_undang_undang(questions: list[str]):
             embeddings = batch_embed_queries(questions)
             logger.debug("Batch embedding complete", queries=len(questions))
 
-            # Parallel Pinecone queries with pre-computed embeddings
-            max_workers = min(len(questions), 5)
-
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(search_dense_undang_undang_documents, embeddings[i], 5)
-                    for i in range(len(questions))
-                ]
-                dense_results = [future.result() for future in futures]
+            # Concurrent dense queries with pre-computed embeddings (no vector payloads)
+            dense_results = search_dense_undang_undang_documents_batch(embeddings, 5)
 
             # Flatten results
-            result = []
-            for doc in dense_results:
-                result.extend(doc.get("matches", []))
-            dense_documents = result
+            dense_documents = []
+            for matches in dense_results:
+                dense_documents.extend(matches)
 
-            # Clean up metadata
             for doc in dense_documents:
-                del doc["values"]
                 doc["metadata"]["_type"] = "undang-undang"
 
             elapsed = time.time() - start_time
@@ -68,6 +73,7 @@ def generate_and_execute_es_query_undang_undang(questions: list[str]):
             logger.warning("Pinecone search failed", error=str(e))
             dense_documents = []
 
+        documents, error = es_future.result()
         if len(documents) == 0:
             continue
         if error is None:
@@ -0,0 +1,25 @@
+from src.common.llm_gateway import BACKGROUND, llm_gateway
+from src.utils import tracing
+from google.genai import types
+from ..config.llm import SUMMARIZE_HISTORY_PROMPT
+from ..model.search import History
+
+@tracing.traced("agent.summary")
+def summarize_history(previous_summary: str, turns: History) -> str:
+    """Fold `turns` into the running summary of the conversation before them."""
+    transcript = "\n\n".join(
+        f"{'User' if turn['role'] == 'user' else 'Assistant'}: {' '.join(part.get('text', '') for part in turn['parts'])}"
+        for turn in turns
+    )
+    summary_res = llm_gateway.generate_content(
+        model="gemini-2.5-flash",
+        contents=f"Previous summary:\n{previous_summary or '-'}\n\nNew turns:\n{transcript}",
+        config=types.GenerateContentConfig(
+            system_instruction=SUMMARIZE_HISTORY_PROMPT,
+            temperature=0.2,
+            max_output_tokens=1024,
+        ),
+        priority=BACKGROUND,
+        caller="summary",
+    )
+    return (summary_res.text or "").strip()
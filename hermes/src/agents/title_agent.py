@@ -1,15 +1,19 @@
-from src.common.gemini_client import client as gemini_client
+from src.common.llm_gateway import BACKGROUND, llm_gateway
+from src.utils import tracing
 from google.genai import types
 from ..config.llm import GENERATE_TITLE_AGENT_PROMPT
 from ..model.search import History
 
+@tracing.traced("agent.title")
 def generate_title(history: History):
-    title_res = gemini_client.models.generate_content(
+    title_res = llm_gateway.generate_content(
         model="gemini-2.5-flash",
         contents=history,
         config=types.GenerateContentConfig(
             system_instruction=GENERATE_TITLE_AGENT_PROMPT,
             max_output_tokens=500,
         ),
+        priority=BACKGROUND,
+        caller="title",
     )
     return title_res.text
\ No newline at end of file
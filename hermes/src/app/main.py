@@ -1,6 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from src.consumer.chat_consumer import ChatConsumer
-from src.utils.logger import setup_logging
+from src.utils.logger import setup_logging, shutdown_logging
+from src.local_index.corpus_engine import preload_local_engines
+from src.local_index.replica import preload_replicas
+from src.common.executors import executor_stats, shutdown_executors
+from src.common.resilience import breaker_stats
+from src.common.llm_gateway import llm_gateway
+from src.common.prompt_cache import prompt_cache
+from src.utils import metrics
+from src.utils.tracing import configure_tracing
+from src.utils.flight_recorder import flight_recorder
+from src.utils import profiling
 from contextlib import asynccontextmanager
 import asyncio
 import os
@@ -8,6 +19,11 @@ import os
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+    configure_tracing("hermes")
+    metrics.start_snapshots()
+    preload_local_engines()
+    preload_replicas()
+    await asyncio.to_thread(prompt_cache.start)
     loop = asyncio.get_running_loop()
     task = loop.create_task(ChatConsumer.consume(loop))
     yield
@@ -16,9 +32,73 @@ async def lifespan(app: FastAPI):
         await task
     except asyncio.CancelledError:
         pass
+    shutdown_executors(wait=False)
+    await asyncio.to_thread(prompt_cache.stop)
+    flight_recorder.dump()
+    metrics.stop_snapshots()
+    shutdown_logging()
 
 app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/executors")
+def executors():
+    """Saturation of the per-dependency thread pools."""
+    return executor_stats()
+
+
+@app.get("/breakers")
+def breakers():
+    """State and counters of the per-backend circuit breakers."""
+    return breaker_stats()
+
+
+@app.get("/llm")
+def llm():
+    """Gemini gateway occupancy plus per-model calls, 429s, tokens and latency."""
+    return llm_gateway.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Latency histograms, counters and gauges in the Prometheus text format, summed over the uvicorn workers."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/admin/flight-recorder")
+def flight_recorder_snapshot():
+    """The slowest recent messages and the latest failures, with per-stage timings and Gemini usage."""
+    return flight_recorder.snapshot()
+
+
+def _require_profiling():
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+
+@app.get("/admin/profile/sample", response_class=PlainTextResponse)
+async def profile_sample(seconds: float = 30.0):
+    """Sample every thread for `seconds` and return collapsed stacks for flamegraph.pl or speedscope."""
+    _require_profiling()
+    try:
+        stacks = await asyncio.to_thread(profiling.sampling_profiler.sample, seconds)
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(profiling.SamplingProfiler.render(stacks))
+
+
+@app.post("/admin/profile/messages")
+def profile_messages(count: int = 1):
+    """Profile the next `count` chat messages with cProfile."""
+    _require_profiling()
+    return {"pending": profiling.message_profiler.arm(count)}
+
+
+@app.get("/admin/profile/messages")
+def message_profiles():
+    """Collected message profiles, newest first, with the flight recorder's stage timings."""
+    _require_profiling()
+    return {"pending": profiling.message_profiler.remaining, "profiles": profiling.message_profiler.profiles()}
@@ -0,0 +1,84 @@
+import argparse
+import json
+import random
+import timeit
+from typing import Any, Callable, Dict, List
+
+from src.utils import codec
+
+PARAGRAPH = (
+    "(1) Setiap orang yang dengan sengaja dan tanpa hak mendistribusikan informasi elektronik "
+    "sebagaimana dimaksud dalam Pasal 27 ayat (3) dipidana dengan pidana penjara paling lama "
+    "empat tahun dan/atau denda paling banyak Rp750.000.000,00. "
+)
+
+
+def realistic_documents(seed: int = 0) -> List[Dict[str, Any]]:
+    """Retrieved context shaped like one message's `documents`: pasal hits, dense matches and metadata."""
+    rng = random.Random(seed)
+    documents = []
+    for i in range(10):
+        documents.append({
+            "score": rng.uniform(5, 20),
+            "id": f"UU_Nomor_{rng.randint(1, 40)}_Tahun_{rng.randint(1970, 2024)}___{i + 1}",
+            "source": {"isi": PARAGRAPH * rng.randint(2, 8), "pasal": f"Pasal {i + 1}", "bab": "BAB II"},
+        })
+    for i in range(10):
+        documents.append({
+            "id": f"KUH_Perdata___{rng.randint(1, 1993)}",
+            "score": rng.random(),
+            "metadata": {"content": PARAGRAPH * rng.randint(1, 4), "bab_content": "Tentang Perikatan", "buku_id": 3, "_type": "kuhper"},
+        })
+    for i in range(5):
+        documents.append({
+            "_id": f"UU_{i}_2020",
+            "id": f"UU_{i}_2020",
+            "source": {
+                "metadata": {"Judul": f"Undang-Undang Nomor {i} Tahun 2020 tentang Cipta Kerja", "Tahun": "2020", "Status": "Berlaku", "Bidang": "Ekonomi"},
+                "abstrak": PARAGRAPH * 2,
+                "files": [{"file_id": str(i), "filename": f"uu{i}.pdf", "download_url": f"/Download/{i}/uu{i}.pdf"}],
+            },
+            "passages": [PARAGRAPH[:400] for _ in range(3)],
+            "pasal": None,
+        })
+    return documents
+
+
+def queue_message(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "messages": [{"role": "user", "content": "Apa sanksi pencemaran nama baik?", "timestamp": "2025-01-01T00:00:00Z"}] * 6,
+        "session_uid": "3f6e1f2a-7d1b-4a52-9a51-0c2f0d1f5a11",
+        "user_uid": "b4c7b5e2-2f0a-4c3e-8d7c-9f0a1b2c3d4e",
+        "access_token": "x" * 900,
+        "refresh_token": "y" * 40,
+        "message_id": "9c1d0e7a-1111-2222-3333-444455556666",
+        "documents": documents,
+    }
+
+
+def bench(func: Callable[[], Any], repeat: int) -> float:
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode/decode cost of document payloads per JSON codec")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per timing run")
+    args = parser.parse_args()
+
+    payloads = {"documents": realistic_documents(), "queue message": queue_message(realistic_documents(1))}
+    print(f"codec backend: {codec.BACKEND}")
+    for name, payload in payloads.items():
+        indented = json.dumps(payload, indent=2)
+        compact = codec.dumpb(payload)
+        rows = [
+            ("json indent=2", len(indented.encode("utf-8")),
+             bench(lambda: json.dumps(payload, indent=2), args.repeat), bench(lambda: json.loads(indented), args.repeat)),
+            ("json compact", len(json.dumps(payload, separators=(",", ":")).encode("utf-8")),
+             bench(lambda: json.dumps(payload, separators=(",", ":")), args.repeat), bench(lambda: json.loads(compact), args.repeat)),
+            (f"codec ({codec.BACKEND})", len(compact),
+             bench(lambda: codec.dumpb(payload), args.repeat), bench(lambda: codec.loads(compact), args.repeat)),
+        ]
+        print(f"\n{name}")
+        print(f"{'':<18}{'bytes':>10}{'encode us':>12}{'decode us':>12}")
+        for label, size, encode_us, decode_us in rows:
+            print(f"{label:<18}{size:>10}{encode_us:>12.1f}{decode_us:>12.1f}")
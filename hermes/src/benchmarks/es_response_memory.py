@@ -0,0 +1,110 @@
+import argparse
+import io
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+import requests
+
+from src.tools.search_legal_document import (
+    FILE_CONTENT_FIELD,
+    LEGAL_DOC_CONTENT_CHARS,
+    get_elasticsearch_auth,
+    read_search_response,
+)
+from src.utils import codec
+from src.utils.logger import setup_logging
+
+
+def synthetic_response(hits: int, content_kb: int) -> bytes:
+    """A `peraturan_indonesia` response whose hits each carry `content_kb` KB of file text."""
+    paragraph = "Setiap orang berhak atas pengakuan, jaminan, perlindungan dan kepastian hukum. "
+    content = (paragraph * (content_kb * 1024 // len(paragraph) + 1))[:content_kb * 1024]
+    body = {
+        "took": 12,
+        "hits": {
+            "total": {"value": hits, "relation": "eq"},
+            "max_score": 10.0,
+            "hits": [
+                {
+                    "_index": "peraturan_indonesia",
+                    "_id": f"UU_{i}_2020",
+                    "_score": 10.0 - i * 0.1,
+                    "_source": {
+                        "metadata": {"Judul": f"Undang-Undang Nomor {i} Tahun 2020", "Tahun": "2020", "Status": "Berlaku"},
+                        "abstrak": paragraph * 3,
+                        "files": [{"file_id": str(i), "filename": f"uu{i}.pdf", "download_url": f"/files/uu{i}.pdf", "content": content}],
+                    },
+                }
+                for i in range(hits)
+            ],
+        },
+    }
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def record_response(query: Dict[str, Any], path: str):
+    """Save the raw body of a live `peraturan_indonesia` search, with full file contents."""
+    url = f"{os.environ.get('ES_BASE_URL', 'https://chat.lexin.cs.ui.ac.id/elasticsearch')}/peraturan_indonesia/_search"
+    response = requests.post(url, json=query, auth=get_elasticsearch_auth(), timeout=60)
+    response.raise_for_status()
+    with open(path, "wb") as f:
+        f.write(response.content)
+
+
+def parse_buffered(body: bytes) -> Dict[str, Any]:
+    """The buffered path: the whole body, `codec.loads`, then a reformatted copy of every hit."""
+    data = codec.loads(body)
+    hits = [
+        {"score": hit.get("_score"), "id": hit.get("_id"), "source": hit.get("_source", {})}
+        for hit in data.get("hits", {}).get("hits", [])
+    ]
+    return {"total_hits": data["hits"]["total"]["value"], "max_score": data["hits"].get("max_score"), "hits": hits}
+
+
+def parse_streamed(body: bytes, content_chars: int) -> Dict[str, Any]:
+    return read_search_response(io.BufferedReader(io.BytesIO(body), buffer_size=64 * 1024), content_chars=content_chars)
+
+
+def measure(name: str, run: Callable[[], Any]) -> Dict[str, Any]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"name": name, "peak_mb": round(peak / 2 ** 20, 2), "ms": round(elapsed * 1000, 1), "hits": len(result["hits"])}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory of buffered vs streamed ES response parsing")
+    parser.add_argument("--response", help="Recorded response body; synthetic when omitted")
+    parser.add_argument("--record", help="Record a live response to this path first")
+    parser.add_argument("--query", default="otonomi daerah", help="Title query used with --record")
+    parser.add_argument("--hits", type=int, default=20, help="Synthetic hits")
+    parser.add_argument("--content-kb", type=int, default=512, help="Synthetic file content per hit, in KB")
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "WARNING"))
+    if args.record:
+        # A title search: no nested files clause, so passage mode leaves files.content in the response
+        record_response({"size": args.hits, "query": {"match": {"metadata.Judul": args.query}}}, args.record)
+        args.response = args.record
+
+    if args.response:
+        with open(args.response, "rb") as f:
+            body = f.read()
+    else:
+        body = synthetic_response(args.hits, args.content_kb)
+
+    # The body is the socket's job in production, so it is created outside the measured region;
+    # the buffered path still needs its own full copy, which `response.content` would hold
+    print(f"response body: {len(body) / 2 ** 20:.2f} MB")
+    for row in (
+        measure("buffered codec.loads", lambda: parse_buffered(bytes(body))),
+        measure(f"streamed, {LEGAL_DOC_CONTENT_CHARS} chars", lambda: parse_streamed(body, LEGAL_DOC_CONTENT_CHARS)),
+        measure(f"streamed, no {FILE_CONTENT_FIELD}", lambda: parse_streamed(body, 0)),
+    ):
+        print(f"{row['name']:<28} peak {row['peak_mb']:>8.2f} MB  {row['ms']:>8.1f} ms  hits {row['hits']}")
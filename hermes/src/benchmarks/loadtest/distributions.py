@@ -0,0 +1,45 @@
+import math
+import random
+from typing import List, Sequence
+
+
+class Distribution:
+    """A latency or size distribution parsed from `kind:params`.
+
+    - `fixed:0.5`
+    - `uniform:0.2,0.8`
+    - `lognormal:0.6,0.5` (median, sigma of the underlying normal; long right tail like real APIs)
+    - `normal:1.0,0.2` (clipped at zero)
+    """
+
+    def __init__(self, spec: str, rng: random.Random = None):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",") if value]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "normal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Expected one of fixed:x, uniform:a,b, lognormal:median,sigma, normal:mean,sd; got {spec!r}")
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return self.rng.lognormvariate(math.log(median), sigma)
+        return max(0.0, self.rng.gauss(*self.params))
+
+    def __repr__(self) -> str:
+        return self.spec
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, `q` in [0, 100]; NaN for no values."""
+    if not values:
+        return float("nan")
+    ordered: List[float] = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
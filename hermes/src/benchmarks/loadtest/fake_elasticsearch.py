@@ -0,0 +1,133 @@
+import asyncio
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Set
+
+from aiohttp import web
+
+from .distributions import Distribution
+
+WORD = re.compile(r"\w+")
+
+
+def _strings(node: Any) -> Iterator[str]:
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from _strings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _strings(value)
+
+
+def _requested_ids(node: Any) -> Set[str]:
+    """Ids from `terms`/`term` on `_id` or an `ids` query anywhere in the body."""
+    ids: Set[str] = set()
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in ("terms", "term") and isinstance(value, dict) and "_id" in value:
+                found = value["_id"]
+                ids.update(found if isinstance(found, list) else [found.get("value") if isinstance(found, dict) else found])
+            elif key == "ids" and isinstance(value, dict):
+                ids.update(value.get("values", []))
+            else:
+                ids |= _requested_ids(value)
+    elif isinstance(node, list):
+        for value in node:
+            ids |= _requested_ids(value)
+    return ids
+
+
+class FakeElasticsearch:
+    """Answers `_search`, `_msearch` and `_mget` from an in-memory corpus.
+
+    Queries are not interpreted beyond id lookups: every string in the query
+    body is tokenized and documents are ranked by how many of those tokens
+    they contain, which is enough to return different, stable hits per
+    question. Unknown indices answer with no hits, like an empty index.
+    """
+
+    def __init__(self, corpus: Dict[str, List[Dict[str, Any]]], latency: Distribution):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.documents = corpus
+        self._tokens = {
+            index_name: [set(WORD.findall(json.dumps(document["_source"], ensure_ascii=False).lower())) for document in documents]
+            for index_name, documents in corpus.items()
+        }
+        self._by_id = {
+            index_name: {document["_id"]: document for document in documents}
+            for index_name, documents in corpus.items()
+        }
+
+    def _hit(self, index_name: str, document: Dict[str, Any], score: float) -> Dict[str, Any]:
+        return {"_index": index_name, "_id": document["_id"], "_score": score, "_source": document["_source"]}
+
+    def search(self, index_name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        documents = self.documents.get(index_name, [])
+        size = int(body.get("size", 10))
+        ids = _requested_ids(body.get("query", {}))
+        if ids:
+            by_id = self._by_id.get(index_name, {})
+            hits = [self._hit(index_name, by_id[i], 1.0) for i in ids if i in by_id][:size]
+        else:
+            terms = {token for text in _strings(body.get("query", {})) for token in WORD.findall(text.lower())}
+            scored = [(len(terms & tokens), position) for position, tokens in enumerate(self._tokens.get(index_name, []))]
+            scored = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))[:size]
+            hits = [self._hit(index_name, documents[position], float(score)) for score, position in scored]
+        return {
+            "took": 1,
+            "timed_out": False,
+            "hits": {
+                "total": {"value": len(hits), "relation": "eq"},
+                "max_score": hits[0]["_score"] if hits else None,
+                "hits": hits,
+            },
+        }
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        self.calls["_search"] += 1
+        await asyncio.sleep(self.latency.sample())
+        body = await request.json() if request.can_read_body else {}
+        return web.json_response(self.search(request.match_info["index"], body))
+
+    async def handle_msearch(self, request: web.Request) -> web.Response:
+        self.calls["_msearch"] += 1
+        await asyncio.sleep(self.latency.sample())
+        lines = [json.loads(line) for line in (await request.text()).splitlines() if line.strip()]
+        default_index = request.match_info.get("index")
+        responses = []
+        for header, body in zip(lines[::2], lines[1::2]):
+            responses.append({**self.search(header.get("index", default_index), body), "status": 200})
+        return web.json_response({"took": 1, "responses": responses})
+
+    async def handle_mget(self, request: web.Request) -> web.Response:
+        self.calls["_mget"] += 1
+        await asyncio.sleep(self.latency.sample())
+        body = await request.json()
+        default_index = request.match_info.get("index")
+        requests = body.get("docs") or [{"_id": document_id} for document_id in body.get("ids", [])]
+        docs = []
+        for item in requests:
+            index_name = item.get("_index", default_index)
+            document = self._by_id.get(index_name, {}).get(item["_id"])
+            if document is None:
+                docs.append({"_index": index_name, "_id": item["_id"], "found": False})
+            else:
+                docs.append({"_index": index_name, "_id": item["_id"], "found": True, "_source": document["_source"]})
+        return web.json_response({"docs": docs})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.calls))
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get("/_loadtest/stats", self.stats)
+        app.router.add_route("*", "/_msearch", self.handle_msearch)
+        app.router.add_route("*", "/_mget", self.handle_mget)
+        app.router.add_route("*", "/{index}/_search", self.handle_search)
+        app.router.add_route("*", "/{index}/_msearch", self.handle_msearch)
+        app.router.add_route("*", "/{index}/_mget", self.handle_mget)
+        return app
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from aiohttp import web
+
+from .distributions import Distribution
+from .fixtures import QUESTIONS, TOPICS
+
+# Values for schema fields the pipeline branches on; a random choice per response
+DEFAULT_FIELD_VALUES = {
+    "classification": ["kuhp", "kuhper", "undang_undang", "peraturan"],
+    "is_sufficient": [False],
+}
+
+FILLER = (
+    "Berdasarkan ketentuan yang berlaku, perbuatan tersebut dapat dikenai sanksi sesuai pasal yang relevan. "
+    "Pihak yang dirugikan berhak menempuh upaya hukum melalui pengadilan yang berwenang. "
+)
+# Rough characters per token, the same ratio the gateway uses to estimate prompt size
+CHARS_PER_TOKEN = 4
+# Tokens per streamed chunk
+CHUNK_TOKENS = 16
+
+
+class FakeGemini:
+    """Gemini REST API stand-in with configurable latency and token rate.
+
+    Serves `generateContent`, `streamGenerateContent?alt=sse`,
+    `batchEmbedContents` and `cachedContents` under any model name. A call
+    takes its time to first token, then `output tokens / token rate`;
+    streams spread that time over their chunks. Structured-output requests
+    get a JSON instance of their `responseSchema`, and JSON requests without
+    one (the search agent) get an Elasticsearch query.
+    """
+
+    def __init__(self, ttft: Distribution, output_tokens: Distribution, token_rate: float,
+                 embed_latency: Distribution, dimension: int = 768, error_rate: float = 0.0,
+                 field_values: Optional[Dict[str, List[Any]]] = None, seed: int = 0):
+        self.ttft = ttft
+        self.output_tokens = output_tokens
+        self.token_rate = token_rate
+        self.embed_latency = embed_latency
+        self.dimension = dimension
+        self.error_rate = error_rate
+        self.field_values = {**DEFAULT_FIELD_VALUES, **(field_values or {})}
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self._cache_ids = itertools.count(1)
+
+    # Responses
+
+    def _text(self, tokens: int) -> str:
+        chars = max(tokens, 1) * CHARS_PER_TOKEN
+        return (FILLER * (chars // len(FILLER) + 1))[:chars]
+
+    def _instance(self, schema: Dict[str, Any], definitions: Dict[str, Any], field: str = "") -> Any:
+        """A value matching an OpenAPI `responseSchema` or a JSON `responseJsonSchema`."""
+        if "$ref" in schema:
+            return self._instance(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions, field)
+        if "anyOf" in schema:
+            options = [option for option in schema["anyOf"] if str(option.get("type", "")).lower() != "null"]
+            return self._instance(options[0] if options else {}, definitions, field)
+        if field in self.field_values:
+            return self.rng.choice(self.field_values[field])
+        kind = str(schema.get("type", "object")).lower()
+        if "enum" in schema:
+            return self.rng.choice(schema["enum"])
+        if kind == "object":
+            return {name: self._instance(child, definitions, name) for name, child in schema.get("properties", {}).items()}
+        if kind == "array":
+            return [self._instance(schema.get("items", {}), definitions, field.rstrip("s")) for _ in range(self.rng.randint(1, 3))]
+        if kind == "boolean":
+            return False
+        if kind in ("integer", "number"):
+            return 1
+        if field == "question":
+            return self.rng.choice(QUESTIONS)
+        return self._text(int(self.output_tokens.sample()) // 4)
+
+    def _es_query(self) -> Dict[str, Any]:
+        return {"query": {"match": {"content": self.rng.choice(TOPICS)}}, "size": 5}
+
+    def _response_text(self, config: Dict[str, Any]) -> str:
+        schema = config.get("responseSchema") or config.get("responseJsonSchema")
+        if schema is not None:
+            return json.dumps(self._instance(schema, schema.get("$defs") or schema.get("definitions") or {}))
+        if config.get("responseMimeType") == "application/json":
+            return json.dumps(self._es_query())
+        return self._text(int(self.output_tokens.sample()))
+
+    @staticmethod
+    def _usage(request: Dict[str, Any], text: str) -> Dict[str, int]:
+        prompt = len(json.dumps(request.get("contents", [])) + json.dumps(request.get("systemInstruction", ""))) // CHARS_PER_TOKEN
+        output = len(text) // CHARS_PER_TOKEN
+        return {"promptTokenCount": prompt, "candidatesTokenCount": output, "totalTokenCount": prompt + output}
+
+    @staticmethod
+    def _candidate(text: str, finish: bool) -> Dict[str, Any]:
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finish:
+            candidate["finishReason"] = "STOP"
+        return candidate
+
+    def _rate_limited(self) -> Optional[web.Response]:
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.calls["rate_limited"] += 1
+            return web.json_response({"error": {
+                "code": 429,
+                "message": "Resource has been exhausted (fake).",
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1s"}],
+            }}, status=429)
+        return None
+
+    # Handlers
+
+    async def models(self, request: web.Request) -> web.StreamResponse:
+        model, _, method = request.match_info["call"].partition(":")
+        body = await request.json()
+        rejected = self._rate_limited()
+        if rejected is not None:
+            return rejected
+        self.calls[method] += 1
+        if method == "generateContent":
+            return await self._generate(body)
+        if method == "streamGenerateContent":
+            return await self._stream(request, body)
+        if method == "batchEmbedContents":
+            return await self._embed(body)
+        return web.json_response({"error": {"code": 404, "message": f"Unknown method {method}"}}, status=404)
+
+    async def _generate(self, body: Dict[str, Any]) -> web.Response:
+        text = self._response_text(body.get("generationConfig", {}))
+        await asyncio.sleep(self.ttft.sample() + len(text) / CHARS_PER_TOKEN / self.token_rate)
+        return web.json_response({"candidates": [self._candidate(text, True)], "usageMetadata": self._usage(body, text)})
+
+    async def _stream(self, request: web.Request, body: Dict[str, Any]) -> web.StreamResponse:
+        text = self._response_text(body.get("generationConfig", {}))
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(self.ttft.sample())
+        step = CHUNK_TOKENS * CHARS_PER_TOKEN
+        for start in range(0, len(text), step):
+            chunk = text[start:start + step]
+            last = start + step >= len(text)
+            payload = {"candidates": [self._candidate(chunk, last)]}
+            if last:
+                payload["usageMetadata"] = self._usage(body, text)
+            await response.write(f"data: {json.dumps(payload)}\r\n\r\n".encode("utf-8"))
+            if not last:
+                await asyncio.sleep(CHUNK_TOKENS / self.token_rate)
+        await response.write_eof()
+        return response
+
+    def _vector(self, text: str) -> List[float]:
+        """Deterministic unit vector per text, so repeated questions embed identically."""
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+    async def _embed(self, body: Dict[str, Any]) -> web.Response:
+        await asyncio.sleep(self.embed_latency.sample())
+        embeddings = []
+        for item in body.get("requests", []):
+            text = " ".join(part.get("text", "") for part in item.get("content", {}).get("parts", []))
+            embeddings.append({"values": self._vector(text)})
+        return web.json_response({"embeddings": embeddings})
+
+    async def create_cache(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.calls["cachedContents.create"] += 1
+        return web.json_response({**body, "name": f"cachedContents/fake-{next(self._cache_ids)}",
+                                  "expireTime": "2099-01-01T00:00:00Z"})
+
+    async def update_cache(self, request: web.Request) -> web.Response:
+        if request.method == "DELETE":
+            return web.json_response({})
+        return web.json_response({"name": f"cachedContents/{request.match_info['name']}", "expireTime": "2099-01-01T00:00:00Z"})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.calls))
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/{version}/models/{call}", self.models)
+        app.router.add_post("/{version}/cachedContents", self.create_cache)
+        app.router.add_route("PATCH", "/{version}/cachedContents/{name}", self.update_cache)
+        app.router.add_route("DELETE", "/{version}/cachedContents/{name}", self.update_cache)
+        app.router.add_get("/_loadtest/stats", self.stats)
+        return app
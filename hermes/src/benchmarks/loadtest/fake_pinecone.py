@@ -0,0 +1,52 @@
+import asyncio
+import hashlib
+import json
+from collections import Counter
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+from .distributions import Distribution
+
+
+class FakePinecone:
+    """Pinecone data-plane stand-in serving every index under `/<index name>/query`.
+
+    Matches are chosen deterministically from the query vector, so the same
+    question returns the same passages without storing real embeddings.
+    """
+
+    def __init__(self, vectors: Dict[str, List[Dict[str, Any]]], latency: Distribution):
+        self.vectors = vectors
+        self.latency = latency
+        self.calls: Counter = Counter()
+
+    def query(self, index_name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        records = self.vectors.get(index_name, [])
+        top_k = min(int(body.get("topK", 10)), len(records))
+        digest = hashlib.sha256(json.dumps(body.get("vector", [])[:8]).encode("utf-8")).digest()
+        start = int.from_bytes(digest[:4], "little") % len(records) if records else 0
+        include_metadata = body.get("includeMetadata", False)
+        matches = []
+        for rank in range(top_k):
+            record = records[(start + rank) % len(records)]
+            match = {"id": record["id"], "score": round(0.9 - rank * 0.01, 4), "values": []}
+            if include_metadata:
+                match["metadata"] = record["metadata"]
+            matches.append(match)
+        return {"matches": matches, "namespace": body.get("namespace", ""), "usage": {"readUnits": 5}}
+
+    async def handle_query(self, request: web.Request) -> web.Response:
+        index_name = request.match_info["index"]
+        self.calls[index_name] += 1
+        await asyncio.sleep(self.latency.sample())
+        return web.json_response(self.query(index_name, await request.json()))
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.calls))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/_loadtest/stats", self.stats)
+        app.router.add_post("/{index}/query", self.handle_query)
+        return app
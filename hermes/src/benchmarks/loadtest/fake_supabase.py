@@ -0,0 +1,176 @@
+import asyncio
+import base64
+import json
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+from .distributions import Distribution
+
+SINGLE_OBJECT = "application/vnd.pgrst.object+json"
+
+
+def _b64(data: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def make_access_token(user_uid: str, ttl_seconds: int = 86400) -> str:
+    """An unsigned JWT that gotrue's `set_session` accepts without refreshing."""
+    header = {"alg": "HS256", "typ": "JWT"}
+    payload = {"sub": user_uid, "role": "authenticated", "aud": "authenticated", "exp": int(time.time()) + ttl_seconds}
+    return f"{_b64(header)}.{_b64(payload)}.{_b64({'sig': 'loadtest'})}"
+
+
+def _user(user_uid: str) -> Dict[str, Any]:
+    return {"id": user_uid, "aud": "authenticated", "role": "authenticated", "app_metadata": {}, "user_metadata": {},
+            "created_at": datetime.now(timezone.utc).isoformat()}
+
+
+def _filter(column: str, expression: str) -> Callable[[Dict[str, Any]], bool]:
+    operator, _, value = expression.partition(".")
+    if operator == "eq":
+        return lambda row: str(row.get(column)) == value
+    if operator == "neq":
+        return lambda row: str(row.get(column)) != value
+    if operator == "in":
+        values = set(value.strip("()").split(","))
+        return lambda row: str(row.get(column)) in values
+    if operator == "is":
+        return lambda row: row.get(column) is None if value == "null" else str(row.get(column)).lower() == value
+    raise ValueError(f"Unsupported filter {column}={expression}")
+
+
+class MessageTimeline:
+    """When an assistant row was created, first got content, and reached each state (epoch seconds)."""
+
+    def __init__(self, session_uid: Optional[str], created_at: float):
+        self.session_uid = session_uid
+        self.created_at = created_at
+        self.first_content_at: Optional[float] = None
+        self.states: Dict[str, float] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"session_uid": self.session_uid, "created_at": self.created_at,
+                "first_content_at": self.first_content_at, "states": self.states}
+
+
+class FakeSupabase:
+    """PostgREST and GoTrue stand-in holding tables in memory.
+
+    Supports what chronos and hermes use: `select` with `eq`/`neq`/`in`/`is`
+    filters, `order`, `limit` and `single()`, plus insert, update and delete
+    returning representations, and the auth endpoints `set_session` calls.
+    Writes to `chat` are timestamped, so the load driver can read time to
+    first token and completion per message from `/_loadtest/messages`.
+    """
+
+    def __init__(self, latency: Distribution):
+        self.latency = latency
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.timelines: Dict[str, MessageTimeline] = {}
+        self.calls: Counter = Counter()
+
+    def _matching(self, table: str, query) -> List[Dict[str, Any]]:
+        predicates = [_filter(column, expression) for column, expression in query.items()
+                      if column not in ("select", "order", "limit", "offset", "on_conflict", "columns")]
+        rows = [row for row in self.tables[table] if all(predicate(row) for predicate in predicates)]
+        if "order" in query:
+            for term in reversed(query["order"].split(",")):
+                column, _, direction = term.partition(".")
+                rows.sort(key=lambda row: (row.get(column) is None, str(row.get(column))),
+                          reverse=direction.startswith("desc"))
+        offset = int(query.get("offset", 0))
+        limit = int(query["limit"]) if "limit" in query else None
+        return rows[offset:offset + limit if limit is not None else None]
+
+    @staticmethod
+    def _project(rows: List[Dict[str, Any]], select: str) -> List[Dict[str, Any]]:
+        columns = [column.strip() for column in select.split(",") if column.strip()]
+        if not columns or "*" in columns:
+            return [dict(row) for row in rows]
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    def _respond(self, request: web.Request, rows: List[Dict[str, Any]], status: int = 200) -> web.Response:
+        rows = self._project(rows, request.query.get("select", "*"))
+        if SINGLE_OBJECT in request.headers.get("Accept", ""):
+            if len(rows) != 1:
+                return web.json_response({"code": "PGRST116", "message": f"{len(rows)} rows returned"}, status=406)
+            return web.json_response(rows[0], status=status)
+        if status != 200 and "return=representation" not in request.headers.get("Prefer", ""):
+            return web.Response(status=204)
+        return web.json_response(rows, status=status)
+
+    def _track(self, table: str, row: Dict[str, Any], now: float):
+        if table != "chat" or row.get("role", "assistant") != "assistant":
+            return
+        timeline = self.timelines.setdefault(row["id"], MessageTimeline(row.get("session_uid"), now))
+        if timeline.first_content_at is None and row.get("content") and row.get("state") in ("streaming", "done"):
+            timeline.first_content_at = now
+        state = row.get("state")
+        if state and state not in timeline.states:
+            timeline.states[state] = now
+
+    async def table(self, request: web.Request) -> web.Response:
+        table = request.match_info["table"]
+        self.calls[f"{request.method} {table}"] += 1
+        await asyncio.sleep(self.latency.sample())
+        now = time.time()
+        if request.method == "GET":
+            return self._respond(request, self._matching(table, request.query))
+        if request.method == "POST":
+            body = await request.json()
+            rows = body if isinstance(body, list) else [body]
+            created = []
+            for values in rows:
+                row = {"id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat(), **values}
+                self.tables[table].append(row)
+                self._track(table, row, now)
+                created.append(row)
+            return self._respond(request, created, status=201)
+        if request.method == "PATCH":
+            values = await request.json()
+            rows = self._matching(table, request.query)
+            for row in rows:
+                row.update(values)
+                self._track(table, row, now)
+            return self._respond(request, rows, status=200 if "return=representation" in request.headers.get("Prefer", "") else 204)
+        if request.method == "DELETE":
+            rows = self._matching(table, request.query)
+            self.tables[table] = [row for row in self.tables[table] if row not in rows]
+            return self._respond(request, rows, status=200)
+        return web.Response(status=405)
+
+    async def user(self, request: web.Request) -> web.Response:
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.split(".")[1] + "=="))
+        except (IndexError, ValueError):
+            return web.json_response({"msg": "invalid JWT"}, status=401)
+        return web.json_response(_user(payload.get("sub", str(uuid.uuid4()))))
+
+    async def token(self, request: web.Request) -> web.Response:
+        user_uid = str(uuid.uuid4())
+        return web.json_response({
+            "access_token": make_access_token(user_uid), "refresh_token": uuid.uuid4().hex, "token_type": "bearer",
+            "expires_in": 86400, "expires_at": int(time.time()) + 86400, "user": _user(user_uid),
+        })
+
+    async def messages(self, request: web.Request) -> web.Response:
+        """Assistant message timelines, keyed by chat row id."""
+        return web.json_response({message_id: timeline.as_dict() for message_id, timeline in self.timelines.items()})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.calls))
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get("/_loadtest/messages", self.messages)
+        app.router.add_get("/_loadtest/stats", self.stats)
+        app.router.add_get("/auth/v1/user", self.user)
+        app.router.add_post("/auth/v1/token", self.token)
+        app.router.add_route("*", "/rest/v1/{table}", self.table)
+        return app
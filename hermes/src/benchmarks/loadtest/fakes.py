@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+from typing import Dict, List
+
+from aiohttp import web
+
+from .distributions import Distribution
+from .fake_elasticsearch import FakeElasticsearch
+from .fake_gemini import FakeGemini
+from .fake_pinecone import FakePinecone
+from .fake_supabase import FakeSupabase, make_access_token
+from .fixtures import build_vectors, load_corpus
+
+
+def build_apps(args: argparse.Namespace) -> Dict[str, web.Application]:
+    field_values = {}
+    for item in args.field or []:
+        name, _, values = item.partition("=")
+        field_values[name] = [{"true": True, "false": False}.get(value, value) for value in values.split(",")]
+    gemini = FakeGemini(
+        ttft=Distribution(args.gemini_ttft),
+        output_tokens=Distribution(args.gemini_output_tokens),
+        token_rate=args.gemini_token_rate,
+        embed_latency=Distribution(args.embed_latency),
+        dimension=args.dimension,
+        error_rate=args.gemini_error_rate,
+        field_values=field_values,
+    )
+    return {
+        "gemini": gemini.app(),
+        "elasticsearch": FakeElasticsearch(load_corpus(args.corpus, args.documents), Distribution(args.es_latency)).app(),
+        "pinecone": FakePinecone(build_vectors(args.documents), Distribution(args.pinecone_latency)).app(),
+        "supabase": FakeSupabase(Distribution(args.supabase_latency)).app(),
+    }
+
+
+def environment(host: str, ports: Dict[str, int]) -> Dict[str, List[str]]:
+    """Environment for hermes and chronos to talk to the fakes instead of the real services."""
+    url = {name: f"http://{host}:{port}" for name, port in ports.items()}
+    anon_key = make_access_token("anon", ttl_seconds=10 * 365 * 86400)
+    supabase = [f"SUPABASE_URL={url['supabase']}", f"SUPABASE_ANON_KEY={anon_key}"]
+    return {
+        "hermes": supabase + [
+            f"GEMINI_BASE_URL={url['gemini']}",
+            "GENAI_API_KEY=loadtest",
+            f"ES_BASE_URL={url['elasticsearch']}",
+            f"PINECONE_HOST={url['pinecone']}",
+            "PINECONE_API_KEY=loadtest",
+            "PINECONE_API_KEY_2=loadtest",
+        ],
+        "chronos": supabase,
+    }
+
+
+async def serve(args: argparse.Namespace):
+    ports = {"gemini": args.port, "elasticsearch": args.port + 1, "pinecone": args.port + 2, "supabase": args.port + 3}
+    runners = []
+    for name, app in build_apps(args).items():
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, args.host, ports[name]).start()
+        runners.append(runner)
+        print(f"fake {name:<14} http://{args.host}:{ports[name]}")
+    for service, variables in environment(args.host, ports).items():
+        print(f"\n# {service}")
+        for variable in variables:
+            print(f"export {variable}")
+    try:
+        await asyncio.Future()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101, help="Gemini port; ES, Pinecone and Supabase take the next three")
+    parser.add_argument("--gemini-ttft", default="lognormal:0.8,0.4", help="Seconds before the first token")
+    parser.add_argument("--gemini-output-tokens", default="lognormal:400,0.5", help="Tokens per text response")
+    parser.add_argument("--gemini-token-rate", type=float, default=80.0, help="Output tokens per second")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="Share of calls answered with a 429")
+    parser.add_argument("--embed-latency", default="lognormal:0.08,0.3")
+    parser.add_argument("--dimension", type=int, default=768, help="Embedding size")
+    parser.add_argument("--field", action="append", metavar="NAME=V1,V2",
+                        help="Values for a structured-output field, e.g. classification=kuhp,kuhper")
+    parser.add_argument("--es-latency", default="lognormal:0.05,0.5")
+    parser.add_argument("--pinecone-latency", default="lognormal:0.04,0.4")
+    parser.add_argument("--supabase-latency", default="lognormal:0.01,0.3")
+    parser.add_argument("--corpus", help="Recorded {index: [{_id, _source}]} JSON; synthetic documents when omitted")
+    parser.add_argument("--documents", type=int, default=200, help="Synthetic documents per index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve local Gemini, Elasticsearch, Pinecone and Supabase fakes")
+    add_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,75 @@
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+from src.benchmarks.codec import PARAGRAPH
+
+# ES indices the retrieval strategies search
+ES_INDICES = ["kuhp", "kuhper", "undang-undang", "perpres", "peraturan_indonesia"]
+# Pinecone index names hermes opens, see src/common/pinecone_client.py
+PINECONE_INDICES = ["kuhp-demo-gemini", "kuhper", "undang-undang", "perpres"]
+
+QUESTIONS = [
+    "Apa sanksi pidana bagi pelaku pencemaran nama baik di media sosial?",
+    "Bagaimana syarat sahnya perjanjian menurut KUH Perdata?",
+    "Berapa pesangon yang wajib dibayar saat PHK karena efisiensi?",
+    "Apa hak ahli waris jika pewaris tidak meninggalkan wasiat?",
+    "Bagaimana prosedur gugatan cerai di pengadilan agama?",
+    "Apa saja kewajiban pengusaha terhadap pekerja kontrak?",
+    "Berapa lama masa berlaku sertifikat hak guna bangunan?",
+    "Apa ancaman hukuman untuk tindak pidana penipuan?",
+]
+
+TOPICS = ["pencemaran nama baik", "perjanjian", "pesangon", "waris", "perceraian", "pekerja kontrak",
+          "hak guna bangunan", "penipuan", "pajak", "perlindungan konsumen"]
+
+
+def _text(rng: random.Random, topic: str) -> str:
+    return f"Ketentuan mengenai {topic}. " + PARAGRAPH * rng.randint(1, 4)
+
+
+def _es_source(index_name: str, i: int, rng: random.Random) -> Dict[str, Any]:
+    topic = TOPICS[i % len(TOPICS)]
+    if index_name == "peraturan_indonesia":
+        return {
+            "metadata": {"Judul": f"Undang-Undang Nomor {i} Tahun 2020 tentang {topic.title()}", "Tahun": "2020",
+                         "Status": "Berlaku", "Bidang": "Hukum"},
+            "abstrak": _text(rng, topic),
+            "files": [{"file_id": str(i), "filename": f"uu{i}.pdf", "download_url": f"/Download/{i}/uu{i}.pdf"}],
+        }
+    return {"isi": _text(rng, topic), "content": _text(rng, topic), "pasal": f"Pasal {i + 1}", "bab": "BAB II",
+            "bab_content": f"Tentang {topic.title()}"}
+
+
+def build_corpus(documents_per_index: int = 200, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """Synthetic `{index: [{"_id", "_source"}]}` shaped like the real indices."""
+    rng = random.Random(seed)
+    corpus = {}
+    for index_name in ES_INDICES:
+        corpus[index_name] = [
+            {"_id": f"UU_{i}_2020" if index_name == "peraturan_indonesia" else f"{index_name.upper()}___{i + 1}",
+             "_source": _es_source(index_name, i, rng)}
+            for i in range(documents_per_index)
+        ]
+    return corpus
+
+
+def build_vectors(documents_per_index: int = 200, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """Synthetic `{pinecone index: [{"id", "metadata"}]}`; the fake scores them without real vectors."""
+    rng = random.Random(seed)
+    return {
+        index_name: [
+            {"id": f"{index_name}___{i + 1}",
+             "metadata": {"content": _text(rng, TOPICS[i % len(TOPICS)]), "pasal": f"Pasal {i + 1}", "_type": index_name}}
+            for i in range(documents_per_index)
+        ]
+        for index_name in PINECONE_INDICES
+    }
+
+
+def load_corpus(path: Optional[str], documents_per_index: int = 200) -> Dict[str, List[Dict[str, Any]]]:
+    """A recorded `{index: [{"_id", "_source"}]}` file, or the synthetic corpus when `path` is None."""
+    if path is None:
+        return build_corpus(documents_per_index)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
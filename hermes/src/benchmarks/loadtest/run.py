@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from .distributions import percentile
+from .fake_supabase import make_access_token
+from .fixtures import QUESTIONS
+
+# Row states after which hermes writes nothing more
+FINAL_STATES = ("done", "error", "failed")
+
+
+class Request:
+    def __init__(self, session_uid: str, question: str):
+        self.session_uid = session_uid
+        self.question = question
+        self.sent_at: Optional[float] = None
+        self.accepted_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.timeline: Optional[Dict[str, Any]] = None
+
+    @property
+    def final_state(self) -> Optional[str]:
+        states = (self.timeline or {}).get("states", {})
+        return next((state for state in FINAL_STATES if state in states), None)
+
+
+async def send(http: aiohttp.ClientSession, chronos: str, request: Request):
+    user_uid = str(uuid.uuid4())
+    body = {
+        "messages": [{"role": "user", "content": request.question, "timestamp": datetime.now(timezone.utc).isoformat()}],
+        "session_uid": request.session_uid,
+        "user_uid": user_uid,
+        "access_token": make_access_token(user_uid),
+        "refresh_token": uuid.uuid4().hex,
+    }
+    request.sent_at = time.time()
+    try:
+        async with http.post(f"{chronos}/chat", json=body) as response:
+            result = await response.json(content_type=None)
+        if response.status != 200 or result.get("status") == "Error":
+            request.error = str(result.get("message") or response.status)
+        else:
+            request.accepted_at = time.time()
+    except aiohttp.ClientError as e:
+        request.error = str(e)
+
+
+async def drive(args: argparse.Namespace) -> List[Request]:
+    """Open-loop arrivals: requests go out on schedule whether or not earlier ones finished."""
+    rng = random.Random(args.seed)
+    requests: List[Request] = []
+    tasks = []
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0), timeout=timeout) as http:
+        start = time.monotonic()
+        next_at = 0.0
+        while next_at < args.duration:
+            await asyncio.sleep(max(0.0, start + next_at - time.monotonic()))
+            request = Request(str(uuid.uuid4()), rng.choice(QUESTIONS))
+            requests.append(request)
+            tasks.append(asyncio.create_task(send(http, args.chronos, request)))
+            next_at += rng.expovariate(args.rate) if args.arrivals == "poisson" else 1 / args.rate
+        await asyncio.gather(*tasks)
+
+        pending = [request for request in requests if request.error is None]
+        deadline = time.monotonic() + args.timeout
+        while pending and time.monotonic() < deadline:
+            await asyncio.sleep(1.0)
+            async with http.get(f"{args.supabase}/_loadtest/messages") as response:
+                timelines = {timeline["session_uid"]: timeline for timeline in (await response.json()).values()}
+            for request in pending:
+                request.timeline = timelines.get(request.session_uid, request.timeline)
+            pending = [request for request in pending if request.final_state is None]
+    return requests
+
+
+def summarize(requests: List[Request], args: argparse.Namespace) -> Dict[str, Any]:
+    completed = [request for request in requests if request.final_state == "done"]
+    ttft = [request.timeline["first_content_at"] - request.sent_at
+            for request in completed if request.timeline.get("first_content_at")]
+    latency = [request.timeline["states"]["done"] - request.sent_at for request in completed]
+    accept = [request.accepted_at - request.sent_at for request in requests if request.accepted_at]
+    window = (max(request.timeline["states"]["done"] for request in completed)
+              - min(request.sent_at for request in requests)) if completed else 0.0
+
+    def quantiles(values: List[float]) -> Dict[str, float]:
+        return {f"p{q}": round(percentile(values, q), 3) for q in (50, 95, 99)}
+
+    return {
+        "offered_rate": args.rate,
+        "duration_s": args.duration,
+        "sent": len(requests),
+        "rejected_by_chronos": sum(1 for request in requests if request.error),
+        "completed": len(completed),
+        "failed": sum(1 for request in requests if request.final_state in ("error", "failed")),
+        "unfinished": sum(1 for request in requests if request.error is None and request.final_state is None),
+        "throughput_per_s": round(len(completed) / window, 3) if window else 0.0,
+        "accept_s": quantiles(accept),
+        "time_to_first_token_s": quantiles(ttft),
+        "completion_s": quantiles(latency),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"offered {report['offered_rate']}/s for {report['duration_s']}s: sent {report['sent']}, "
+          f"completed {report['completed']}, failed {report['failed']}, unfinished {report['unfinished']}, "
+          f"rejected by chronos {report['rejected_by_chronos']}")
+    print(f"throughput {report['throughput_per_s']} messages/s")
+    print(f"\n{'':<22}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, key in (("chronos accept (s)", "accept_s"), ("first token (s)", "time_to_first_token_s"),
+                       ("completion (s)", "completion_s")):
+        values = report[key]
+        print(f"{label:<22}{values['p50']:>9.3f}{values['p95']:>9.3f}{values['p99']:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive chronos -> RabbitMQ -> hermes at a fixed arrival rate")
+    parser.add_argument("--chronos", default="http://localhost:8000", help="Chronos base URL")
+    parser.add_argument("--supabase", default="http://127.0.0.1:8104", help="Fake Supabase base URL")
+    parser.add_argument("--rate", type=float, default=1.0, help="Messages per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to keep sending")
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for answers after the last send")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = summarize(asyncio.run(drive(args)), args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,64 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Overall processing limit for one chat message
+MESSAGE_DEADLINE_SECONDS = float(os.getenv("MESSAGE_DEADLINE_SECONDS", "300"))
+# Retrieval gets at most this much of the message deadline...
+RETRIEVAL_BUDGET_SECONDS = float(os.getenv("RETRIEVAL_BUDGET_SECONDS", "30"))
+# ...and always leaves this much for planning and writing the answer
+ANSWER_RESERVE_SECONDS = float(os.getenv("ANSWER_RESERVE_SECONDS", "120"))
+
+# Floor for HTTP timeouts derived from a nearly spent deadline
+MIN_REQUEST_TIMEOUT = 0.5
+
+_current: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("deadline", default=None)
+
+
+class Deadline:
+    """A point in (monotonic) time by which work has to be done.
+
+    Child budgets are carved out with `carve` and never outlive their parent.
+    The deadline active in a context is visible to everything running under it,
+    including tasks submitted to the shared executors, which copy contextvars.
+    """
+
+    def __init__(self, seconds: float, expires_at: Optional[float] = None):
+        self.expires_at = expires_at if expires_at is not None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def carve(self, seconds: float, reserve: float = 0.0) -> "Deadline":
+        """A child deadline of at most `seconds` that still leaves `reserve` seconds of this one."""
+        return Deadline(0, expires_at=min(time.monotonic() + seconds, self.expires_at - reserve))
+
+    @contextmanager
+    def scope(self) -> Iterator["Deadline"]:
+        """Make this the current deadline for the block."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def request_timeout(default: float) -> float:
+    """`default`, shortened to what is left of the current deadline."""
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    return max(min(default, deadline.remaining()), MIN_REQUEST_TIMEOUT)
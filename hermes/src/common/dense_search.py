@@ -0,0 +1,175 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from src.common.executors import PINECONE, get_executor
+from src.common.pinecone_client import INDEX_GETTERS
+from src.common.resilience import CircuitOpenError, guarded_call
+from src.local_index.corpus_engine import get_local_engine
+from src.local_index.replica import get_replica
+from src.utils import tracing
+from src.utils.logger import HermesLogger
+from src.utils.metrics import DENSE_QUERY_SECONDS, FALLBACKS
+
+load_dotenv()
+
+logger = HermesLogger("dense_search")
+
+# Oversampling factor used when a metadata filter has to be applied client-side
+LOCAL_FILTER_OVERSAMPLE = 4
+
+
+class DenseSearchClient:
+    """Single entry point for dense retrieval over every Pinecone-backed corpus.
+
+    Queries never ask Pinecone for vector values, run concurrently on the shared
+    Pinecone executor behind a per-index circuit breaker, and come back as plain
+    `{"id", "score", "metadata"}` dicts no matter which backend (in-process
+    corpus, local replica or Pinecone) served them.
+    """
+
+    def __init__(self):
+        self._executor = get_executor(PINECONE)
+        self._indexes = {}
+
+    def _index(self, index_name: str):
+        index = self._indexes.get(index_name)
+        if index is None:
+            index = INDEX_GETTERS[index_name]()
+            self._indexes[index_name] = index
+        return index
+
+    def query(self, index_name: str, vector, top_k: int = 10, filter: Optional[Dict[str, Any]] = None,
+              fields: Optional[List[str]] = None, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run one dense query.
+
+        Args:
+            index_name: Corpus name (kuhp, kuhper, undang-undang, perpres)
+            vector: Query embedding
+            top_k: Number of matches to return
+            filter: Pinecone metadata filter
+            fields: Metadata keys to keep, all when None
+            namespace: Pinecone namespace
+
+        Returns:
+            List of matches with id, score and metadata
+        """
+        start_time = time.time()
+        engine = get_local_engine(index_name)
+        replica = get_replica(index_name)
+        if engine is not None and engine.has_vectors:
+            fetch_k = top_k * LOCAL_FILTER_OVERSAMPLE if filter else top_k
+            raw_matches = engine.dense_search(vector, fetch_k)["matches"]
+            backend = "local_corpus"
+        elif replica is not None:
+            fetch_k = top_k * LOCAL_FILTER_OVERSAMPLE if filter else top_k
+            raw_matches = replica.query(vector, fetch_k)["matches"]
+            backend = "local_replica"
+        else:
+            try:
+                response = guarded_call(
+                    f"{PINECONE}:{index_name}",
+                    lambda: self._index(index_name).query(
+                        vector=list(vector),
+                        top_k=top_k,
+                        filter=filter,
+                        namespace=namespace,
+                        include_values=False,
+                        include_metadata=True,
+                    ),
+                    hedge=True,
+                )
+                raw_matches = response.to_dict().get("matches", [])
+            except CircuitOpenError:
+                logger.warning("Pinecone circuit open, returning no matches", index=index_name)
+                FALLBACKS.inc(fallback="dense_circuit_open")
+                raw_matches = []
+            # Pinecone already applied the filter server-side
+            filter = None
+            backend = "pinecone"
+
+        matches = []
+        for match in raw_matches:
+            metadata = match.get("metadata") or {}
+            if filter and not matches_filter(metadata, filter):
+                continue
+            if fields is not None:
+                metadata = {key: metadata[key] for key in fields if key in metadata}
+            matches.append({"id": match.get("id"), "score": match.get("score"), "metadata": metadata})
+            if len(matches) >= top_k:
+                break
+
+        DENSE_QUERY_SECONDS.observe(time.time() - start_time, index=index_name, backend=backend)
+        tracing.record_span("dense.query", int(start_time * 1e9), time.time_ns(), kind=tracing.CLIENT,
+                            index=index_name, backend=backend, matches=len(matches))
+        logger.debug(
+            "Dense query complete",
+            index=index_name,
+            backend=backend,
+            matches=len(matches),
+            duration_ms=int((time.time() - start_time) * 1000),
+        )
+        return matches
+
+    def query_many(self, index_name: str, vectors: List[List[float]], top_k: int = 10,
+                   filter: Optional[Dict[str, Any]] = None, fields: Optional[List[str]] = None,
+                   namespace: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """Run one query per vector concurrently on the Pinecone executor.
+
+        Returns:
+            One list of matches per input vector, in input order
+        """
+        if not vectors:
+            return []
+        if len(vectors) == 1:
+            return [self.query(index_name, vectors[0], top_k, filter, fields, namespace)]
+        futures = [
+            self._executor.submit(self.query, index_name, vector, top_k, filter, fields, namespace)
+            for vector in vectors
+        ]
+        return [future.result() for future in futures]
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Evaluate a Pinecone metadata filter against one metadata dict.
+
+    Used for local backends, which have no server-side filtering.
+    """
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, expected in condition.items():
+            if operator == "$eq" and value != expected:
+                return False
+            if operator == "$ne" and value == expected:
+                return False
+            if operator == "$in" and value not in expected:
+                return False
+            if operator == "$nin" and value in expected:
+                return False
+            if operator in ("$gt", "$gte", "$lt", "$lte"):
+                if not isinstance(value, (int, float)):
+                    return False
+                if operator == "$gt" and not value > expected:
+                    return False
+                if operator == "$gte" and not value >= expected:
+                    return False
+                if operator == "$lt" and not value < expected:
+                    return False
+                if operator == "$lte" and not value <= expected:
+                    return False
+    return True
+
+
+dense_search_client = DenseSearchClient()
@@ -0,0 +1,191 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from dotenv import load_dotenv
+
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("executors")
+
+GEMINI = "gemini"
+ELASTICSEARCH = "elasticsearch"
+PINECONE = "pinecone"
+SUPABASE = "supabase"
+RETRIEVAL = "retrieval"
+HEDGE = "hedge"
+
+# (workers, queue) per dependency; override with EXECUTOR_<NAME>_WORKERS / EXECUTOR_<NAME>_QUEUE
+DEFAULT_LIMITS = {
+    GEMINI: (8, 32),
+    ELASTICSEARCH: (8, 32),
+    PINECONE: (int(os.getenv("PINECONE_MAX_CONCURRENCY", "8")), 32),
+    SUPABASE: (4, 64),
+    # Strategy fan-out: 4 strategies for each of the 3 messages the consumer prefetches
+    RETRIEVAL: (12, 24),
+    # Hedged search attempts; never submits to itself, so it cannot deadlock the callers' pools
+    HEDGE: (16, 16),
+}
+
+# How long a submit waits for a free slot before the bulkhead rejects it
+EXECUTOR_SUBMIT_TIMEOUT = float(os.getenv("EXECUTOR_SUBMIT_TIMEOUT", "30"))
+# A hedge that cannot start right away is skipped rather than waited for
+SUBMIT_TIMEOUTS = {HEDGE: 0.0}
+
+
+class BulkheadFullError(RuntimeError):
+    """Raised when a dependency's executor has no free worker or queue slot."""
+
+
+class BoundedExecutor:
+    """Process-wide thread pool for one dependency, with a bounded queue.
+
+    At most `max_workers` calls run and `max_queue` wait; further submits block
+    up to `submit_timeout` seconds and then raise `BulkheadFullError`, so a slow
+    dependency backs up its own callers instead of every other pool. Tasks run
+    in a copy of the submitter's contextvars.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, submit_timeout: float = EXECUTOR_SUBMIT_TIMEOUT):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.submit_timeout = submit_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+
+        self.active = 0
+        self.queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.peak_in_flight = 0
+        self.queue_wait_seconds = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        return self._submit(self.submit_timeout, fn, args, kwargs)
+
+    def submit_nowait(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Submit only if a slot is free right now, so callers on the event loop never block."""
+        return self._submit(0.0, fn, args, kwargs)
+
+    def _submit(self, timeout: float, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Future:
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Executor saturated, rejecting task", executor=self.name, **self._occupancy())
+            raise BulkheadFullError(f"{self.name} executor is saturated")
+
+        context = contextvars.copy_context()
+        enqueued_at = time.monotonic()
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.active + self.queued)
+
+        def run():
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.queue_wait_seconds += time.monotonic() - enqueued_at
+            succeeded = False
+            try:
+                result = context.run(fn, *args, **kwargs)
+                succeeded = True
+                return result
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    if succeeded:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                self._slots.release()
+
+        def release_if_cancelled(future: Future):
+            # A task cancelled while queued never runs, so `run` cannot give its slot back
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(run)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(release_if_cancelled)
+        return future
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn` on the pool and wait for it."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _occupancy(self) -> Dict[str, int]:
+        return {"active": self.active, "queued": self.queued}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.submitted - self.queued
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "saturation": round((self.active + self.queued) / (self.max_workers + self.max_queue), 3),
+                "peak_in_flight": self.peak_in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(self.queue_wait_seconds / started * 1000, 2) if started else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Return the shared executor for a dependency, creating it on first use."""
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    with _executors_lock:
+        if name not in _executors:
+            workers, queue = DEFAULT_LIMITS.get(name, (4, 16))
+            env_name = name.upper()
+            _executors[name] = BoundedExecutor(
+                name,
+                max_workers=int(os.getenv(f"EXECUTOR_{env_name}_WORKERS", workers)),
+                max_queue=int(os.getenv(f"EXECUTOR_{env_name}_QUEUE", queue)),
+                submit_timeout=SUBMIT_TIMEOUTS.get(name, EXECUTOR_SUBMIT_TIMEOUT),
+            )
+        return _executors[name]
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Saturation and throughput counters for every executor created so far."""
+    with _executors_lock:
+        executors = dict(_executors)
+    return {name: executor.stats() for name, executor in executors.items()}
+
+
+def shutdown_executors(wait: bool = True):
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
@@ -1,10 +1,16 @@
 from dotenv import load_dotenv
 import os
 from google import genai
+from google.genai import types
 
 load_dotenv()
 
 # Create Gemini client
 # NOTE: This MUST use the CS UI proxy to access Google APIs
 # Direct HTTPS connections are blocked by CS UI firewall
-client = genai.Client(api_key=os.getenv("GENAI_API_KEY"))
\ No newline at end of file
+# GEMINI_BASE_URL points the client at another Gemini-compatible endpoint, e.g. the load-test fake
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+client = genai.Client(
+    api_key=os.getenv("GENAI_API_KEY"),
+    http_options=types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None,
+)
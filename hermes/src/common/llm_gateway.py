@@ -0,0 +1,330 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from google.genai import errors
+
+from src.common.gemini_client import client as gemini_client
+from src.utils import codec, flight_recorder, tracing
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("llm_gateway")
+
+# Admission order when the gateway is saturated; lower goes first
+STREAM = 0
+INTERACTIVE = 1
+BACKGROUND = 2
+
+# (requests per minute, tokens per minute); override with LLM_LIMITS="model=rpm:tpm,..."
+DEFAULT_MODEL_LIMITS = {
+    "gemini-2.5-flash": (1000, 1_000_000),
+    "text-embedding-004": (1500, 1_000_000),
+}
+FALLBACK_MODEL_LIMITS = (500, 500_000)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# Backoff for 429s that come without a retry hint
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "2"))
+LLM_RETRY_MAX_DELAY = 60.0
+
+# Rough prompt size used for admission; corrected with the response's usage metadata
+CHARS_PER_TOKEN = 4
+# How long a waiter that is not next in line sleeps before checking again
+ADMISSION_POLL_SECONDS = 0.05
+
+
+def _parse_limits(value: str) -> Dict[str, Tuple[int, int]]:
+    limits = dict(DEFAULT_MODEL_LIMITS)
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        model, _, rates = entry.partition("=")
+        rpm, _, tpm = rates.partition(":")
+        limits[model.strip()] = (int(rpm), int(tpm))
+    return limits
+
+
+MODEL_LIMITS = _parse_limits(os.getenv("LLM_LIMITS", ""))
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available, 0 when they are now."""
+        self._refill()
+        # A request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+
+class _ModelStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            # Share of prompt tokens served from an explicit or implicit context cache
+            "cached_tokens": self.cached_tokens,
+            "cached_token_ratio": round(self.cached_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            "avg_latency_ms": round(self.latency_seconds / self.calls * 1000, 1) if self.calls else 0.0,
+            "max_latency_ms": round(self.max_latency_seconds * 1000, 1),
+            "avg_queue_wait_ms": round(self.queue_wait_seconds / self.calls * 1000, 1) if self.calls else 0.0,
+        }
+
+
+def estimate_tokens(contents: Any, config: Any = None) -> int:
+    """Approximate prompt tokens of contents plus system instruction."""
+    try:
+        size = len(contents) if isinstance(contents, str) else len(codec.dumps(contents))
+    except TypeError:
+        size = len(str(contents))
+    system_instruction = getattr(config, "system_instruction", None)
+    if isinstance(system_instruction, str):
+        size += len(system_instruction)
+    return max(size // CHARS_PER_TOKEN, 1)
+
+
+def retry_delay(error: errors.APIError, attempt: int) -> float:
+    """Server hint from a 429 (RetryInfo or Retry-After), else exponential backoff."""
+    details = error.details.get("error", {}).get("details", []) if isinstance(error.details, dict) else []
+    for detail in details:
+        if detail.get("@type", "").endswith("RetryInfo") and detail.get("retryDelay"):
+            match = re.match(r"([\d.]+)s", detail["retryDelay"])
+            if match:
+                return float(match.group(1))
+    headers = getattr(error.response, "headers", None) or {}
+    if headers.get("retry-after", "").replace(".", "", 1).isdigit():
+        return float(headers["retry-after"])
+    return min(LLM_RETRY_BASE_DELAY * (2 ** attempt), LLM_RETRY_MAX_DELAY)
+
+
+class LLMGateway:
+    """Process-wide front door for every Gemini call.
+
+    Calls are admitted in priority order (streamed answers before planning
+    before titles) while fewer than `max_concurrency` are in flight and the
+    model's request and token buckets allow it. A 429 pauses the model for the
+    server's retry hint and the call is retried, so one throttled caller slows
+    every caller down instead of each one hammering the API. Calls block the
+    calling thread until they are admitted and answered.
+    """
+
+    def __init__(self, client=gemini_client, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 limits: Optional[Dict[str, Tuple[int, int]]] = None, max_retries: int = LLM_MAX_RETRIES):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.limits = limits if limits is not None else MODEL_LIMITS
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self._waiters: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._sequence = itertools.count()
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._stats: Dict[str, _ModelStats] = {}
+        self._condition = threading.Condition()
+
+    def _model_buckets(self, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        if model not in self._buckets:
+            rpm, tpm = self.limits.get(model, FALLBACK_MODEL_LIMITS)
+            self._buckets[model] = (TokenBucket(rpm), TokenBucket(tpm))
+        return self._buckets[model]
+
+    def _model_wait(self, model: str, tokens: int) -> float:
+        requests_bucket, tokens_bucket = self._model_buckets(model)
+        return max(
+            self._paused_until.get(model, 0.0) - time.monotonic(),
+            requests_bucket.wait_time(1),
+            tokens_bucket.wait_time(tokens),
+        )
+
+    def _try_admit(self, ticket: Tuple[int, int, int], model: str) -> float:
+        """Admit the ticket and return 0, or return how long to wait. Caller holds the lock.
+
+        Each model admits its waiters in ticket order. A concurrency slot goes
+        to the best ticket among the models whose buckets allow a call now, so
+        a throttled model does not hold back the others.
+        """
+        if self._waiters[model][0] != ticket:
+            return ADMISSION_POLL_SECONDS
+        tokens = ticket[2]
+        wait = self._model_wait(model, tokens)
+        if wait > 0:
+            return wait
+        if self.in_flight >= self.max_concurrency:
+            return ADMISSION_POLL_SECONDS
+        for other_model, waiters in self._waiters.items():
+            if other_model != model and waiters and waiters[0] < ticket and not self._model_wait(other_model, waiters[0][2]) > 0:
+                return ADMISSION_POLL_SECONDS
+
+        requests_bucket, tokens_bucket = self._model_buckets(model)
+        requests_bucket.take(1)
+        tokens_bucket.take(tokens)
+        heapq.heappop(self._waiters[model])
+        self.in_flight += 1
+        return 0.0
+
+    def _enqueue(self, model: str, tokens: int, priority: int) -> Tuple[int, int, int]:
+        ticket = (priority, next(self._sequence), tokens)
+        heapq.heappush(self._waiters.setdefault(model, []), ticket)
+        return ticket
+
+    def _acquire(self, model: str, tokens: int, priority: int):
+        with self._condition:
+            ticket = self._enqueue(model, tokens, priority)
+            while True:
+                wait = self._try_admit(ticket, model)
+                if not wait:
+                    # The next waiter may be admissible too
+                    self._condition.notify_all()
+                    return
+                self._condition.wait(timeout=wait)
+
+    def _release(self, model: str, estimated_tokens: int, response: Any, start: float, queued_at: float,
+                 error: Optional[BaseException] = None, caller: str = "unknown"):
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(usage, "prompt_token_count", None) or (estimated_tokens if response is not None else 0)
+        output_tokens = getattr(usage, "candidates_token_count", None) or 0
+        cached_tokens = getattr(usage, "cached_content_token_count", None) or 0
+        duration = time.monotonic() - start
+        with self._condition:
+            self.in_flight -= 1
+            # Charge the bucket for what the call really used
+            self._model_buckets(model)[1].take(input_tokens + output_tokens - estimated_tokens)
+            stats = self._stats.setdefault(model, _ModelStats())
+            stats.calls += 1
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cached_tokens += cached_tokens
+            stats.latency_seconds += duration
+            stats.max_latency_seconds = max(stats.max_latency_seconds, duration)
+            stats.queue_wait_seconds += start - queued_at
+            if error is not None:
+                stats.errors += 1
+            self._condition.notify_all()
+        flight_recorder.record_llm_call(
+            caller=caller, model=model, prompt_tokens=input_tokens, output_tokens=output_tokens,
+            cached_tokens=cached_tokens, seconds=round(duration, 3), queue_wait_s=round(start - queued_at, 3),
+            error=type(error).__name__ if error is not None else None,
+        )
+
+    def _rate_limited(self, model: str, error: errors.APIError, attempt: int, caller: str) -> Optional[float]:
+        """Pause the model after a 429 and return the delay, or None when the error is not retried."""
+        if error.code != 429 or attempt >= self.max_retries:
+            return None
+        delay = retry_delay(error, attempt)
+        with self._condition:
+            self._paused_until[model] = max(self._paused_until.get(model, 0.0), time.monotonic() + delay)
+            self._stats.setdefault(model, _ModelStats()).rate_limited += 1
+        logger.warning("Gemini rate limited, retrying", model=model, caller=caller, attempt=attempt + 1, retry_delay_s=delay)
+        return delay
+
+    def _call(self, method, model: str, tokens: int, priority: int, caller: str, **kwargs) -> Any:
+        with tracing.start_span("gemini.request", tracing.CLIENT, model=model, caller=caller) as span:
+            for attempt in range(self.max_retries + 1):
+                queued_at = time.monotonic()
+                self._acquire(model, tokens, priority)
+                start = time.monotonic()
+                try:
+                    response = method(model=model, **kwargs)
+                except errors.APIError as e:
+                    self._release(model, tokens, None, start, queued_at, e, caller)
+                    # The pause applies to every caller; this one is re-admitted after it
+                    if self._rate_limited(model, e, attempt, caller) is None:
+                        raise
+                    continue
+                except BaseException as e:
+                    self._release(model, tokens, None, start, queued_at, e, caller)
+                    raise
+                self._release(model, tokens, response, start, queued_at, caller=caller)
+                span.attributes.update(attempts=attempt + 1, queue_wait_ms=round((start - queued_at) * 1000, 1))
+                return response
+
+    def generate_content(self, model: str, contents: Any, config: Any = None, priority: int = INTERACTIVE,
+                         caller: str = "unknown") -> Any:
+        """`client.models.generate_content` through the gateway."""
+        return self._call(self.client.models.generate_content, model, estimate_tokens(contents, config), priority,
+                          caller, contents=contents, config=config)
+
+    def embed_content(self, model: str, contents: Any, config: Any = None, priority: int = INTERACTIVE,
+                      caller: str = "unknown") -> Any:
+        """`client.models.embed_content` through the gateway."""
+        return self._call(self.client.models.embed_content, model, estimate_tokens(contents), priority, caller,
+                          contents=contents, config=config)
+
+    def generate_content_stream(self, model: str, contents: Any, config: Any = None, priority: int = STREAM,
+                                caller: str = "unknown") -> Iterator[Any]:
+        """`client.models.generate_content_stream` through the gateway.
+
+        The call holds its slot until the stream is exhausted or closed. Only
+        a 429 raised before the first chunk is retried.
+        """
+        tokens = estimate_tokens(contents, config)
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            self._acquire(model, tokens, priority)
+            start = time.monotonic()
+            last_chunk = None
+            error: Optional[BaseException] = None
+            try:
+                for chunk in self.client.models.generate_content_stream(model=model, contents=contents, config=config):
+                    last_chunk = chunk
+                    yield chunk
+                return
+            except errors.APIError as e:
+                error = e
+                if last_chunk is not None or self._rate_limited(model, e, attempt, caller) is None:
+                    raise
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                # The last chunk carries the usage metadata for the whole stream
+                self._release(model, tokens, last_chunk, start, queued_at, error, caller)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "in_flight": self.in_flight,
+                "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+                "models": {model: stats.as_dict() for model, stats in self._stats.items()},
+            }
+
+
+llm_gateway = LLMGateway()
@@ -11,6 +11,9 @@ proxy_url = os.getenv("PINECONE_PROXY_URL") or os.getenv("HTTPS_PROXY")
 if proxy_url:
     logger.info("Using proxy for Pinecone", proxy_url=proxy_url)
 
+# Base URL serving every index under /<index name>, e.g. the load-test fake; unset looks hosts up through the API
+pinecone_host = os.getenv("PINECONE_HOST")
+
 # Initialize Pinecone clients
 _pc = None
 _pc_2 = None
@@ -37,28 +40,33 @@ def get_pc_2():
         )
     return _pc_2
 
+def _open_index(pc: Pinecone, name: str):
+    if pinecone_host:
+        return pc.Index(host=f"{pinecone_host.rstrip('/')}/{name}")
+    return pc.Index(name)
+
 def get_kuhp_index():
     global _kuhp_index
     if _kuhp_index is None:
-        _kuhp_index = get_pc().Index("kuhp-demo-gemini")
+        _kuhp_index = _open_index(get_pc(), "kuhp-demo-gemini")
     return _kuhp_index
 
 def get_kuhper_index():
     global _kuhper_index
     if _kuhper_index is None:
-        _kuhper_index = get_pc_2().Index("kuhper")
+        _kuhper_index = _open_index(get_pc_2(), "kuhper")
     return _kuhper_index
 
 def get_undang_undang_index():
     global _undang_undang_index
     if _undang_undang_index is None:
-        _undang_undang_index = get_pc_2().Index("undang-undang")
+        _undang_undang_index = _open_index(get_pc_2(), "undang-undang")
     return _undang_undang_index
 
 def get_perpres_index():
     global _perpres_index
     if _perpres_index is None:
-        _perpres_index = get_pc_2().Index("perpres")
+        _perpres_index = _open_index(get_pc_2(), "perpres")
     return _perpres_index
 
 class _LazyIndex:
@@ -74,4 +82,12 @@ class _LazyIndex:
 kuhp_index = _LazyIndex(get_kuhp_index)
 kuhper_index = _LazyIndex(get_kuhper_index)
 undang_undang_index = _LazyIndex(get_undang_undang_index)
-perpres_index = _LazyIndex(get_perpres_index)
\ No newline at end of file
+perpres_index = _LazyIndex(get_perpres_index)
+
+# Pinecone index getters keyed by the corpus (ES index) name they mirror
+INDEX_GETTERS = {
+    "kuhp": get_kuhp_index,
+    "kuhper": get_kuhper_index,
+    "undang-undang": get_undang_undang_index,
+    "perpres": get_perpres_index,
+}
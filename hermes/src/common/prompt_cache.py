@@ -0,0 +1,237 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from google.genai import types
+
+from src.common.gemini_client import client as gemini_client
+from src.common.llm_gateway import estimate_tokens
+from src.config.llm import (
+    CHATBOT_SYSTEM_PROMPT,
+    MODEL_NAME,
+    SEARCH_AGENT_PROMPT,
+    SEARCH_KUHPER_AGENT_PROMPT,
+    SEARCH_PERPRES_AGENT_PROMPT,
+    SEARCH_UNDANG_UNDANG_AGENT_PROMPT,
+)
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("prompt_cache")
+
+CHATBOT = "chatbot"
+SEARCH = "search"
+SEARCH_KUHPER = "search_kuhper"
+SEARCH_UNDANG_UNDANG = "search_undang_undang"
+SEARCH_PERPRES = "search_perpres"
+
+STATIC_PROMPTS = {
+    CHATBOT: CHATBOT_SYSTEM_PROMPT,
+    SEARCH: SEARCH_AGENT_PROMPT,
+    SEARCH_KUHPER: SEARCH_KUHPER_AGENT_PROMPT,
+    SEARCH_UNDANG_UNDANG: SEARCH_UNDANG_UNDANG_AGENT_PROMPT,
+    SEARCH_PERPRES: SEARCH_PERPRES_AGENT_PROMPT,
+}
+
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+# Only prompts the agents send get a cache; each one is billed for storage while it lives
+PROMPT_CACHE_PROMPTS = [
+    key.strip() for key in os.getenv("PROMPT_CACHE_PROMPTS", f"{CHATBOT},{SEARCH}").split(",") if key.strip()
+]
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+# Refresh a handle this long before it expires
+PROMPT_CACHE_REFRESH_MARGIN = int(os.getenv("PROMPT_CACHE_REFRESH_MARGIN", "300"))
+# Gemini rejects explicit caches smaller than this
+MIN_CACHE_TOKENS = 1024
+
+
+class PromptCache:
+    """Gemini cached-content handles for the large static system prompts.
+
+    `start` creates a handle per prompt and a daemon thread that extends each
+    one before it expires. Handles are shared: every uvicorn worker, and the
+    next deploy of the same prompt, adopts a live handle with the prompt's
+    display name instead of creating its own, so storage is billed once.
+    `config` builds the request config: with a live
+    handle the prompt is referenced by name and the per-request part leads the
+    last user turn; without one (disabled, too small, or the API call failed)
+    the prompt is sent inline. Either way the static prefix comes first and
+    the dynamic documents last, so even inline prompts hit Gemini's implicit
+    prefix cache.
+    """
+
+    def __init__(self, client=gemini_client, model: str = MODEL_NAME, prompts: Optional[Dict[str, str]] = None,
+                 ttl_seconds: int = PROMPT_CACHE_TTL_SECONDS, refresh_margin: int = PROMPT_CACHE_REFRESH_MARGIN,
+                 enabled: bool = PROMPT_CACHE_ENABLED):
+        self.client = client
+        self.model = model
+        self.prompts = prompts if prompts is not None else {key: STATIC_PROMPTS[key] for key in PROMPT_CACHE_PROMPTS}
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.enabled = enabled
+        # key -> (cached content name, monotonic expiry)
+        self._handles: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _display_name(self, key: str) -> str:
+        # The digest keeps a deploy with an edited prompt from adopting the old prompt's handle
+        digest = hashlib.sha256(self.prompts[key].encode("utf-8")).hexdigest()[:12]
+        return f"hermes-{key}-{digest}"
+
+    def _existing(self, key: str) -> List[Any]:
+        """Live handles any worker created for this prompt and model, oldest first."""
+        display_name = self._display_name(key)
+        now = datetime.now(timezone.utc)
+        found = [
+            cached for cached in self.client.caches.list()
+            if cached.display_name == display_name and (cached.model or "").endswith(self.model)
+            and cached.expire_time is not None and cached.expire_time > now
+        ]
+        return sorted(found, key=lambda cached: (cached.create_time or now, cached.name))
+
+    def _adopt(self, key: str, cached: Any):
+        remaining = (cached.expire_time - datetime.now(timezone.utc)).total_seconds()
+        with self._lock:
+            self._handles[key] = (cached.name, time.monotonic() + remaining)
+        logger.info("Prompt cache shared", prompt=key, name=cached.name, ttl_s=round(remaining))
+
+    def _create(self, key: str):
+        prompt = self.prompts[key]
+        if estimate_tokens(prompt) < MIN_CACHE_TOKENS:
+            logger.debug("Prompt too small for an explicit cache, sending inline", prompt=key)
+            return
+        try:
+            existing = self._existing(key)
+            if existing:
+                self._adopt(key, existing[0])
+                return
+            cached = self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=self._display_name(key),
+                    system_instruction=prompt,
+                    ttl=f"{self.ttl_seconds}s",
+                ),
+            )
+        except Exception as e:
+            logger.warning("Failed to create prompt cache, sending inline", prompt=key, error=str(e))
+            return
+        with self._lock:
+            self._handles[key] = (cached.name, time.monotonic() + self.ttl_seconds)
+        logger.info("Prompt cache created", prompt=key, name=cached.name, ttl_s=self.ttl_seconds)
+
+        # Workers starting together may each have created one; they all keep the oldest and delete their own
+        try:
+            existing = self._existing(key)
+            if existing and existing[0].name != cached.name:
+                self.client.caches.delete(name=cached.name)
+                self._adopt(key, existing[0])
+        except Exception as e:
+            logger.warning("Failed to deduplicate prompt cache, keeping own handle", prompt=key, error=str(e))
+
+    def _refresh(self, key: str, name: str):
+        try:
+            self.client.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"))
+        except Exception as e:
+            # Deleted or already expired: start over with a fresh handle
+            logger.warning("Failed to refresh prompt cache, recreating", prompt=key, error=str(e))
+            with self._lock:
+                self._handles.pop(key, None)
+            self._create(key)
+            return
+        with self._lock:
+            self._handles[key] = (name, time.monotonic() + self.ttl_seconds)
+
+    def refresh_due(self):
+        """Extend handles close to expiry and retry prompts that have none."""
+        now = time.monotonic()
+        with self._lock:
+            handles = dict(self._handles)
+        for key in self.prompts:
+            if key not in handles:
+                self._create(key)
+            elif handles[key][1] - now <= self.refresh_margin:
+                self._refresh(key, handles[key][0])
+
+    def _refresh_loop(self):
+        interval = max(self.refresh_margin / 2, 1)
+        while not self._stop.wait(interval):
+            self.refresh_due()
+
+    def start(self):
+        """Create the handles and keep them alive in the background."""
+        if not self.enabled or self._thread is not None:
+            return
+        for key in self.prompts:
+            self._create(key)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="prompt-cache-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, delete: bool = False):
+        """Stop refreshing; `delete` also removes the handles.
+
+        Other workers share the handles, so by default they are left to them, or
+        to lapse at the TTL once no worker refreshes them.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+        if delete:
+            for name, _ in handles:
+                try:
+                    self.client.caches.delete(name=name)
+                except Exception as e:
+                    logger.warning("Failed to delete prompt cache", name=name, error=str(e))
+
+    def handle(self, key: str) -> Optional[str]:
+        """Name of a cached-content handle that is still valid, or None."""
+        with self._lock:
+            entry = self._handles.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def config(self, key: str, contents: List[Dict[str, Any]], dynamic: str = "",
+               **config_kwargs) -> Tuple[types.GenerateContentConfig, List[Dict[str, Any]]]:
+        """
+        Build a generation config for a static prompt plus a per-request part.
+
+        The request must use the cache's model (MODEL_NAME).
+
+        Args:
+            key: Static prompt name, e.g. CHATBOT
+            contents: Conversation turns, ending with the user's message
+            dynamic: Per-request instructions or documents that follow the static prompt
+            **config_kwargs: Other GenerateContentConfig fields
+
+        Returns:
+            The config, and the contents to send with it
+        """
+        name = self.handle(key)
+        if name is None:
+            system_instruction = self.prompts.get(key, STATIC_PROMPTS[key]) + dynamic
+            return types.GenerateContentConfig(system_instruction=system_instruction, **config_kwargs), contents
+        config = types.GenerateContentConfig(cached_content=name, **config_kwargs)
+        if not dynamic.strip():
+            return config, contents
+        # A cached system instruction cannot be combined with another one, so the dynamic part leads the
+        # last user turn; the user's own message still comes last, as it does with the inline prompt
+        for i in range(len(contents) - 1, -1, -1):
+            if contents[i]["role"] == "user":
+                turn = {**contents[i], "parts": [{"text": dynamic}] + list(contents[i]["parts"])}
+                return config, contents[:i] + [turn] + contents[i + 1:]
+        return config, contents + [{"role": "user", "parts": [{"text": dynamic}]}]
+
+prompt_cache = PromptCache()
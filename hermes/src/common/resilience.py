@@ -0,0 +1,262 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+from src.common.executors import ELASTICSEARCH, HEDGE, BulkheadFullError, get_executor
+from src.utils import tracing
+from src.utils.logger import HermesLogger
+from src.utils.metrics import ELASTICSEARCH_REQUEST_SECONDS
+
+load_dotenv()
+
+logger = HermesLogger("resilience")
+
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "8"))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+# Hedging sends a duplicate of an idempotent search once the first attempt is slower than the recent p95
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "1.0"))
+HEDGE_MIN_DELAY = 0.05
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a backend whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Rolling-window breaker for one backend.
+
+    Opens when, over the last `window` calls (and at least `min_calls`), the
+    share of failures reaches `failure_rate` or the share of calls slower than
+    `slow_call_seconds` reaches `slow_call_rate`. After `open_seconds` a single
+    trial call is let through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+                 slow_call_rate: float = BREAKER_SLOW_CALL_RATE, open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record(self, success: bool, duration: float):
+        with self._lock:
+            self.calls += 1
+            slow = duration >= self.slow_call_seconds
+            if not success:
+                self.failures += 1
+            else:
+                self._latencies.append(duration)
+
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+                if success and not slow:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    logger.info("Circuit closed", breaker=self.name)
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append((success, slow))
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                total = len(self._outcomes)
+                failure_share = sum(1 for ok, _ in self._outcomes if not ok) / total
+                slow_share = sum(1 for _, is_slow in self._outcomes if is_slow) / total
+                if failure_share >= self.failure_rate or slow_share >= self.slow_call_rate:
+                    self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        self._outcomes.clear()
+        logger.warning("Circuit opened", breaker=self.name, open_seconds=self.open_seconds)
+
+    def hedge_delay(self) -> float:
+        """p95 of recent successful latencies, or the default until enough samples exist."""
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return HEDGE_DEFAULT_DELAY
+            latencies = sorted(self._latencies)
+        return max(latencies[int(len(latencies) * 0.95) - 1], HEDGE_MIN_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "opened": self.opened,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
+def _timed(breaker: CircuitBreaker, fn: Callable[[], Any], is_failure: Callable[[Any], bool]) -> Any:
+    start = time.monotonic()
+    try:
+        result = fn()
+    except Exception:
+        breaker.record(False, time.monotonic() - start)
+        raise
+    breaker.record(not is_failure(result), time.monotonic() - start)
+    return result
+
+
+def guarded_call(name: str, fn: Callable[[], Any], hedge: bool = False,
+                 is_failure: Callable[[Any], bool] = lambda result: False,
+                 discard: Optional[Callable[[Any], None]] = None) -> Any:
+    """
+    Call a backend through its circuit breaker, optionally hedged.
+
+    Args:
+        name: Breaker name, e.g. "elasticsearch:perpres"
+        fn: Zero-argument call to the backend; must be idempotent when hedged
+        hedge: Send a duplicate after the p95 delay and take the first result (needs HEDGE_REQUESTS)
+        is_failure: Classifies a returned value as a failure, e.g. an HTTP 5xx
+        discard: Releases the losing result of a hedged pair, e.g. closes a streamed response
+
+    Returns:
+        Whatever `fn` returns
+
+    Raises:
+        CircuitOpenError: The breaker is open and the call was not attempted
+    """
+    breaker = get_breaker(name)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{name} circuit is open")
+
+    # A half-open trial is never hedged, so a single request decides the breaker state
+    if not (hedge and HEDGE_REQUESTS) or breaker.state != CLOSED:
+        return _timed(breaker, fn, is_failure)
+
+    executor = get_executor(HEDGE)
+    try:
+        primary = executor.submit(_timed, breaker, fn, is_failure)
+    except BulkheadFullError:
+        return _timed(breaker, fn, is_failure)
+
+    done, _ = wait([primary], timeout=breaker.hedge_delay())
+    if done:
+        return primary.result()
+
+    try:
+        backup = executor.submit(_timed, breaker, fn, is_failure)
+    except BulkheadFullError:
+        return primary.result()
+    with breaker._lock:
+        breaker.hedged += 1
+
+    pending = {primary, backup}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            result = future.result()
+            if is_failure(result) and pending:
+                if discard:
+                    discard(result)
+                continue
+            if future is backup:
+                with breaker._lock:
+                    breaker.hedge_wins += 1
+            if discard:
+                for other in pending:
+                    other.add_done_callback(lambda f: f.exception() is None and discard(f.result()))
+            return result
+    raise error
+
+
+def is_server_error(response: requests.Response) -> bool:
+    """5xx and 429 count against the breaker; 4xx is a bad query, not a sick backend."""
+    return response.status_code >= 500 or response.status_code == 429
+
+
+def es_breaker(index_name: str) -> str:
+    return f"{ELASTICSEARCH}:{index_name}"
+
+
+def guarded_search(index_name: str, url: str, **kwargs) -> requests.Response:
+    """`requests.post` a `_search` through the index's breaker, hedged since searches are idempotent."""
+    with tracing.start_span("elasticsearch.search", tracing.CLIENT, index=index_name) as span, \
+            ELASTICSEARCH_REQUEST_SECONDS.time(index=index_name):
+        response = guarded_call(
+            es_breaker(index_name),
+            lambda: requests.post(url=url, **kwargs),
+            hedge=True,
+            is_failure=is_server_error,
+            discard=lambda response: response.close(),
+        )
+        span.set_attribute("status_code", response.status_code)
+        return response
@@ -1,4 +1,5 @@
 import json
+from src.utils import codec
 CHATBOT_SYSTEM_PROMPT = """
 You are a lexin, a friendly assistant that helps the user to find the answer to their question.
 You will answer the user's question based on the given context provided above.
@@ -326,11 +327,11 @@ ANSWERING_AGENT_PROMPT = lambda docs, questions : f"""
 You are a legal document search assitant, your task is to answer the list of questions based on the search results.
 Here are the search results:
 ```json
-{json.dumps(docs, indent=2)}
+{codec.dumps(docs)}
 ```
 Here are the questions:
 ```
-{json.dumps(questions, indent=2)}
+{codec.dumps(questions)}
 ```
 Answer the questions based on the search results, and make sure to include the search results in your answer.
 The asnwer will be in the following format:
@@ -359,6 +360,16 @@ Focus on the content of the chat, and make it as short as possible.
 Instead of "Pembahasan isi UU No. 1 Tahun 2021", you can just say "UU No. 1 Tahun 2021: Pembahasan"
 """
 
+SUMMARIZE_HISTORY_PROMPT = """
+You keep a running summary of a conversation between a user and an Indonesian legal assistant.
+You get the previous summary (possibly empty) and the turns that followed it.
+Write an updated summary in Indonesian, at most 200 words, that keeps:
+- the user's situation and the facts they gave (parties, dates, amounts, places)
+- every question the user asked and the gist of each answer
+- every regulation and article that was cited, with its number and year (e.g. "Pasal 156 UU No. 13 Tahun 2003")
+Do not add anything that was not said. Reply with the summary only.
+"""
+
 REWRITE_PROMPT = lambda prev_query: f"""
 Your last query either didn't return any results or is invalid, fix it
 Previous query:
@@ -1,11 +1,24 @@
 import aio_pika
 import os
-import json
 import asyncio
 import logging
+import time
 from dotenv import load_dotenv
 from src.common.supabase_client import client as supabase
+from src.common.deadline import MESSAGE_DEADLINE_SECONDS, Deadline
+from src.common.executors import GEMINI, SUPABASE, get_executor
 from src.utils.logger import HermesLogger
+from src.utils.metrics import MESSAGES, MESSAGES_IN_FLIGHT
+from src.utils import tracing
+from src.utils import codec
+from src.utils import flight_recorder
+from src.utils import profiling
+from src.utils.cache import CORPUS_UPDATES_EXCHANGE, invalidate_corpus_update
+from src.utils.answer_inputs import load_answer_inputs, remember_answer_inputs
+from src.utils.semantic_cache import semantic_answer_cache
+from src.utils.session_documents import session_documents
+from src.routing.small_talk import route_message
+from .message_processor.history_manager import ANSWER, EVALUATOR, PLANNER, HistoryManager
 from .message_processor.message_handler import MessageHandler
 from .message_processor.session_manager import SessionManager
 from .message_processor.retrieval_manager import RetrievalManager
@@ -15,6 +28,9 @@ from ..model.search import QnAList
 load_dotenv()
 logger = HermesLogger("consumer")
 
+# Message type chronos publishes to generate an existing answer again
+REGENERATE = "regenerate"
+
 class ChatConsumer:
     # Store channel as class variable for retry logic
     _channel = None
@@ -31,6 +47,14 @@ class ChatConsumer:
         await ChatConsumer._channel.set_qos(prefetch_count=3)  # Allow parallel processing of up to 3 messages
         queue = await ChatConsumer._channel.declare_queue("chat")
         await queue.consume(ChatConsumer.process_message, no_ack=False)
+
+        # Every hermes process gets its own queue on the fanout so all caches are invalidated
+        updates_exchange = await ChatConsumer._channel.declare_exchange(
+            CORPUS_UPDATES_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True
+        )
+        updates_queue = await ChatConsumer._channel.declare_queue(exclusive=True, auto_delete=True)
+        await updates_queue.bind(updates_exchange)
+        await updates_queue.consume(ChatConsumer.process_corpus_update, no_ack=True)
         logger.info("RabbitMQ consumer started")
 
         try:
@@ -40,9 +64,41 @@ class ChatConsumer:
             await conn.close()
             raise
 
+    @staticmethod
+    async def process_corpus_update(message):
+        try:
+            body = codec.loads(message.body)
+            document_ids = body.get("ids", [])
+            removed = invalidate_corpus_update(body["index"], document_ids)
+            logger.info("Corpus update received", index=body["index"], documents=len(document_ids), invalidated=removed)
+        except (ValueError, KeyError) as e:
+            logger.warning("Invalid corpus update message", error=str(e))
+
     @staticmethod
     async def process_message(message):
-        body = json.loads(message.body.decode("utf-8"))
+        # Continue the trace chronos started and account for the time the message sat in the queue
+        parent = tracing.extract(message.headers)
+        consumed_at = time.time_ns()
+        published_at = (message.headers or {}).get(tracing.PUBLISHED_AT_HEADER)
+        if parent is not None and isinstance(published_at, int) and published_at <= consumed_at:
+            tracing.record_span("rabbitmq.queue_wait", published_at, consumed_at, parent=parent,
+                                kind=tracing.CONSUMER, queue="chat")
+
+        MESSAGES_IN_FLIGHT.inc()
+        try:
+            with tracing.start_span("hermes.process_message", kind=tracing.CONSUMER, parent=parent,
+                                    start_ns=consumed_at, queue="chat") as span, \
+                    flight_recorder.flight_recorder.message(trace_id=span.context.trace_id):
+                if parent is not None and isinstance(published_at, int) and published_at <= consumed_at:
+                    flight_recorder.annotate(queue_wait_s=round((consumed_at - published_at) / 1e9, 3))
+                with profiling.profile_message():
+                    return await ChatConsumer._process_message(message)
+        finally:
+            MESSAGES_IN_FLIGHT.dec()
+
+    @staticmethod
+    async def _process_message(message):
+        body = codec.loads(message.body)
         message_ref = None
 
         retry_count = body.get('__retry_count', 0)
@@ -50,9 +106,11 @@ class ChatConsumer:
         logger.debug("Processing message", session_uid=body.get("session_uid"), retry=f"{retry_count}/{MAX_RETRIES}")
 
         try:
-            # Wrap entire processing in 5-minute timeout
-            async with asyncio.timeout(300):  # 5 minutes = 300 seconds
+            # Wrap entire processing in 5-minute timeout; stages carve their budgets from the same deadline
+            deadline = Deadline(MESSAGE_DEADLINE_SECONDS)
+            async with asyncio.timeout(MESSAGE_DEADLINE_SECONDS):
                 history = MessageHandler.serialize_message(body["messages"])
+                session_uid = body["session_uid"]
                 is_new = len(history) == 1
                 supabase.auth.set_session(
                     access_token=body["access_token"],
@@ -71,40 +129,126 @@ class ChatConsumer:
                     else:
                         raise Exception("Failed to get message_id from init_message response")
 
+                span = tracing.current_span()
+                if span is not None:
+                    span.attributes.update(session_uid=session_uid, message_id=message_id, retry=retry_count,
+                                           type=body.get("type", "chat"), messages=len(history))
+                flight_recorder.annotate(session_uid=session_uid, message_id=message_id, retry=retry_count,
+                                         type=body.get("type", "chat"), messages=len(history))
+
+                # Regenerations, and retries of an answer whose generation failed, reuse its documents and plan
+                if body.get("type") == REGENERATE or retry_count:
+                    stored_documents, stored_planned = (
+                        SessionManager.stored_documents(message_id) if body.get("type") == REGENERATE else (None, None)
+                    )
+                    inputs = load_answer_inputs(message_id, stored_documents, stored_planned)
+                    if inputs:
+                        documents, serialized_answer_res = inputs
+                        logger.info("Generating from stored retrieval", message_id=message_id,
+                                    documents=len(documents), retry=retry_count)
+                        remember_answer_inputs(message_id, documents, serialized_answer_res)
+                        MessageHandler.generate_final_response(
+                            HistoryManager.window(history, session_uid, ANSWER), documents, serialized_answer_res, message_id
+                        )
+                        SessionManager.finalize_message_with_thinking_duration(message_id)
+                        await message.ack()
+                        HistoryManager.schedule_summary(history, session_uid)
+                        MESSAGES.inc(outcome="regenerated")
+                        logger.info("Message processed successfully", session_uid=body['session_uid'])
+                        return {"status": "Message processing attempted"}
+                    logger.info("No stored retrieval to reuse, running the full pipeline", message_id=message_id)
+
+                # Greetings, thanks and questions about the bot skip the evaluator and retrieval entirely;
+                # follow-ups only take the rules, since the model cannot see what they refer to
+                route = route_message(history[-1]["parts"][0]["text"], follow_up=not is_new)
+                if route:
+                    logger.info("Small talk routed locally", message_id=message_id, kind=route.kind,
+                                source=route.source, confidence=round(route.confidence, 3))
+                    if is_new:
+                        SessionManager.handle_new_chat(history, body["session_uid"])
+                    MessageHandler.reply_small_talk(route, message_id)
+                    SessionManager.finalize_message_with_thinking_duration(message_id)
+                    await message.ack()
+                    MESSAGES.inc(outcome="small_talk")
+                    logger.info("Message processed successfully", session_uid=body['session_uid'])
+                    return {"status": "Message processing attempted"}
+
                 if is_new:
-                    from concurrent.futures import ThreadPoolExecutor
                     logger.debug("New chat detected, running title generation and question evaluation in parallel", message_id=message_id)
 
-                    with ThreadPoolExecutor(max_workers=2) as executor:
-                        title_future = executor.submit(SessionManager.handle_new_chat, history, body["session_uid"])
-                        eval_future = executor.submit(MessageHandler.evaluate_question, history)
+                    gemini_executor = get_executor(GEMINI)
+                    title_future = gemini_executor.submit(SessionManager.handle_new_chat, history, body["session_uid"])
+                    eval_future = gemini_executor.submit(MessageHandler.evaluate_question, history)
 
-                        title_future.result()
-                        eval_res = eval_future.result()
+                    title_future.result()
+                    eval_res = eval_future.result()
                 else:
                     logger.debug("Evaluating question", message_id=message_id)
-                    eval_res = MessageHandler.evaluate_question(history)
+                    eval_res = MessageHandler.evaluate_question(HistoryManager.window(history, session_uid, EVALUATOR))
 
                 documents = []
                 serialized_answer_res = QnAList(is_sufficient=False, answers=[])
 
-                if not eval_res.is_sufficient or True:
-                    logger.debug("Starting retrieval", message_id=message_id)
-                    documents = RetrievalManager.perform_retrieval(eval_res, message_id)
-                    logger.debug("Retrieval complete", documents=len(documents))
+                # Follow-up questions depend on the conversation, so only first messages use the semantic cache
+                probe = semantic_answer_cache.probe(eval_res.questions) if is_new else None
+                cached = probe.hit if probe else None
 
-                    serialized_answer_res = MessageHandler.generate_planned_answers(history, documents, eval_res)
+                if cached and cached.get("answer"):
+                    logger.info("Replaying cached answer", message_id=message_id, similarity=round(probe.similarity, 4))
+                    MessageHandler.replay_cached_answer(cached["answer"], message_id)
+                else:
+                    if cached:
+                        logger.info("Reusing cached retrieval", message_id=message_id, similarity=round(probe.similarity, 4))
+                        documents = cached["documents"]
+                        serialized_answer_res = QnAList.model_validate(cached["planned"])
+                        session_documents.remember(body["session_uid"], documents)
+                    elif is_new or not eval_res.is_sufficient:
+                        logger.debug("Starting retrieval", message_id=message_id)
+                        documents = RetrievalManager.perform_session_retrieval(
+                            eval_res, message_id, body["session_uid"], is_new, deadline
+                        )
+                        logger.debug("Retrieval complete", documents=len(documents))
+
+                        serialized_answer_res = MessageHandler.generate_planned_answers(
+                            HistoryManager.window(history, session_uid, PLANNER), documents, eval_res
+                        )
+                        if probe and documents:
+                            probe.retrieved(documents, serialized_answer_res)
+                    else:
+                        # The history already answers it; keep the session's documents on this row for the next turn
+                        documents = RetrievalManager.previous_session_documents(body["session_uid"], message_id)
 
-                MessageHandler.generate_final_response(history, documents, serialized_answer_res, message_id)
+                    remember_answer_inputs(message_id, documents, serialized_answer_res)
+                    if documents:
+                        # Off the critical path; a regenerate on another worker or after a restart reads it back
+                        try:
+                            get_executor(SUPABASE).submit_nowait(
+                                SessionManager.store_planned_answers, message_id, serialized_answer_res
+                            )
+                        except Exception as e:
+                            logger.warning("Failed to schedule planned answers write", message_id=message_id, error=str(e))
+                    response = MessageHandler.generate_final_response(
+                        HistoryManager.window(history, session_uid, ANSWER), documents, serialized_answer_res, message_id
+                    )
+                    if probe and not cached:
+                        try:
+                            semantic_answer_cache.store(probe, getattr(response, "final_answer", None))
+                        except Exception as e:
+                            logger.warning("Failed to store semantic cache entry", message_id=message_id, error=str(e))
                 SessionManager.finalize_message_with_thinking_duration(message_id)
 
                 await message.ack()
+                # Off the critical path: the next turn picks up the summary if it is ready
+                HistoryManager.schedule_summary(history, session_uid)
+                MESSAGES.inc(outcome="answered")
                 logger.info("Message processed successfully", session_uid=body['session_uid'])
 
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
             logger.error(f"Processing timeout (5 min) for session {body.get('session_uid')}")
+            flight_recorder.record_error(e)
             # Don't requeue timeout messages
             await message.nack(requeue=False)
+            MESSAGES.inc(outcome="timeout")
             if message_ref:
                 ErrorHandler.handle_error(
                     Exception("Processing timeout after 5 minutes"),
@@ -113,12 +257,14 @@ class ChatConsumer:
 
         except Exception as e:
             logger.error(f"Processing error for session {body.get('session_uid')}: {e}")
+            flight_recorder.record_error(e)
             
             # Check if max retries reached
             if retry_count >= MAX_RETRIES:
                 logger.error(f"Max retries ({MAX_RETRIES}) reached for session {body.get('session_uid')}. Message rejected.")
                 # Don't requeue, message rejected permanently
                 await message.nack(requeue=False)
+                MESSAGES.inc(outcome="rejected")
                 
                 # Mark message as failed in database
                 if message_ref:
@@ -149,14 +295,17 @@ class ChatConsumer:
                     # Publish new message with retry count using stored channel
                     await ChatConsumer._channel.default_exchange.publish(
                         aio_pika.Message(
-                            body=json.dumps(body).encode('utf-8'),
-                            delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                            body=codec.dumpb(body),
+                            content_type=codec.WIRE_CONTENT_TYPE,
+                            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                            headers=tracing.inject({tracing.PUBLISHED_AT_HEADER: time.time_ns()}),
                         ),
                         routing_key='chat'
                     )
 
                     # Acknowledge original message
                     await message.ack()
+                    MESSAGES.inc(outcome="retried")
                     logger.info(f"Message republished with retry count {retry_count + 1}")
 
                 except Exception as republish_error:
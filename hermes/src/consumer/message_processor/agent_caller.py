@@ -1,6 +1,8 @@
 import time
 import traceback
+from src.common.deadline import current_deadline
 from src.utils.logger import HermesLogger
+from src.utils.metrics import RETRIES
 
 logger = HermesLogger("agent_caller")
 
@@ -23,6 +25,11 @@ class AgentCaller:
                     raise e
 
                 delay = min(base_delay * (2**attempt), max_delay)
+                deadline = current_deadline()
+                if deadline is not None and deadline.remaining() <= delay:
+                    logger.warning("Deadline too close to retry", func=func.__name__, error=str(e))
+                    raise e
+
                 logger.warning(
                     "Agent call failed, retrying",
                     func=func.__name__,
@@ -30,6 +37,7 @@ class AgentCaller:
                     retry_delay_s=delay,
                     error=str(e)
                 )
+                RETRIES.inc(func=func.__name__)
                 time.sleep(delay)
 
         raise Exception(f"All {max_attempts} attempts failed for {func.__name__}")
@@ -1,12 +1,12 @@
-import traceback
 from src.common.supabase_client import client as supabase
+from src.utils.logger import HermesLogger
+
+logger = HermesLogger("error_handler")
 
 class ErrorHandler:
     @staticmethod
     def handle_error(e: Exception, message_ref):
-        error_msg = f"Error processing message: {str(e)}"
-        print(error_msg)
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("Error processing message", error=str(e))
 
         if message_ref:
             try:
@@ -23,8 +23,8 @@ class ErrorHandler:
                         "state": "error",
                     }).eq("id", message_id).execute()
                 else:
-                    print("Could not extract message_id from message_ref for error update")
+                    logger.warning("Could not extract message_id from message_ref for error update")
             except Exception as db_error:
-                print(f"Failed to update error state in database: {str(db_error)}")
+                logger.error("Failed to update error state in database", error=str(db_error), message_id=message_id)
         
         return {"status": "Error processing message", "error": str(e)}
@@ -0,0 +1,149 @@
+import os
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from src.common.executors import GEMINI, get_executor
+from src.common.llm_gateway import estimate_tokens
+from src.utils.cache import get_cache
+from src.utils.logger import HermesLogger
+from ...agents.summary_agent import summarize_history
+from ...model.search import History
+
+load_dotenv()
+
+logger = HermesLogger("history")
+
+EVALUATOR = "evaluator"
+TITLE = "title"
+PLANNER = "planner"
+ANSWER = "answer"
+
+# Most recent messages (user and assistant) every agent sees word for word
+HISTORY_VERBATIM_TURNS = int(os.getenv("HISTORY_VERBATIM_TURNS", "6"))
+# Sessions shorter than this are sent whole and never summarized
+HISTORY_SUMMARY_MIN_TURNS = int(os.getenv("HISTORY_SUMMARY_MIN_TURNS", "10"))
+HISTORY_SUMMARY_TTL = int(os.getenv("HISTORY_SUMMARY_TTL", "86400"))
+HISTORY_SUMMARY_SIZE = int(os.getenv("HISTORY_SUMMARY_SIZE", "4096"))
+
+# History tokens per agent; override with HISTORY_TOKEN_BUDGETS="agent=tokens,..."
+DEFAULT_TOKEN_BUDGETS = {
+    EVALUATOR: 2000,
+    TITLE: 1000,
+    PLANNER: 4000,
+    ANSWER: 6000,
+}
+
+
+def _parse_budgets(value: str) -> Dict[str, int]:
+    budgets = dict(DEFAULT_TOKEN_BUDGETS)
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        agent, _, tokens = entry.partition("=")
+        budgets[agent.strip()] = int(tokens)
+    return budgets
+
+
+HISTORY_TOKEN_BUDGETS = _parse_budgets(os.getenv("HISTORY_TOKEN_BUDGETS", ""))
+
+# session_uid -> {"covered": number of leading messages folded in, "text": summary}
+summaries = get_cache("history_summaries", maxsize=HISTORY_SUMMARY_SIZE, ttl=HISTORY_SUMMARY_TTL)
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def _summary_turn(text: str) -> dict:
+    return {"role": "user", "parts": [{"text": f"Ringkasan percakapan sebelumnya:\n{text}"}]}
+
+
+class HistoryManager:
+    @staticmethod
+    def window(history: History, session_uid: str, agent: str) -> History:
+        """
+        The part of the conversation an agent gets, within its token budget.
+
+        Older messages are replaced by the session's rolling summary once one
+        exists; messages the summary does not cover yet are kept verbatim.
+        Then the oldest messages are dropped until the budget fits, always
+        keeping the latest user message.
+
+        Args:
+            history: Full serialized conversation
+            session_uid: Session whose summary to use
+            agent: EVALUATOR, TITLE, PLANNER or ANSWER
+
+        Returns:
+            Contents to send, starting with the summary when there is one
+        """
+        if len(history) < HISTORY_SUMMARY_MIN_TURNS:
+            turns, summary = list(history), None
+        else:
+            entry = summaries.get(session_uid)
+            covered = entry["covered"] if entry and entry["covered"] <= len(history) - 1 else 0
+            turns, summary = list(history[covered:]), entry["text"] if covered else None
+
+        budget = HISTORY_TOKEN_BUDGETS.get(agent, DEFAULT_TOKEN_BUDGETS[ANSWER])
+        prefix = [_summary_turn(summary)] if summary else []
+        while len(turns) > 1 and estimate_tokens(prefix + turns) > budget:
+            turns.pop(0)
+        # Gemini expects the conversation to open with a user turn
+        while len(turns) > 1 and turns[0]["role"] != "user":
+            turns.pop(0)
+
+        if len(turns) + (1 if summary else 0) < len(history):
+            logger.debug("History windowed", agent=agent, messages=len(history), kept=len(turns), summary=bool(summary))
+        return prefix + turns
+
+    @staticmethod
+    def refresh_summary(history: History, session_uid: str):
+        """Fold the messages that fall out of the verbatim window into the session summary."""
+        # After this turn the answer and the next question join the history
+        target = len(history) + 2 - HISTORY_VERBATIM_TURNS
+        if len(history) + 2 < HISTORY_SUMMARY_MIN_TURNS or target <= 0:
+            return
+        target = min(target, len(history))
+        # Keep question and answer together: the verbatim part starts at a user message
+        while 0 < target < len(history) and history[target]["role"] != "user":
+            target -= 1
+        if target <= 0:
+            return
+        entry = summaries.get(session_uid)
+        covered = entry["covered"] if entry and entry["covered"] <= target else 0
+        if covered == target:
+            return
+        try:
+            text = summarize_history(entry["text"] if covered else "", history[covered:target])
+        except Exception as e:
+            logger.warning("Failed to summarize history", session_uid=session_uid, error=str(e))
+            return
+        if text:
+            summaries.set(session_uid, {"covered": target, "text": text})
+            logger.debug("History summary updated", session_uid=session_uid, covered=target)
+
+    @staticmethod
+    def schedule_summary(history: History, session_uid: str) -> Optional[Future]:
+        """Recompute the summary in the background; one refresh per session at a time.
+
+        Called from the event loop, so a saturated Gemini pool skips the refresh
+        instead of blocking; the next turn schedules it again.
+        """
+        with _in_flight_lock:
+            if session_uid in _in_flight:
+                return None
+            _in_flight.add(session_uid)
+
+        def run():
+            try:
+                HistoryManager.refresh_summary(history, session_uid)
+            finally:
+                with _in_flight_lock:
+                    _in_flight.discard(session_uid)
+
+        try:
+            return get_executor(GEMINI).submit_nowait(run)
+        except Exception as e:
+            with _in_flight_lock:
+                _in_flight.discard(session_uid)
+            logger.warning("Failed to schedule history summary", session_uid=session_uid, error=str(e))
+            return None
@@ -1,6 +1,7 @@
 from ...model.search import History, QnAList, Questions
-from ...agents.answering_agent import answer_generated_questions, answer_user
+from ...agents.answering_agent import answer_generated_questions, answer_user, write_final_answer
 from ...agents.evaluator_agent import evaluate_question
+from ...routing.small_talk import SmallTalkRoute
 from .agent_caller import AgentCaller
 from .retrieval_manager import RetrievalManager
 
@@ -48,7 +49,7 @@ class MessageHandler:
     @staticmethod
     def generate_final_response(history: History, documents: list[dict], serialized_answer_res: QnAList, message_id: str):
         try:
-            AgentCaller.retry_with_exponential_backoff(
+            return AgentCaller.retry_with_exponential_backoff(
                 lambda: AgentCaller.safe_agent_call(
                     answer_user,
                     history,
@@ -62,3 +63,13 @@ class MessageHandler:
             )
         except Exception as e:
             raise Exception(f"Unable to generate response: {e}")
+
+    @staticmethod
+    def replay_cached_answer(answer: dict, message_id: str):
+        """Write a semantic cache hit's final answer to the chat row without generating it again."""
+        write_final_answer(message_id, answer["content"], answer["citations"], answer["documents"])
+
+    @staticmethod
+    def reply_small_talk(route: SmallTalkRoute, message_id: str):
+        """Write the canned reply for a small-talk message; no retrieval, no citations."""
+        write_final_answer(message_id, route.reply, [], [])
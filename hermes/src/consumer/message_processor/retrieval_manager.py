@@ -1,10 +1,19 @@
-from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from concurrent.futures import wait
+from typing import Optional
+
 from src.common.supabase_client import client as supabase
+from src.common.deadline import ANSWER_RESERVE_SECONDS, MESSAGE_DEADLINE_SECONDS, RETRIEVAL_BUDGET_SECONDS, Deadline
+from src.common.executors import RETRIEVAL, SUPABASE, get_executor
+from src.utils import flight_recorder, tracing
 from src.utils.logger import HermesLogger
+from src.utils.metrics import RETRIEVAL_STRATEGY_SECONDS, SUPABASE_WRITE_SECONDS
+from src.utils.session_documents import session_documents
 from ...model.search import Questions
 from ...retrieval.retrieval_context import RetrievalContext
 from ...retrieval.retrieval_factory import get_retrieval_strategy
 from .agent_caller import AgentCaller
+from .session_manager import SessionManager
 from ...retrieval.kuhper_retrieval import KuhperRetrievalStrategy
 from ...retrieval.legal_document_retrieval import LegalDocumentRetrievalStrategy
 from ...retrieval.undang_undang_retrieval import UndangUndangRetrievalStrategy
@@ -12,18 +21,42 @@ from ...retrieval.perpres_retrieval import PerpresRetrievalStrategy
 
 logger = HermesLogger("retrieval")
 
+# Strategies dropped for missing the retrieval budget, since process start
+DROPPED_STRATEGIES: Counter = Counter()
+
 class RetrievalManager:
     @staticmethod
+    @tracing.traced("supabase.set_search_state", tracing.CLIENT)
     def set_search_state(message_id: str):
         try:
-            supabase.table("chat").update({"state": "searching"}).eq("id", message_id).execute()
+            with SUPABASE_WRITE_SECONDS.time(operation="search_state"):
+                # Conditional, so a write that lands late never moves a streamed or finished answer back
+                supabase.table("chat").update({"state": "searching"}).eq("id", message_id).eq("state", "loading").execute()
             logger.debug("Search state updated", message_id=message_id)
         except Exception as e:
             logger.warning("Failed to update search state", message_id=message_id, error=str(e))
 
     @staticmethod
-    def perform_retrieval(eval_res: Questions, message_id: str) -> list[dict]:
-        RetrievalManager.set_search_state(message_id)
+    def perform_retrieval(eval_res: Questions, message_id: str, deadline: Optional[Deadline] = None) -> list[dict]:
+        """
+        Run every retrieval strategy concurrently within a budget carved from the message deadline.
+
+        Strategies still running when the budget runs out are dropped; their
+        names are logged and counted in `DROPPED_STRATEGIES`.
+
+        Args:
+            eval_res: Evaluated questions to search for
+            message_id: Chat message being answered
+            deadline: The message's overall deadline, a fresh one when None
+
+        Returns:
+            Documents from the strategies that finished in time
+        """
+        # Best-effort state update; it must not delay the searches, and only applies while the row is still loading
+        try:
+            get_executor(SUPABASE).submit(RetrievalManager.set_search_state, message_id)
+        except Exception as e:
+            logger.warning("Failed to schedule search state update", message_id=message_id, error=str(e))
         try:
             uu_retrieval = UndangUndangRetrievalStrategy()
             kuhper_retrieval = KuhperRetrievalStrategy()
@@ -35,7 +68,7 @@ class RetrievalManager:
             def call_uu_retrieval():
                 return AgentCaller.retry_with_exponential_backoff(
                     lambda: AgentCaller.safe_agent_call(
-                        uu_retrieval.search, eval_res.questions
+                        uu_retrieval.cached_search, eval_res.questions
                     ),
                     max_attempts=2,
                     base_delay=3,
@@ -44,7 +77,7 @@ class RetrievalManager:
             def call_kuhper_retrieval():
                 return AgentCaller.retry_with_exponential_backoff(
                     lambda: AgentCaller.safe_agent_call(
-                        kuhper_retrieval.search, eval_res.questions
+                        kuhper_retrieval.cached_search, eval_res.questions
                     ),
                     max_attempts=2,
                     base_delay=3,
@@ -55,7 +88,7 @@ class RetrievalManager:
             # def call_kuhp_retrieval():
             #     return AgentCaller.retry_with_exponential_backoff(
             #         lambda: AgentCaller.safe_agent_call(
-            #             kuhp_retrieval.search, eval_res.questions
+            #             kuhp_retrieval.cached_search, eval_res.questions
             #         ),
             #         max_attempts=2,
             #         base_delay=3,
@@ -64,7 +97,7 @@ class RetrievalManager:
             def call_legal_doc_retrieval():
                 return AgentCaller.retry_with_exponential_backoff(
                     lambda: AgentCaller.safe_agent_call(
-                        legal_doc_retrieval.search, eval_res.questions
+                        legal_doc_retrieval.cached_search, eval_res.questions
                     ),
                     max_attempts=2,
                     base_delay=3,
@@ -73,43 +106,135 @@ class RetrievalManager:
             def call_perpres_retrieval():
                 return AgentCaller.retry_with_exponential_backoff(
                     lambda: AgentCaller.safe_agent_call(
-                        perpres_retrieval.search, eval_res.questions
+                        perpres_retrieval.cached_search, eval_res.questions
                     ),
                     max_attempts=2,
                     base_delay=3,
                 )
 
-            with ThreadPoolExecutor(max_workers=4) as executor:  # Reduced to 4 workers (KUHP disabled)
-                # Submit all four retrieval tasks concurrently (KUHP disabled until index exists)
-                uu_future = executor.submit(call_uu_retrieval)
-                kuhper_future = executor.submit(call_kuhper_retrieval)
+            budget = (deadline or Deadline(MESSAGE_DEADLINE_SECONDS)).carve(
+                RETRIEVAL_BUDGET_SECONDS, reserve=ANSWER_RESERVE_SECONDS
+            )
+            strategies = {
+                "uu": call_uu_retrieval,
+                "kuhper": call_kuhper_retrieval,
                 # DISABLED: KUHP retrieval until index exists
-                # kuhp_future = executor.submit(call_kuhp_retrieval)
-                legal_doc_future = executor.submit(call_legal_doc_retrieval)
-                perpres_future = executor.submit(call_perpres_retrieval)  # ✅ NEW: Perpres retrieval
+                # "kuhp": call_kuhp_retrieval,
+                "legal_doc": call_legal_doc_retrieval,
+                "perpres": call_perpres_retrieval,
+            }
 
-                # Wait for all results
-                uu_documents = uu_future.result() or []
-                kuhper_documents = kuhper_future.result() or []
-                # DISABLED: KUHP retrieval until index exists
-                # kuhp_documents = kuhp_future.result()
-                kuhp_documents = []  # Return empty list instead
-                legal_doc_documents = legal_doc_future.result() or []
-                perpres_documents = perpres_future.result() or []
+            def timed(name, call):
+                with tracing.start_span(f"retrieval.{name}", strategy=name), \
+                        RETRIEVAL_STRATEGY_SECONDS.time(strategy=name):
+                    return call()
+
+            executor = get_executor(RETRIEVAL)
+            # Tasks inherit the budget, so their ES requests and retries stop with it
+            with budget.scope():
+                futures = {name: executor.submit(timed, name, call) for name, call in strategies.items()}
+
+            # Take whatever finished within the budget instead of waiting for the slowest index
+            wait(futures.values(), timeout=budget.remaining())
+            results = {}
+            dropped = []
+            for name, future in futures.items():
+                if not future.done():
+                    # Queued tasks never start; running ones finish in the background and are ignored
+                    future.cancel()
+                    dropped.append(name)
+                    continue
+                try:
+                    results[name] = future.result() or []
+                except Exception as e:
+                    logger.warning("Retrieval strategy failed", strategy=name, error=str(e))
+                    results[name] = []
 
-            all_documents = uu_documents + kuhper_documents + kuhp_documents + legal_doc_documents + perpres_documents
+            if dropped:
+                for name in dropped:
+                    DROPPED_STRATEGIES[name] += 1
+                logger.warning(
+                    "Retrieval budget exhausted, continuing with partial results",
+                    message_id=message_id,
+                    dropped=",".join(dropped),
+                    budget_s=round(RETRIEVAL_BUDGET_SECONDS, 1),
+                )
+
+            all_documents = [document for documents in results.values() for document in documents]
+            flight_recorder.record_documents({name: len(documents) for name, documents in results.items()})
+            if dropped:
+                flight_recorder.annotate(dropped_strategies=dropped)
             logger.info(
                 "Retrieval complete",
                 total=len(all_documents),
-                uu=len(uu_documents),
-                kuhper=len(kuhper_documents),
-                kuhp=len(kuhp_documents),
-                legal_doc=len(legal_doc_documents),
-                perpres=len(perpres_documents)
+                dropped=len(dropped),
+                **{name: len(documents) for name, documents in results.items()},
             )
-            return all_documents if all_documents else []
+            return all_documents
         except Exception as e:
-            logger.error("Retrieval failed", error=str(e))
-            import traceback
-            traceback.print_exc()
+            logger.exception("Retrieval failed", error=str(e))
             return []
+
+    @staticmethod
+    def perform_session_retrieval(eval_res: Questions, message_id: str, session_uid: str, is_new: bool,
+                                  deadline: Optional[Deadline] = None) -> list[dict]:
+        """
+        Retrieve only for the questions the session's previous documents do not cover.
+
+        Args:
+            eval_res: Evaluated questions to search for
+            message_id: Chat message being answered
+            session_uid: Session whose previous documents may be reused
+            is_new: First message of the session, so there is nothing to reuse
+            deadline: The message's overall deadline
+
+        Returns:
+            Reused documents followed by newly retrieved ones
+        """
+        reuse = None
+        if not is_new:
+            reuse = session_documents.plan(
+                session_uid,
+                eval_res.questions,
+                load_previous=lambda: SessionManager.previous_documents(session_uid, message_id),
+            )
+        if reuse is None or reuse.uncovered:
+            questions = reuse.uncovered if reuse else eval_res.questions
+            new_documents = RetrievalManager.perform_retrieval(
+                eval_res.model_copy(update={"questions": questions}), message_id, deadline
+            )
+        else:
+            new_documents = []
+        documents = (reuse.documents if reuse else []) + new_documents
+
+        if reuse and reuse.covered:
+            flight_recorder.record_documents({"session_reuse": len(reuse.documents)})
+            logger.info(
+                "Reusing session documents",
+                message_id=message_id,
+                covered=len(reuse.covered),
+                uncovered=len(reuse.uncovered),
+                reused=len(reuse.documents),
+                retrieved=len(new_documents),
+            )
+        session_documents.remember(session_uid, documents, reuse)
+        return documents
+
+    @staticmethod
+    def previous_session_documents(session_uid: str, message_id: str) -> list[dict]:
+        """
+        The session's last documents, for a follow-up the history already answers.
+
+        Carrying them forward keeps them on this answer's row, so the next
+        follow-up can still reuse them.
+
+        Args:
+            session_uid: Chat session
+            message_id: Chat message being answered
+
+        Returns:
+            The documents of the session's previous answer, or [] when there are none
+        """
+        return session_documents.previous(
+            session_uid, load_previous=lambda: SessionManager.previous_documents(session_uid, message_id)
+        )
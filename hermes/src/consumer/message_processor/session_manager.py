@@ -1,14 +1,18 @@
 from datetime import datetime, timezone
+from typing import Optional
 from src.common.supabase_client import client as supabase
+from src.utils import codec, tracing
 from src.utils.logger import HermesLogger
+from src.utils.metrics import SUPABASE_WRITE_SECONDS
 from ...agents.title_agent import generate_title
-from ...model.search import History
+from ...model.search import History, QnAList
 from .agent_caller import AgentCaller
 
 logger = HermesLogger("session")
 
 class SessionManager:
     @staticmethod
+    @tracing.traced("supabase.init_message", tracing.CLIENT)
     def init_message(session_uid: str, user_uid: str, thinking_start_time: str = None):
         try:
             supabase.table("session").update({
@@ -38,6 +42,7 @@ class SessionManager:
             raise
 
     @staticmethod
+    @tracing.traced("session.generate_title")
     def handle_new_chat(history: History, session_uid: str):
         try:
             title = AgentCaller.retry_with_exponential_backoff(
@@ -52,6 +57,53 @@ class SessionManager:
             logger.warning("Failed to generate title", error=str(e))
 
     @staticmethod
+    @tracing.traced("supabase.store_planned_answers", tracing.CLIENT)
+    def store_planned_answers(message_id: str, planned: QnAList):
+        """Keep the planned answers on the chat row, so any worker can regenerate the message later."""
+        try:
+            with SUPABASE_WRITE_SECONDS.time(operation="planned_answers"):
+                supabase.table("chat").update({
+                    "planned_answers": codec.dumps(planned.model_dump()),
+                }).eq("id", message_id).execute()
+            logger.debug("Planned answers stored", message_id=message_id)
+        except Exception as e:
+            logger.warning("Failed to store planned answers", message_id=message_id, error=str(e))
+
+    @staticmethod
+    def stored_documents(message_id: str) -> tuple[list[dict], Optional[dict]]:
+        """Documents stored with an answer, as written by the answering stage, and its planned answers if stored."""
+        result = supabase.table("chat").select("documents, planned_answers").eq("id", message_id).execute()
+        if not result.data:
+            return [], None
+        row = result.data[0]
+        documents = row.get("documents") or []
+        planned = row.get("planned_answers") or None
+        return (
+            codec.loads(documents) if isinstance(documents, str) else documents,
+            codec.loads(planned) if isinstance(planned, str) else planned,
+        )
+
+    @staticmethod
+    def previous_documents(session_uid: str, message_id: str) -> list[dict]:
+        """Documents stored with the session's last finished answer, other than `message_id`."""
+        result = (
+            supabase.table("chat")
+            .select("id, documents")
+            .eq("session_uid", session_uid)
+            .eq("role", "assistant")
+            .eq("state", "done")
+            .neq("id", message_id)
+            .order("created_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+        if not result.data or not result.data[0].get("documents"):
+            return []
+        documents = result.data[0]["documents"]
+        return codec.loads(documents) if isinstance(documents, str) else documents
+
+    @staticmethod
+    @tracing.traced("supabase.finalize_message", tracing.CLIENT)
     def finalize_message_with_thinking_duration(message_id: str):
         """Calculate and store thinking duration when message is completed"""
         try:
@@ -61,7 +113,7 @@ class SessionManager:
                 existing_duration = chat_record.data[0].get("thinking_duration")
 
                 if existing_duration is not None and existing_duration > 0:
-                    logger.info(
+                    logger.debug(
                         "FINALIZE: thinking_duration already set, skipping recalculation",
                         message_id=message_id,
                         existing_duration_ms=existing_duration,
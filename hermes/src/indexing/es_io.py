@@ -0,0 +1,116 @@
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+from dotenv import load_dotenv
+
+from src.tools.search_legal_document import get_elasticsearch_auth
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("es_io")
+
+ES_BASE_URL = os.environ.get("ES_BASE_URL", "https://chat.lexin.cs.ui.ac.id/elasticsearch")
+
+
+def scroll_index(index_name: str, query: Optional[Dict[str, Any]] = None, source: Any = None,
+                 page_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """Yield every matching document of an index as {"id", "source"} records.
+
+    Args:
+        index_name: ES index to read
+        query: ES query, match_all when None
+        source: `_source` filter applied to every page
+        page_size: Documents per scroll page
+    """
+    auth = get_elasticsearch_auth()
+    body = {"size": page_size, "query": query or {"match_all": {}}, "sort": ["_doc"]}
+    if source is not None:
+        body["_source"] = source
+
+    response = requests.post(
+        f"{ES_BASE_URL}/{index_name}/_search",
+        params={"scroll": "2m"},
+        json=body,
+        auth=auth,
+        timeout=60,
+    )
+    response.raise_for_status()
+    data = response.json()
+    scroll_id = data.get("_scroll_id")
+
+    try:
+        while True:
+            hits = data.get("hits", {}).get("hits", [])
+            if not hits:
+                break
+            for hit in hits:
+                yield {"id": hit.get("_id"), "source": hit.get("_source", {})}
+
+            response = requests.post(
+                f"{ES_BASE_URL}/_search/scroll",
+                json={"scroll": "2m", "scroll_id": scroll_id},
+                auth=auth,
+                timeout=60,
+            )
+            response.raise_for_status()
+            data = response.json()
+            scroll_id = data.get("_scroll_id", scroll_id)
+    finally:
+        if scroll_id:
+            try:
+                requests.delete(
+                    f"{ES_BASE_URL}/_search/scroll",
+                    json={"scroll_id": scroll_id},
+                    auth=auth,
+                    timeout=30,
+                )
+            except requests.exceptions.RequestException:
+                pass
+
+
+def bulk(actions: Iterable[Dict[str, Any]], refresh: bool = False) -> Dict[str, Any]:
+    """Send one `_bulk` request.
+
+    Args:
+        actions: Alternating action and (where required) document lines
+        refresh: Whether to refresh the affected shards afterwards
+
+    Returns:
+        Summary with item count and the failed items
+    """
+    payload = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in actions)
+    if not payload:
+        return {"items": 0, "errors": []}
+
+    response = requests.post(
+        f"{ES_BASE_URL}/_bulk",
+        params={"refresh": "true"} if refresh else None,
+        data=payload.encode("utf-8"),
+        headers={"Content-Type": "application/x-ndjson"},
+        auth=get_elasticsearch_auth(),
+        timeout=120,
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    errors: List[Dict[str, Any]] = []
+    if data.get("errors"):
+        for item in data.get("items", []):
+            result = next(iter(item.values()))
+            if result.get("error"):
+                errors.append({"id": result.get("_id"), "index": result.get("_index"), "error": result["error"]})
+    return {"items": len(data.get("items", [])), "errors": errors}
+
+
+def put_mapping(index_name: str, properties: Dict[str, Any]):
+    response = requests.put(
+        f"{ES_BASE_URL}/{index_name}/_mapping",
+        json={"properties": properties},
+        auth=get_elasticsearch_auth(),
+        timeout=60,
+    )
+    response.raise_for_status()
+    logger.info("Mapping updated", index=index_name, fields=",".join(properties))
@@ -0,0 +1,94 @@
+import argparse
+import os
+import time
+from typing import List
+
+from src.indexing.es_io import bulk, put_mapping, scroll_index
+from src.tools.hybrid_search import EMBEDDING_DIMS, EMBEDDING_FIELD, HYBRID_TEXT_FIELDS
+from src.utils.embedding_helper import batch_embed_queries
+from src.utils.logger import HermesLogger, setup_logging
+
+logger = HermesLogger("es_vectors")
+
+
+def ensure_vector_mapping(index_name: str):
+    """Add the `embedding` dense_vector field used by the hybrid kNN search."""
+    put_mapping(index_name, {
+        EMBEDDING_FIELD: {
+            "type": "dense_vector",
+            "dims": EMBEDDING_DIMS,
+            "index": True,
+            "similarity": "cosine",
+        }
+    })
+
+
+def backfill_embeddings(index_name: str, batch_size: int = 50, overwrite: bool = False) -> int:
+    """
+    Store a text-embedding-004 vector next to the text of every document.
+
+    Args:
+        index_name: ES index to update
+        batch_size: Documents per embedding call and `_bulk` request
+        overwrite: Re-embed documents that already carry a vector
+
+    Returns:
+        Number of documents updated
+    """
+    text_field = HYBRID_TEXT_FIELDS.get(index_name, "content")
+    query = None if overwrite else {"bool": {"must_not": [{"exists": {"field": EMBEDDING_FIELD}}]}}
+
+    start_time = time.time()
+    updated = 0
+    failed = 0
+    batch: List[dict] = []
+
+    def flush():
+        nonlocal updated, failed
+        texts = [doc["source"].get(text_field) or "" for doc in batch]
+        embeddings = batch_embed_queries(texts)
+        actions = []
+        for doc, embedding in zip(batch, embeddings):
+            actions.append({"update": {"_index": index_name, "_id": doc["id"]}})
+            actions.append({"doc": {EMBEDDING_FIELD: embedding}})
+        result = bulk(actions)
+        failed += len(result["errors"])
+        updated += result["items"] - len(result["errors"])
+        for error in result["errors"][:3]:
+            logger.warning("Embedding update failed", index=index_name, id=error["id"], error=str(error["error"]))
+        logger.info("Embeddings written", index=index_name, updated=updated, failed=failed)
+        batch.clear()
+
+    # Scrolling with a must_not filter is safe: the scroll context is a point-in-time view
+    for doc in scroll_index(index_name, query=query, source=[text_field], page_size=batch_size * 4):
+        if not (doc["source"].get(text_field) or "").strip():
+            continue
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    logger.info(
+        "Backfill complete",
+        index=index_name,
+        updated=updated,
+        failed=failed,
+        duration_ms=int((time.time() - start_time) * 1000),
+    )
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store text-embedding-004 vectors in ES for hybrid search")
+    parser.add_argument("indices", nargs="+", help="ES index names, e.g. undang-undang kuhper perpres")
+    parser.add_argument("--batch-size", type=int, default=50, help="Documents per embedding/bulk batch")
+    parser.add_argument("--overwrite", action="store_true", help="Re-embed documents that already have a vector")
+    parser.add_argument("--skip-mapping", action="store_true", help="Do not update the index mapping")
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+    for name in args.indices:
+        if not args.skip_mapping:
+            ensure_vector_mapping(name)
+        backfill_embeddings(name, batch_size=args.batch_size, overwrite=args.overwrite)
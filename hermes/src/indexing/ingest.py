@@ -0,0 +1,281 @@
+import argparse
+import glob
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from src.common.llm_gateway import BACKGROUND, llm_gateway
+from src.common.pinecone_client import INDEX_GETTERS
+from src.indexing.es_io import bulk
+from src.indexing.pasal_splitter import split_pasal
+from src.tools.hybrid_search import EMBEDDING_FIELD
+from src.utils.logger import HermesLogger, setup_logging
+
+load_dotenv()
+
+logger = HermesLogger("ingest")
+
+EMBEDDING_MODEL = "text-embedding-004"
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+
+# Pinecone rejects metadata above 40KB per vector
+PINECONE_METADATA_TEXT_LIMIT = 20000
+
+# Id of a split pasal record, unless the index profile overrides it
+RECORD_ID_FORMAT = "{document_id}___{number}"
+
+# How each index is laid out: the field holding the text, whether a source
+# document is split into pasal records or indexed as-is, and the record id
+# format. KUHPer articles are keyed by the bare pasal number, which the
+# search prompt's `_id` lookups rely on.
+INDEX_PROFILES: Dict[str, Dict[str, Any]] = {
+    "peraturan_indonesia": {"text_field": None, "split": False},
+    "undang-undang": {"text_field": "isi", "split": True},
+    "perpres": {"text_field": "isi", "split": True},
+    "kuhper": {"text_field": "content", "split": True, "record_id": "{number}"},
+    "kuhp": {"text_field": "content", "split": True},
+}
+
+
+class Checkpoint:
+    """Per-file count of source lines that are fully written, saved atomically."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done: Dict[str, int] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = json.load(f)
+
+    def lines_done(self, source_path: str) -> int:
+        return self.done.get(os.path.abspath(source_path), 0)
+
+    def mark(self, source_path: str, line_number: int):
+        if not self.path:
+            return
+        self.done[os.path.abspath(source_path)] = line_number
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.done, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_source_documents(paths: List[str], checkpoint: Checkpoint) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """Stream (path, line number, document) from JSONL files, skipping checkpointed lines.
+
+    Each line is a `{"id", "source"}` record, the same shape `scroll_index` and
+    the local snapshots produce.
+    """
+    for path in paths:
+        skip = checkpoint.lines_done(path)
+        if skip:
+            logger.info("Resuming source file", path=path, skipped_lines=skip)
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if line_number <= skip or not line.strip():
+                    continue
+                yield path, line_number, json.loads(line)
+
+
+def to_records(index_name: str, document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn one source document into the ES records of an index."""
+    profile = INDEX_PROFILES[index_name]
+    source = document.get("source", {})
+    if not profile["split"]:
+        return [{"id": document["id"], "source": source}]
+
+    text_field = profile["text_field"]
+    record_id = profile.get("record_id", RECORD_ID_FORMAT)
+    shared = {key: value for key, value in source.items() if key != text_field}
+    records = []
+    for pasal in split_pasal(source.get(text_field) or ""):
+        record_source = dict(shared)
+        record_source.update({text_field: pasal["text"], "pasal": pasal["pasal"]})
+        if pasal["bab"]:
+            record_source["bab"] = pasal["bab"]
+        if pasal["penjelasan"]:
+            record_source["penjelasan"] = pasal["penjelasan"]
+        records.append({"id": record_id.format(document_id=document["id"], number=pasal["number"]), "source": record_source})
+    return records
+
+
+def embed_texts(texts: List[str], retries: int = 5) -> List[List[float]]:
+    """Embed a batch in one request; the gateway handles rate limits, this retries transient errors."""
+    delay = 1.0
+    for attempt in range(retries):
+        try:
+            response = llm_gateway.embed_content(model=EMBEDDING_MODEL, contents=texts, priority=BACKGROUND, caller="ingest")
+            return [[float(x) for x in embedding.values] for embedding in response.embeddings]
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            logger.warning("Embedding batch failed, retrying", attempt=attempt + 1, delay_s=delay, error=str(e))
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+class IngestPipeline:
+    """Split, embed and write records in bounded batches.
+
+    At most `concurrency * 2` batches are held in memory. Batches are written in
+    submission order, so the checkpoint always points at a prefix of the source
+    that is fully stored in ES and Pinecone. Once a batch has failed bulk items
+    the checkpoint stops advancing, and the next run starts again from there.
+    """
+
+    def __init__(self, index_name: str, checkpoint: Checkpoint, batch_size: int = INGEST_BATCH_SIZE,
+                 concurrency: int = INGEST_EMBED_CONCURRENCY, embed: bool = True,
+                 pinecone: bool = True, es_vectors: bool = False):
+        self.index_name = index_name
+        self.text_field = INDEX_PROFILES[index_name]["text_field"]
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.embed = embed and self.text_field is not None
+        self.pinecone_index = INDEX_GETTERS[index_name]() if pinecone and self.embed and index_name in INDEX_GETTERS else None
+        self.es_vectors = es_vectors
+
+        self.documents = 0
+        self.records = 0
+        self.failed = 0
+        self.failed_ids: Set[str] = set()
+        self.start_time = time.time()
+        self._last_report = self.start_time
+
+    def run(self, documents: Iterator[Tuple[str, int, List[Dict[str, Any]]]]):
+        """Write the records of each (path, line number, records) source document."""
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ingest-embed")
+        pending: Deque[Tuple[List[Dict[str, Any]], List[Tuple[str, int]], Future]] = deque()
+        batch: List[Dict[str, Any]] = []
+        positions: List[Tuple[str, int]] = []
+
+        def submit():
+            future = executor.submit(self._embed_batch, list(batch))
+            pending.append((list(batch), list(positions), future))
+            batch.clear()
+            positions.clear()
+            while len(pending) >= self.concurrency * 2:
+                self._write(*pending.popleft())
+
+        try:
+            for path, line_number, records in documents:
+                batch.extend(records)
+                positions.append((path, line_number))
+                self.documents += 1
+                if len(batch) >= self.batch_size:
+                    submit()
+            if batch or positions:
+                submit()
+            while pending:
+                self._write(*pending.popleft())
+        finally:
+            executor.shutdown(wait=True)
+        self._report(final=True)
+
+    def _embed_batch(self, records: List[Dict[str, Any]]) -> Optional[List[List[float]]]:
+        if not self.embed or not records:
+            return None
+        embeddings = []
+        # The embedding API caps the number of inputs per request
+        for i in range(0, len(records), 100):
+            texts = [record["source"].get(self.text_field) or "" for record in records[i:i + 100]]
+            embeddings.extend(embed_texts(texts))
+        return embeddings
+
+    def _write(self, records: List[Dict[str, Any]], positions: List[Tuple[str, int]], future: Future):
+        embeddings = future.result()
+
+        actions = []
+        for i, record in enumerate(records):
+            source = record["source"]
+            if self.es_vectors and embeddings is not None:
+                source = {**source, EMBEDDING_FIELD: embeddings[i]}
+            actions.append({"index": {"_index": self.index_name, "_id": record["id"]}})
+            actions.append(source)
+        result = bulk(actions)
+        self.failed += len(result["errors"])
+        self.failed_ids.update(error["id"] for error in result["errors"])
+        for error in result["errors"][:3]:
+            logger.warning("Bulk item failed", index=self.index_name, id=error["id"], error=str(error["error"]))
+
+        if self.pinecone_index is not None and embeddings is not None:
+            vectors = [
+                {"id": record["id"], "values": embedding, "metadata": self._pinecone_metadata(record["source"])}
+                for record, embedding in zip(records, embeddings)
+            ]
+            for i in range(0, len(vectors), 100):
+                self.pinecone_index.upsert(vectors=vectors[i:i + 100])
+
+        self.records += len(records)
+        if positions and not self.failed:
+            path, line_number = positions[-1]
+            self.checkpoint.mark(path, line_number)
+        elif positions and result["errors"]:
+            logger.warning("Checkpoint held back after failed bulk items", index=self.index_name,
+                           failed=len(result["errors"]))
+        self._report()
+
+    def _pinecone_metadata(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        # Pinecone metadata only holds strings, numbers, booleans and string lists
+        metadata = {}
+        for key, value in source.items():
+            if isinstance(value, (str, int, float, bool)):
+                metadata[key] = value
+            elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+                metadata[key] = value
+        text = metadata.get(self.text_field)
+        if isinstance(text, str) and len(text) > PINECONE_METADATA_TEXT_LIMIT:
+            metadata[self.text_field] = text[:PINECONE_METADATA_TEXT_LIMIT]
+        return metadata
+
+    def _report(self, final: bool = False):
+        now = time.time()
+        if not final and now - self._last_report < 10:
+            return
+        self._last_report = now
+        elapsed = max(now - self.start_time, 1e-6)
+        logger.info(
+            "Ingest complete" if final else "Ingest progress",
+            index=self.index_name,
+            documents=self.documents,
+            records=self.records,
+            failed=self.failed,
+            records_per_s=round(self.records / elapsed, 1),
+            elapsed_s=int(elapsed),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index legal documents into Elasticsearch and Pinecone")
+    parser.add_argument("index", choices=sorted(INDEX_PROFILES), help="Target ES index")
+    parser.add_argument("sources", nargs="+", help="JSONL files or globs of {\"id\", \"source\"} records")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resuming an interrupted run")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Records per embedding/bulk batch")
+    parser.add_argument("--concurrency", type=int, default=INGEST_EMBED_CONCURRENCY, help="Concurrent embedding requests")
+    parser.add_argument("--no-embed", action="store_true", help="Only write text to ES")
+    parser.add_argument("--no-pinecone", action="store_true", help="Skip the Pinecone upsert")
+    parser.add_argument("--es-vectors", action="store_true", help="Also store embeddings in ES for hybrid search")
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+    source_paths = sorted({path for pattern in args.sources for path in glob.glob(pattern)})
+    checkpoint = Checkpoint(args.checkpoint)
+    pipeline = IngestPipeline(
+        args.index,
+        checkpoint,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        embed=not args.no_embed,
+        pinecone=not args.no_pinecone,
+        es_vectors=args.es_vectors,
+    )
+    pipeline.run(
+        (path, line_number, to_records(args.index, document))
+        for path, line_number, document in read_source_documents(source_paths, checkpoint)
+    )
@@ -0,0 +1,73 @@
+import re
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Headings stand on their own line; inline references ("dimaksud dalam Pasal 5") do not match
+PASAL_HEADING = re.compile(r"^[ \t]*Pasal[ \t]+(\d+[A-Z]?)[ \t]*$", re.MULTILINE)
+BAB_HEADING = re.compile(r"^[ \t]*BAB[ \t]+([IVXLCDM]+)[ \t]*$", re.MULTILINE)
+PENJELASAN_HEADING = re.compile(r"^[ \t]*PENJELASAN\b.*$", re.MULTILINE)
+
+PREAMBLE_ID = "Pembukaan"
+
+
+def _sections(text: str) -> List[Tuple[str, str, int]]:
+    """Return (pasal number, body, start offset) for every pasal heading in the text."""
+    headings = list(PASAL_HEADING.finditer(text))
+    sections = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        sections.append((heading.group(1), text[heading.end():end].strip(), heading.start()))
+    return sections
+
+
+def _bab_at(babs: List[Tuple[int, str]], offset: int) -> str:
+    current = ""
+    for start, name in babs:
+        if start > offset:
+            break
+        current = name
+    return current
+
+
+def split_pasal(text: str) -> Iterator[Dict[str, Any]]:
+    """
+    Split the full text of a regulation into pasal-level records.
+
+    The body before the first pasal (Menimbang/Mengingat) becomes a `Pembukaan`
+    record, and a trailing PENJELASAN section is matched back to its pasal.
+
+    Args:
+        text: Full regulation text
+
+    Yields:
+        Dictionaries with pasal number, bab, text and penjelasan
+    """
+    explanation_match = PENJELASAN_HEADING.search(text)
+    body = text[:explanation_match.start()] if explanation_match else text
+    explanations = {}
+    if explanation_match:
+        for number, explanation, _ in _sections(text[explanation_match.end():]):
+            explanations[number] = explanation
+
+    sections = _sections(body)
+    if not sections:
+        if body.strip():
+            yield {"number": PREAMBLE_ID, "pasal": PREAMBLE_ID, "bab": "", "text": body.strip(), "penjelasan": ""}
+        return
+
+    preamble = body[:sections[0][2]].strip()
+    if preamble:
+        yield {"number": PREAMBLE_ID, "pasal": PREAMBLE_ID, "bab": "", "text": preamble, "penjelasan": ""}
+
+    babs = [(m.start(), f"BAB {m.group(1)}") for m in BAB_HEADING.finditer(body)]
+    for number, section, start in sections:
+        # Drop a trailing BAB heading that belongs to the next pasal
+        next_bab = BAB_HEADING.search(section)
+        if next_bab:
+            section = section[:next_bab.start()].strip()
+        yield {
+            "number": number,
+            "pasal": f"Pasal {number}",
+            "bab": _bab_at(babs, start),
+            "text": section,
+            "penjelasan": explanations.get(number, ""),
+        }
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import aio_pika
+from dotenv import load_dotenv
+
+from src.common.pinecone_client import INDEX_GETTERS
+from src.indexing.es_io import bulk
+from src.indexing.ingest import (
+    INDEX_PROFILES,
+    INGEST_BATCH_SIZE,
+    INGEST_EMBED_CONCURRENCY,
+    Checkpoint,
+    IngestPipeline,
+    read_source_documents,
+    to_records,
+)
+from src.utils.cache import CORPUS_UPDATES_EXCHANGE
+from src.utils.logger import HermesLogger, setup_logging
+
+load_dotenv()
+
+logger = HermesLogger("corpus_sync")
+
+
+def content_hash(value: Any) -> str:
+    """md5 of the canonical JSON form, so key order does not count as a change."""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """Content hashes of every synced document and of each of its records.
+
+    Stored as `{"documents": {doc_id: {"hash": ..., "records": {record_id: hash}}}}`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.documents = json.load(f).get("documents", {})
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"documents": self.documents}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class SyncPlan:
+    """Diff of the source export against the manifest, filled while streaming."""
+
+    def __init__(self, index_name: str, manifest: Manifest):
+        self.index_name = index_name
+        self.manifest = manifest
+        self.seen: set = set()
+        self.updated: Dict[str, Dict[str, Any]] = {}
+        self.stale_records: List[str] = []
+        self.unchanged_documents = 0
+        self.changed_records = 0
+
+    def changed(self, documents: Iterator[Tuple[str, int, Dict[str, Any]]]) -> Iterator[Tuple[str, int, List[Dict[str, Any]]]]:
+        """Yield only the new or modified records of each new or modified document."""
+        for path, line_number, document in documents:
+            document_id = document["id"]
+            self.seen.add(document_id)
+            document_hash = content_hash(document.get("source", {}))
+            previous = self.manifest.documents.get(document_id)
+            if previous and previous["hash"] == document_hash:
+                self.unchanged_documents += 1
+                continue
+
+            records = to_records(self.index_name, document)
+            record_hashes = {record["id"]: content_hash(record["source"]) for record in records}
+            previous_records = previous["records"] if previous else {}
+            self.stale_records.extend(record_id for record_id in previous_records if record_id not in record_hashes)
+            changed = [record for record in records if previous_records.get(record["id"]) != record_hashes[record["id"]]]
+            self.changed_records += len(changed)
+            self.updated[document_id] = {"hash": document_hash, "records": record_hashes}
+            yield path, line_number, changed
+
+    @property
+    def revoked(self) -> List[str]:
+        """Documents in the manifest that are no longer in the source export."""
+        return [document_id for document_id in self.manifest.documents if document_id not in self.seen]
+
+
+def delete_records(index_name: str, record_ids: List[str], pinecone: bool = True):
+    """Remove records from ES and, when the index has one, from Pinecone."""
+    for i in range(0, len(record_ids), 500):
+        chunk = record_ids[i:i + 500]
+        # Already-missing records come back as `not_found` without an error
+        result = bulk([{"delete": {"_index": index_name, "_id": record_id}} for record_id in chunk])
+        if result["errors"]:
+            logger.warning("Some deletions failed", index=index_name, failed=len(result["errors"]))
+
+    if pinecone and index_name in INDEX_GETTERS and INDEX_PROFILES[index_name]["text_field"]:
+        pinecone_index = INDEX_GETTERS[index_name]()
+        for i in range(0, len(record_ids), 1000):
+            pinecone_index.delete(ids=record_ids[i:i + 1000])
+
+
+async def publish_corpus_update(index_name: str, document_ids: List[str]):
+    """Tell every hermes process which cache entries the sync made stale."""
+    conn = await aio_pika.connect_robust(
+        host=os.getenv("RABBITMQ_HOST", "localhost"),
+        login=os.getenv("RABBITMQ_USER"),
+        password=os.getenv("RABBITMQ_PASS"),
+    )
+    try:
+        channel = await conn.channel()
+        exchange = await channel.declare_exchange(CORPUS_UPDATES_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True)
+        await exchange.publish(
+            aio_pika.Message(body=json.dumps({"index": index_name, "ids": document_ids}).encode("utf-8")),
+            routing_key="",
+        )
+    finally:
+        await conn.close()
+
+
+def sync_index(index_name: str, source_paths: List[str], manifest_path: str, batch_size: int = INGEST_BATCH_SIZE,
+               concurrency: int = INGEST_EMBED_CONCURRENCY, pinecone: bool = True, es_vectors: bool = False,
+               publish: bool = True, delete_revoked: bool = True) -> Dict[str, int]:
+    """
+    Bring an index in line with a source export, touching only what changed.
+
+    Args:
+        index_name: Target ES index
+        source_paths: JSONL files of {"id", "source"} documents, the full current export
+        manifest_path: Manifest written by the previous sync
+        batch_size: Records per embedding/bulk batch
+        concurrency: Concurrent embedding requests
+        pinecone: Upsert and delete vectors in Pinecone
+        es_vectors: Also store embeddings in ES for hybrid search
+        publish: Broadcast the cache invalidation to running hermes processes
+        delete_revoked: Delete documents missing from the export
+
+    Returns:
+        Counts of changed, failed, unchanged and revoked documents and written/deleted records
+    """
+    start_time = time.time()
+    manifest = Manifest(manifest_path)
+    plan = SyncPlan(index_name, manifest)
+
+    pipeline = IngestPipeline(
+        index_name,
+        Checkpoint(None),
+        batch_size=batch_size,
+        concurrency=concurrency,
+        pinecone=pinecone,
+        es_vectors=es_vectors,
+    )
+    pipeline.run(plan.changed(read_source_documents(source_paths, Checkpoint(None))))
+
+    revoked = plan.revoked if delete_revoked else []
+    stale_records = list(plan.stale_records)
+    for document_id in revoked:
+        stale_records.extend(manifest.documents[document_id]["records"])
+    if stale_records:
+        delete_records(index_name, stale_records, pinecone=pinecone)
+
+    # Only record the new state once ES and Pinecone hold it; a failed run is redone next time.
+    # Documents with failed bulk items keep their old entry, so their records are retried.
+    failed_documents = {
+        document_id for document_id, entry in plan.updated.items()
+        if not pipeline.failed_ids.isdisjoint(entry["records"])
+    }
+    if failed_documents:
+        logger.warning("Documents with failed records left out of the manifest", index=index_name,
+                       documents=len(failed_documents))
+    manifest.documents.update(
+        (document_id, entry) for document_id, entry in plan.updated.items() if document_id not in failed_documents
+    )
+    for document_id in revoked:
+        del manifest.documents[document_id]
+    manifest.save()
+
+    touched = list(plan.updated) + revoked
+    if publish and touched:
+        try:
+            asyncio.run(publish_corpus_update(index_name, touched))
+        except Exception as e:
+            logger.warning("Failed to publish corpus update, caches expire by TTL", index=index_name, error=str(e))
+
+    summary = {
+        "changed_documents": len(plan.updated),
+        "failed_documents": len(failed_documents),
+        "unchanged_documents": plan.unchanged_documents,
+        "revoked_documents": len(revoked),
+        "written_records": plan.changed_records,
+        "deleted_records": len(stale_records),
+    }
+    logger.info("Sync complete", index=index_name, duration_ms=int((time.time() - start_time) * 1000), **summary)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally sync a legal index with a source export")
+    parser.add_argument("index", choices=sorted(INDEX_PROFILES), help="Target ES index")
+    parser.add_argument("sources", nargs="+", help="JSONL files or globs with the full current export")
+    parser.add_argument("--manifest", required=True, help="Manifest of content hashes from the previous sync")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Records per embedding/bulk batch")
+    parser.add_argument("--concurrency", type=int, default=INGEST_EMBED_CONCURRENCY, help="Concurrent embedding requests")
+    parser.add_argument("--no-pinecone", action="store_true", help="Skip Pinecone upserts and deletes")
+    parser.add_argument("--es-vectors", action="store_true", help="Also store embeddings in ES for hybrid search")
+    parser.add_argument("--no-publish", action="store_true", help="Do not broadcast cache invalidation")
+    parser.add_argument("--keep-revoked", action="store_true", help="Keep documents missing from the export")
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+    sync_index(
+        args.index,
+        sorted({path for pattern in args.sources for path in glob.glob(pattern)}),
+        args.manifest,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        pinecone=not args.no_pinecone,
+        es_vectors=args.es_vectors,
+        publish=not args.no_publish,
+        delete_revoked=not args.keep_revoked,
+    )
@@ -0,0 +1,149 @@
+import re
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Same defaults as the Elasticsearch BM25 similarity
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokenizer roughly matching the ES standard analyzer."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Compact in-memory BM25 index backed by NumPy arrays.
+
+    Postings are stored column-wise (one contiguous slice per term) and each
+    posting already carries its final BM25 weight, so scoring a query is a
+    handful of scatter-adds into a dense score vector.
+    """
+
+    def __init__(self, vocab: np.ndarray, term_offsets: np.ndarray, postings_docs: np.ndarray,
+                 postings_weight: np.ndarray, doc_count: int):
+        self.vocab = vocab
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_weight = postings_weight
+        self.doc_count = doc_count
+        self._term_ids = {term: i for i, term in enumerate(vocab.tolist())}
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = DEFAULT_K1, b: float = DEFAULT_B) -> "BM25Index":
+        """Build an index from an iterable of document texts.
+
+        Args:
+            texts: Document texts, in the order their results should be addressed
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            BM25Index: The built index
+        """
+        term_ids = {}
+        doc_terms = []
+        doc_lengths = []
+        for text in texts:
+            counts = {}
+            tokens = tokenize(text)
+            for token in tokens:
+                term_id = term_ids.setdefault(token, len(term_ids))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            doc_terms.append(counts)
+            doc_lengths.append(len(tokens))
+
+        doc_count = len(doc_terms)
+        vocab_size = len(term_ids)
+        doc_len = np.asarray(doc_lengths, dtype=np.float32)
+        avg_len = float(doc_len.mean()) if doc_count else 0.0
+
+        # Count document frequency per term, then lay postings out term by term
+        df = np.zeros(vocab_size, dtype=np.int64)
+        for counts in doc_terms:
+            for term_id in counts:
+                df[term_id] += 1
+        term_offsets = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(df, out=term_offsets[1:])
+
+        postings_docs = np.empty(int(term_offsets[-1]), dtype=np.int32)
+        postings_tf = np.empty(int(term_offsets[-1]), dtype=np.float32)
+        cursor = term_offsets[:-1].copy()
+        for doc_id, counts in enumerate(doc_terms):
+            for term_id, tf in counts.items():
+                pos = cursor[term_id]
+                postings_docs[pos] = doc_id
+                postings_tf[pos] = tf
+                cursor[term_id] += 1
+
+        # Lucene's BM25 idf, always positive
+        idf = np.log1p((doc_count - df + 0.5) / (df + 0.5)).astype(np.float32)
+        term_of_posting = np.repeat(np.arange(vocab_size, dtype=np.int32), df)
+        if avg_len > 0:
+            norm = k1 * (1 - b + b * doc_len[postings_docs] / avg_len)
+        else:
+            norm = np.full(len(postings_docs), k1, dtype=np.float32)
+        postings_weight = (idf[term_of_posting] * postings_tf * (k1 + 1) / (postings_tf + norm)).astype(np.float32)
+
+        vocab = np.empty(vocab_size, dtype=object)
+        for term, term_id in term_ids.items():
+            vocab[term_id] = term
+        return cls(vocab.astype(str), term_offsets, postings_docs, postings_weight, doc_count)
+
+    def search(self, queries: List[str], size: int = 10) -> List[Tuple[int, float]]:
+        """Score documents against one or more query texts.
+
+        Each query behaves like a `match` clause inside a `bool.should`, so the
+        scores of all queries are summed per document.
+
+        Args:
+            queries: Query texts
+            size: Maximum number of results
+
+        Returns:
+            List of (document position, score) tuples, best first
+        """
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for query in queries:
+            for token in tokenize(query):
+                term_id = self._term_ids.get(token)
+                if term_id is None:
+                    continue
+                start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+                # A term's postings never repeat a document, so plain fancy indexing is safe
+                scores[self.postings_docs[start:end]] += self.postings_weight[start:end]
+
+        matched = np.flatnonzero(scores)
+        if len(matched) == 0:
+            return []
+        if len(matched) > size:
+            top = np.argpartition(-scores[matched], size - 1)[:size]
+            matched = matched[top]
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(i), float(scores[i])) for i in order]
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            vocab=self.vocab,
+            term_offsets=self.term_offsets,
+            postings_docs=self.postings_docs,
+            postings_weight=self.postings_weight,
+            doc_count=np.asarray(self.doc_count, dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["vocab"],
+                data["term_offsets"],
+                data["postings_docs"],
+                data["postings_weight"],
+                int(data["doc_count"]),
+            )
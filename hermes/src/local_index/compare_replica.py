@@ -0,0 +1,98 @@
+import argparse
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from src.common.pinecone_client import INDEX_GETTERS
+from src.utils.logger import setup_logging
+from .replica import LOCAL_REPLICA_DIR, LocalReplica
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def sample_query_vectors(replica: LocalReplica, count: int, seed: int = 0) -> List[List[float]]:
+    """Use stored vectors (de-quantized) as queries when no questions are given."""
+    rng = np.random.default_rng(seed)
+    ann = replica.ann
+    slots = rng.choice(len(ann), size=min(count, len(ann)), replace=False)
+    vectors = []
+    for slot in slots:
+        vector = np.asarray(ann.codes[slot], dtype=np.float32)
+        if ann.quantized:
+            vector = vector * ann.scales[slot]
+        vectors.append(vector.tolist())
+    return vectors
+
+
+def compare(index_name: str, queries: List[List[float]], top_k: int, nprobes: List[int],
+            replica_dir: str = LOCAL_REPLICA_DIR) -> Dict[str, Dict[str, float]]:
+    """Measure replica recall@k against Pinecone and latency of both backends.
+
+    Returns:
+        Mapping of backend label to recall and latency percentiles (ms)
+    """
+    replica = LocalReplica(index_name, os.path.join(replica_dir, index_name))
+    pinecone_index = INDEX_GETTERS[index_name]()
+
+    truth = []
+    pinecone_ms = []
+    for vector in queries:
+        start = time.perf_counter()
+        response = pinecone_index.query(vector=vector, top_k=top_k, include_values=False, include_metadata=False)
+        pinecone_ms.append((time.perf_counter() - start) * 1000)
+        truth.append({match.id for match in response.matches})
+
+    report = {
+        "pinecone": {
+            "recall": 1.0,
+            "p50_ms": _percentile(pinecone_ms, 50),
+            "p95_ms": _percentile(pinecone_ms, 95),
+        }
+    }
+    for nprobe in nprobes:
+        recalls = []
+        replica_ms = []
+        for vector, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = replica.query(vector, top_k=top_k, include_metadata=False, nprobe=nprobe)
+            replica_ms.append((time.perf_counter() - start) * 1000)
+            found = {match["id"] for match in result["matches"]}
+            recalls.append(len(found & expected) / len(expected) if expected else 1.0)
+        report[f"replica nprobe={nprobe}"] = {
+            "recall": float(np.mean(recalls)) if recalls else 0.0,
+            "p50_ms": _percentile(replica_ms, 50),
+            "p95_ms": _percentile(replica_ms, 95),
+        }
+    replica.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare local replica recall/latency against Pinecone")
+    parser.add_argument("index", help="Corpus name: undang-undang, kuhper, perpres, kuhp")
+    parser.add_argument("--questions", help="Text file with one question per line (embedded with Gemini)")
+    parser.add_argument("--sample", type=int, default=100, help="Stored vectors to use as queries without --questions")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--replica-dir", default=LOCAL_REPLICA_DIR)
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "WARNING"))
+    if args.questions:
+        from src.utils.embedding_helper import batch_embed_queries
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        query_vectors = batch_embed_queries(questions)
+    else:
+        replica = LocalReplica(args.index, os.path.join(args.replica_dir, args.index))
+        query_vectors = sample_query_vectors(replica, args.sample)
+        replica.close()
+
+    results = compare(args.index, query_vectors, args.top_k, args.nprobe, args.replica_dir)
+    print(f"{'backend':<24}{'recall@' + str(args.top_k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, row in results.items():
+        print(f"{label:<24}{row['recall']:>12.3f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}")
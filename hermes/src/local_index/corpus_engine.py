@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils.logger import HermesLogger
+from .bm25 import BM25Index
+
+load_dotenv()
+
+logger = HermesLogger("local_engine")
+
+LOCAL_CORPUS_DIR = os.getenv("LOCAL_CORPUS_DIR", "data/local_corpus")
+
+# Comma separated list of ES index names served in-process, e.g. "kuhper,kuhp"
+LOCAL_CORPUS_INDICES = [
+    name.strip() for name in os.getenv("LOCAL_CORPUS_INDICES", "").split(",") if name.strip()
+]
+
+# Field holding the article text in each single-code index
+LOCAL_CORPUS_TEXT_FIELDS = {
+    "kuhper": "content",
+    "kuhp": "content",
+}
+
+# Fields looked up by exact value instead of scored as text, e.g. {"match": {"_id": "2"}} for a pasal
+EXACT_FIELDS = ("_id", "pasal")
+
+# Clauses BM25 cannot reproduce; queries using them are sent to Elasticsearch
+UNSUPPORTED_CLAUSES = ("filter", "must_not", "range", "prefix", "wildcard", "regexp", "fuzzy", "nested")
+# Clauses are scored like a `bool.should`, so a `must` that combines several, e.g. text plus a pasal, goes to
+# Elasticsearch; otherwise unrelated BM25 hits would follow the exact ones
+MAX_MUST_CLAUSES = 1
+
+ARTICLES_FILE = "articles.jsonl"
+BM25_FILE = "bm25.npz"
+VECTORS_FILE = "vectors.npy"
+VECTOR_METADATA_FILE = "vector_metadata.jsonl"
+
+
+class LocalCorpusEngine:
+    """In-process BM25 + cosine search over a small, fixed corpus.
+
+    Loads a snapshot written by `src.local_index.snapshot` and answers the same
+    questions the ES and Pinecone round trips would: lexical hits come back in
+    the `*_document_search` shape and dense matches in Pinecone's response shape.
+    """
+
+    def __init__(self, index_name: str, directory: str):
+        self.index_name = index_name
+        self.directory = directory
+
+        self.articles = _read_jsonl(os.path.join(directory, ARTICLES_FILE))
+        bm25_path = os.path.join(directory, BM25_FILE)
+        if os.path.exists(bm25_path):
+            self.bm25 = BM25Index.load(bm25_path)
+        else:
+            text_field = LOCAL_CORPUS_TEXT_FIELDS.get(index_name, "content")
+            self.bm25 = BM25Index.build(
+                (article.get("source", {}).get(text_field) or "") for article in self.articles
+            )
+
+        self._exact: Dict[Tuple[str, str], List[int]] = {}
+        for position, article in enumerate(self.articles):
+            source = article.get("source", {})
+            for field in EXACT_FIELDS:
+                value = article.get("id") if field == "_id" else source.get(field)
+                if value is not None:
+                    self._exact.setdefault((field, _normalize(value)), []).append(position)
+
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        if os.path.exists(vectors_path):
+            vectors = np.load(vectors_path).astype(np.float32, copy=False)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.vectors = vectors / norms
+            self.vector_metadata = _read_jsonl(os.path.join(directory, VECTOR_METADATA_FILE))
+        else:
+            self.vectors = None
+            self.vector_metadata = []
+
+    @property
+    def has_vectors(self) -> bool:
+        return self.vectors is not None and len(self.vectors) > 0
+
+    def document_search(self, queries: List[str], size: int = 10,
+                        exact: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """Lexical search shaped like `kuhper_document_search` hits.
+
+        Args:
+            queries: Query texts, scored like a `bool.should` of `match` clauses
+            size: Maximum number of hits
+            exact: Values per `EXACT_FIELDS` field; matching articles rank first,
+                like the boosted `_id`/`pasal` clauses the search prompts generate
+
+        Returns:
+            List of hits with score, id and source
+        """
+        exact_positions = []
+        for field, values in (exact or {}).items():
+            for value in values:
+                for position in self._exact.get((field, _normalize(value)), []):
+                    if position not in exact_positions:
+                        exact_positions.append(position)
+
+        ranked = self.bm25.search(queries, size + len(exact_positions))
+        top_score = ranked[0][1] if ranked else 0.0
+        ranked = [(position, top_score + 1.0) for position in exact_positions] + [
+            (position, score) for position, score in ranked if position not in exact_positions
+        ]
+        return [
+            {
+                "score": score,
+                "id": self.articles[position].get("id"),
+                "source": self.articles[position].get("source", {}),
+            }
+            for position, score in ranked[:size]
+        ]
+
+    def dense_search(self, embedding, top_k: int = 10) -> Dict[str, Any]:
+        """Cosine search shaped like a Pinecone `QueryResponse.to_dict()`.
+
+        Args:
+            embedding: Query embedding vector
+            top_k: Number of matches to return
+
+        Returns:
+            Dictionary with matches, namespace and usage
+        """
+        if not self.has_vectors:
+            return {"matches": [], "namespace": "", "usage": {"read_units": 0}}
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        scores = self.vectors @ query
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        matches = []
+        for position in top:
+            record = self.vector_metadata[position]
+            matches.append({
+                "id": record.get("id"),
+                "score": float(scores[position]),
+                "metadata": dict(record.get("metadata") or {}),
+            })
+        return {"matches": matches, "namespace": "", "usage": {"read_units": 0}}
+
+
+_engines: Dict[str, Optional[LocalCorpusEngine]] = {}
+_engines_lock = threading.Lock()
+
+
+def get_local_engine(index_name: str) -> Optional[LocalCorpusEngine]:
+    """Return the in-process engine for an index, or None when it is not enabled.
+
+    A snapshot that fails to load disables the engine for that index and the
+    callers keep using Elasticsearch and Pinecone.
+    """
+    if index_name not in LOCAL_CORPUS_INDICES:
+        return None
+
+    engine = _engines.get(index_name)
+    if engine is not None or index_name in _engines:
+        return engine
+
+    with _engines_lock:
+        if index_name in _engines:
+            return _engines[index_name]
+        directory = os.path.join(LOCAL_CORPUS_DIR, index_name)
+        try:
+            engine = LocalCorpusEngine(index_name, directory)
+            logger.info(
+                "Local corpus loaded",
+                index=index_name,
+                articles=len(engine.articles),
+                vectors=len(engine.vector_metadata),
+            )
+        except Exception as e:
+            logger.error("Failed to load local corpus, using remote search", index=index_name, error=str(e))
+            engine = None
+        _engines[index_name] = engine
+        return engine
+
+
+def preload_local_engines():
+    """Load every configured snapshot so the first query does not pay for it."""
+    for index_name in LOCAL_CORPUS_INDICES:
+        get_local_engine(index_name)
+
+
+def parse_query(query: Dict[str, Any]) -> Optional[Tuple[List[str], Dict[str, List[str]]]]:
+    """Split an ES query into BM25 texts and exact `_id`/`pasal` lookups.
+
+    Returns:
+        (texts, exact values per field), or None when the query uses clauses
+        the local engine cannot answer and Elasticsearch should run it
+    """
+    texts: List[str] = []
+    exact: Dict[str, List[str]] = {}
+    supported = True
+
+    def visit(obj):
+        nonlocal supported
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if key in UNSUPPORTED_CLAUSES:
+                    supported = False
+                elif key == "must" and isinstance(value, list) and len(value) > MAX_MUST_CLAUSES:
+                    supported = False
+                elif key in ["match", "match_phrase", "term", "terms"] and isinstance(value, dict):
+                    for field, field_value in value.items():
+                        field = field.removesuffix(".keyword")
+                        if field in EXACT_FIELDS:
+                            exact.setdefault(field, []).extend(_clause_values(field_value))
+                        elif key in ["term", "terms"]:
+                            supported = False
+                        else:
+                            texts.extend(_clause_values(field_value))
+                elif key == "ids" and isinstance(value, dict):
+                    exact.setdefault("_id", []).extend(str(v) for v in value.get("values", []))
+                elif key in ["multi_match", "query_string"] and isinstance(value, dict):
+                    if isinstance(value.get("query"), str):
+                        texts.append(value["query"])
+                else:
+                    visit(value)
+        elif isinstance(obj, list):
+            for item in obj:
+                visit(item)
+
+    visit(query)
+    return (texts, exact) if supported else None
+
+
+def _clause_values(value: Any) -> List[str]:
+    if isinstance(value, dict):
+        value = value.get("query", value.get("value"))
+    if isinstance(value, list):
+        return [str(item) for item in value if isinstance(item, (str, int))]
+    return [str(value)] if isinstance(value, (str, int)) else []
+
+
+def _normalize(value: Any) -> str:
+    return " ".join(str(value).lower().split())
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,182 @@
+import json
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+CENTROIDS_FILE = "centroids.npy"
+LIST_OFFSETS_FILE = "list_offsets.npy"
+LIST_POSITIONS_FILE = "list_positions.npy"
+CODES_FILE = "codes.npy"
+SCALES_FILE = "scales.npy"
+IVF_INFO_FILE = "ivf.json"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def train_centroids(vectors: np.ndarray, n_lists: int, iterations: int = 20,
+                    sample_size: int = 50000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of the (normalized) vectors."""
+    rng = np.random.default_rng(seed)
+    count = len(vectors)
+    sample = vectors[rng.choice(count, size=min(sample_size, count), replace=False)]
+    sample = normalize_rows(sample)
+    n_lists = min(n_lists, len(sample))
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for list_id in range(n_lists):
+            members = sample[assignment == list_id]
+            if len(members):
+                centroids[list_id] = members.mean(axis=0)
+            else:
+                # Re-seed empty lists so every list stays useful
+                centroids[list_id] = sample[rng.integers(len(sample))]
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+class IVFFlatIndex:
+    """Inverted-file index with flat (exhaustive) scan inside each probed list.
+
+    Vectors are normalized for cosine similarity and stored grouped by list, as
+    int8 codes with a per-vector scale or as raw float32. All arrays are plain
+    `.npy` files so the replica can be memory-mapped instead of read into RAM.
+    """
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_positions: np.ndarray,
+                 codes: np.ndarray, scales: np.ndarray = None, nprobe: int = 8):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_positions = list_positions
+        self.codes = codes
+        self.scales = scales
+        self.nprobe = nprobe
+
+    @property
+    def quantized(self) -> bool:
+        return self.scales is not None
+
+    def __len__(self) -> int:
+        return len(self.list_positions)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: int = None, quantization: str = "int8",
+              chunk_size: int = 20000) -> "IVFFlatIndex":
+        """Train centroids, assign every vector to a list and encode it.
+
+        Args:
+            vectors: (n, dim) array, may itself be a memmap
+            n_lists: Number of inverted lists, defaults to ~sqrt(n)
+            quantization: "int8" or "float32"
+            chunk_size: Vectors processed per assignment step
+
+        Returns:
+            IVFFlatIndex: The built index
+        """
+        count, dim = vectors.shape
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(count)))
+        centroids = train_centroids(vectors, n_lists)
+
+        assignment = np.empty(count, dtype=np.int32)
+        for start in range(0, count, chunk_size):
+            chunk = normalize_rows(vectors[start:start + chunk_size])
+            assignment[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+
+        list_positions = np.argsort(assignment, kind="stable").astype(np.int32)
+        list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=list_offsets[1:])
+
+        if quantization == "int8":
+            codes = np.empty((count, dim), dtype=np.int8)
+            scales = np.empty(count, dtype=np.float32)
+        else:
+            codes = np.empty((count, dim), dtype=np.float32)
+            scales = None
+
+        for start in range(0, count, chunk_size):
+            positions = list_positions[start:start + chunk_size]
+            chunk = normalize_rows(vectors[np.sort(positions)])[np.argsort(np.argsort(positions))]
+            if scales is None:
+                codes[start:start + len(positions)] = chunk
+            else:
+                chunk_scales = np.abs(chunk).max(axis=1) / 127.0
+                chunk_scales[chunk_scales == 0] = 1.0
+                codes[start:start + len(positions)] = np.round(chunk / chunk_scales[:, None]).astype(np.int8)
+                scales[start:start + len(positions)] = chunk_scales
+
+        return cls(centroids, list_offsets, list_positions, codes, scales)
+
+    def search(self, query, top_k: int = 10, nprobe: int = None) -> List[Tuple[int, float]]:
+        """Approximate cosine search.
+
+        Args:
+            query: Query vector
+            top_k: Number of results
+            nprobe: Lists to scan, defaults to the index setting
+
+        Returns:
+            List of (original vector position, score) tuples, best first
+        """
+        query = normalize_rows(np.asarray(query, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        candidate_slots = []
+        candidate_scores = []
+        for list_id in probe:
+            start, end = int(self.list_offsets[list_id]), int(self.list_offsets[list_id + 1])
+            if start == end:
+                continue
+            block = self.codes[start:end]
+            if self.quantized:
+                scores = (block.astype(np.float32) @ query) * self.scales[start:end]
+            else:
+                scores = block @ query
+            candidate_slots.append(np.arange(start, end))
+            candidate_scores.append(scores)
+
+        if not candidate_scores:
+            return []
+        slots = np.concatenate(candidate_slots)
+        scores = np.concatenate(candidate_scores)
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.list_positions[slots[i]]), float(scores[i])) for i in top]
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, CENTROIDS_FILE), self.centroids)
+        np.save(os.path.join(directory, LIST_OFFSETS_FILE), self.list_offsets)
+        np.save(os.path.join(directory, LIST_POSITIONS_FILE), self.list_positions)
+        np.save(os.path.join(directory, CODES_FILE), self.codes)
+        if self.scales is not None:
+            np.save(os.path.join(directory, SCALES_FILE), self.scales)
+        with open(os.path.join(directory, IVF_INFO_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "count": len(self),
+                "dim": int(self.codes.shape[1]) if len(self) else 0,
+                "n_lists": len(self.centroids),
+                "quantization": "int8" if self.quantized else "float32",
+            }, f)
+
+    @classmethod
+    def load(cls, directory: str, nprobe: int = 8, mmap: bool = True) -> "IVFFlatIndex":
+        mmap_mode = "r" if mmap else None
+        scales_path = os.path.join(directory, SCALES_FILE)
+        return cls(
+            np.load(os.path.join(directory, CENTROIDS_FILE)),
+            np.load(os.path.join(directory, LIST_OFFSETS_FILE)),
+            np.load(os.path.join(directory, LIST_POSITIONS_FILE), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, CODES_FILE), mmap_mode=mmap_mode),
+            np.load(scales_path, mmap_mode=mmap_mode) if os.path.exists(scales_path) else None,
+            nprobe=nprobe,
+        )
@@ -0,0 +1,134 @@
+import json
+import mmap
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils.logger import HermesLogger
+from .ivf import IVFFlatIndex
+
+load_dotenv()
+
+logger = HermesLogger("local_replica")
+
+LOCAL_REPLICA_DIR = os.getenv("LOCAL_REPLICA_DIR", "data/pinecone_replica")
+
+# Comma separated corpus names whose dense search is served from the local replica,
+# e.g. "undang-undang,kuhper,perpres,kuhp"
+LOCAL_REPLICA_INDICES = [
+    name.strip() for name in os.getenv("LOCAL_REPLICA_INDICES", "").split(",") if name.strip()
+]
+LOCAL_REPLICA_NPROBE = int(os.getenv("LOCAL_REPLICA_NPROBE", "8"))
+
+METADATA_FILE = "metadata.jsonl"
+METADATA_OFFSETS_FILE = "metadata_offsets.npy"
+
+
+class LocalReplica:
+    """Memory-mapped copy of one Pinecone index.
+
+    Vectors live in an `IVFFlatIndex`; ids and metadata live in a JSONL file
+    read through `mmap`, so only the matched records are ever parsed.
+    """
+
+    def __init__(self, index_name: str, directory: str, nprobe: int = LOCAL_REPLICA_NPROBE):
+        self.index_name = index_name
+        self.directory = directory
+        self.ann = IVFFlatIndex.load(directory, nprobe=nprobe)
+        self.metadata_offsets = np.load(os.path.join(directory, METADATA_OFFSETS_FILE))
+        self._metadata_file = open(os.path.join(directory, METADATA_FILE), "rb")
+        self._metadata = mmap.mmap(self._metadata_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.ann)
+
+    def record(self, position: int) -> Dict[str, Any]:
+        start = int(self.metadata_offsets[position])
+        end = int(self.metadata_offsets[position + 1])
+        return json.loads(self._metadata[start:end])
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = True, nprobe: int = None) -> Dict[str, Any]:
+        """Query the replica, returning a Pinecone `QueryResponse.to_dict()` shape.
+
+        Args:
+            vector: Query embedding
+            top_k: Number of matches to return
+            include_metadata: Whether to attach stored metadata to each match
+            nprobe: Lists to scan, overriding LOCAL_REPLICA_NPROBE
+
+        Returns:
+            Dictionary with matches, namespace and usage
+        """
+        matches = []
+        for position, score in self.ann.search(vector, top_k, nprobe):
+            record = self.record(position)
+            match = {"id": record.get("id"), "score": score}
+            if include_metadata:
+                match["metadata"] = dict(record.get("metadata") or {})
+            matches.append(match)
+        return {"matches": matches, "namespace": "", "usage": {"read_units": 0}}
+
+    def close(self):
+        self._metadata.close()
+        self._metadata_file.close()
+
+
+_replicas: Dict[str, Optional[LocalReplica]] = {}
+_replicas_lock = threading.Lock()
+
+
+def get_replica(index_name: str) -> Optional[LocalReplica]:
+    """Return the local replica for a corpus, or None when it is not enabled.
+
+    A replica that fails to load is disabled and callers keep using Pinecone.
+    """
+    if index_name not in LOCAL_REPLICA_INDICES:
+        return None
+
+    replica = _replicas.get(index_name)
+    if replica is not None or index_name in _replicas:
+        return replica
+
+    with _replicas_lock:
+        if index_name in _replicas:
+            return _replicas[index_name]
+        try:
+            replica = LocalReplica(index_name, os.path.join(LOCAL_REPLICA_DIR, index_name))
+            logger.info("Local replica loaded", index=index_name, vectors=len(replica))
+        except Exception as e:
+            logger.error("Failed to load local replica, using Pinecone", index=index_name, error=str(e))
+            replica = None
+        _replicas[index_name] = replica
+        return replica
+
+
+def preload_replicas():
+    for index_name in LOCAL_REPLICA_INDICES:
+        get_replica(index_name)
+
+
+class MetadataWriter:
+    """Stream id/metadata records to disk along with their byte offsets."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.offsets = [0]
+        self._file = open(os.path.join(directory, METADATA_FILE), "wb")
+
+    def write(self, vector_id: str, metadata: Dict[str, Any]):
+        line = json.dumps({"id": vector_id, "metadata": metadata}, ensure_ascii=False).encode("utf-8") + b"\n"
+        self._file.write(line)
+        self.offsets.append(self.offsets[-1] + len(line))
+
+    def close(self):
+        self._file.close()
+        np.save(os.path.join(self.directory, METADATA_OFFSETS_FILE), np.asarray(self.offsets, dtype=np.int64))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from src.common.pinecone_client import INDEX_GETTERS
+from src.indexing.es_io import scroll_index
+from src.utils.logger import HermesLogger, setup_logging
+from .bm25 import BM25Index
+from .corpus_engine import (
+    ARTICLES_FILE,
+    BM25_FILE,
+    LOCAL_CORPUS_DIR,
+    LOCAL_CORPUS_TEXT_FIELDS,
+    VECTOR_METADATA_FILE,
+    VECTORS_FILE,
+)
+
+logger = HermesLogger("local_snapshot")
+
+
+def export_pinecone_vectors(index_name: str, batch_size: int = 100) -> Iterator[Tuple[str, List[float], Dict[str, Any]]]:
+    """Yield (id, values, metadata) for every vector of a Pinecone index.
+
+    Uses `list` + `fetch`, which requires a serverless index.
+    """
+    index = INDEX_GETTERS[index_name]()
+    for ids in index.list(limit=batch_size):
+        if not ids:
+            continue
+        fetched = index.fetch(ids=list(ids))
+        for vector_id, vector in fetched.vectors.items():
+            yield vector_id, list(vector.values), dict(vector.metadata or {})
+
+
+def build_snapshot(index_name: str, out_dir: str, with_vectors: bool = True):
+    """Write the articles, BM25 arrays and vectors for one corpus to disk."""
+    directory = os.path.join(out_dir, index_name)
+    os.makedirs(directory, exist_ok=True)
+    text_field = LOCAL_CORPUS_TEXT_FIELDS.get(index_name, "content")
+
+    start_time = time.time()
+    texts = []
+    with open(os.path.join(directory, ARTICLES_FILE), "w", encoding="utf-8") as f:
+        for article in scroll_index(index_name):
+            f.write(json.dumps(article, ensure_ascii=False) + "\n")
+            texts.append(article["source"].get(text_field) or "")
+    BM25Index.build(texts).save(os.path.join(directory, BM25_FILE))
+    logger.info("Articles exported", index=index_name, articles=len(texts), duration_ms=int((time.time() - start_time) * 1000))
+
+    if not with_vectors:
+        return
+
+    start_time = time.time()
+    vectors = []
+    with open(os.path.join(directory, VECTOR_METADATA_FILE), "w", encoding="utf-8") as f:
+        for vector_id, values, metadata in export_pinecone_vectors(index_name):
+            f.write(json.dumps({"id": vector_id, "metadata": metadata}, ensure_ascii=False) + "\n")
+            vectors.append(np.asarray(values, dtype=np.float32))
+    if vectors:
+        np.save(os.path.join(directory, VECTORS_FILE), np.vstack(vectors))
+    logger.info("Vectors exported", index=index_name, vectors=len(vectors), duration_ms=int((time.time() - start_time) * 1000))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot a small legal corpus for in-process search")
+    parser.add_argument("indices", nargs="+", help="ES index names, e.g. kuhper kuhp")
+    parser.add_argument("--out", default=LOCAL_CORPUS_DIR, help="Snapshot root directory")
+    parser.add_argument("--no-vectors", action="store_true", help="Skip the Pinecone vector export")
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+    for name in args.indices:
+        build_snapshot(name, args.out, with_vectors=not args.no_vectors)
@@ -0,0 +1,77 @@
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+
+from src.utils.logger import HermesLogger, setup_logging
+from .ivf import IVFFlatIndex
+from .replica import LOCAL_REPLICA_DIR, MetadataWriter
+from .snapshot import export_pinecone_vectors
+
+logger = HermesLogger("replica_sync")
+
+RAW_VECTORS_FILE = "vectors.f32"
+
+
+def sync_index(index_name: str, out_dir: str, n_lists: int = None, quantization: str = "int8"):
+    """Export one Pinecone index and rebuild its local ANN replica.
+
+    Vectors are spooled to a raw float32 file and memory-mapped for the build,
+    so the export never needs the whole index in RAM. The replica is written to
+    a staging directory and swapped in once complete.
+    """
+    target = os.path.join(out_dir, index_name)
+    staging = target + ".staging"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    start_time = time.time()
+    count = 0
+    dim = None
+    raw_path = os.path.join(staging, RAW_VECTORS_FILE)
+    with open(raw_path, "wb") as raw, MetadataWriter(staging) as metadata:
+        for vector_id, values, vector_metadata in export_pinecone_vectors(index_name):
+            vector = np.asarray(values, dtype=np.float32)
+            if dim is None:
+                dim = len(vector)
+            raw.write(vector.tobytes())
+            metadata.write(vector_id, vector_metadata)
+            count += 1
+            if count % 10000 == 0:
+                logger.info("Export progress", index=index_name, vectors=count)
+
+    if count == 0:
+        shutil.rmtree(staging, ignore_errors=True)
+        logger.warning("Pinecone index is empty, replica not written", index=index_name)
+        return
+
+    export_ms = int((time.time() - start_time) * 1000)
+    vectors = np.memmap(raw_path, dtype=np.float32, mode="r", shape=(count, dim))
+    IVFFlatIndex.build(vectors, n_lists=n_lists, quantization=quantization).save(staging)
+    del vectors
+    os.remove(raw_path)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    logger.info(
+        "Replica synced",
+        index=index_name,
+        vectors=count,
+        export_ms=export_ms,
+        total_ms=int((time.time() - start_time) * 1000),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export Pinecone indexes into local memory-mapped ANN replicas")
+    parser.add_argument("indices", nargs="+", help="Corpus names: undang-undang, kuhper, perpres, kuhp")
+    parser.add_argument("--out", default=LOCAL_REPLICA_DIR, help="Replica root directory")
+    parser.add_argument("--lists", type=int, default=None, help="Number of IVF lists (default: sqrt(n))")
+    parser.add_argument("--quantization", choices=["int8", "float32"], default="int8")
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+    for name in args.indices:
+        sync_index(name, args.out, n_lists=args.lists, quantization=args.quantization)
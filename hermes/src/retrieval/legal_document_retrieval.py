@@ -3,5 +3,7 @@ from .retrieval_strategy import RetrievalStrategy
 from ..agents.search_agent import generate_and_execute_es_query
 
 class LegalDocumentRetrievalStrategy(RetrievalStrategy):
+    index_name = "peraturan_indonesia"
+
     def search(self, questions: List[str]) -> List[Dict[str, Any]]:
         return generate_and_execute_es_query(questions)
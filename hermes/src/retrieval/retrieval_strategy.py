@@ -1,7 +1,37 @@
+import copy
+import os
 from abc import ABC, abstractmethod
 from typing import Any, List, Dict
+from src.utils.cache import get_cache, index_tag
+
+# Identical question sets (retries, regenerations, popular questions) reuse the
+# result until it expires or the index is synced; off unless a TTL is set
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "0"))
+
+retrieval_cache = get_cache(
+    "retrieval",
+    maxsize=int(os.getenv("RETRIEVAL_CACHE_SIZE", "512")),
+    ttl=max(RETRIEVAL_CACHE_TTL, 1),
+)
 
 class RetrievalStrategy(ABC):
+    # ES index the strategy searches, used to tag cached results
+    index_name: str = ""
+
     @abstractmethod
     def search(self, questions: List[str]) -> List[Dict[str, Any]]:
         pass
+
+    def cached_search(self, questions: List[str]) -> List[Dict[str, Any]]:
+        if RETRIEVAL_CACHE_TTL <= 0 or not self.index_name:
+            return self.search(questions)
+
+        key = (self.index_name, tuple(questions))
+        cached = retrieval_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        documents = self.search(questions)
+        if documents:
+            retrieval_cache.set(key, copy.deepcopy(documents), tags=[index_tag(self.index_name)])
+        return documents
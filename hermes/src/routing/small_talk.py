@@ -0,0 +1,223 @@
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.local_index.bm25 import tokenize
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("small_talk")
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+SMALL_TALK_ROUTING = os.getenv("SMALL_TALK_ROUTING", "true").lower() == "true"
+SMALL_TALK_MODEL_PATH = os.getenv("SMALL_TALK_MODEL_PATH", os.path.join(DATA_DIR, "small_talk_model.npz"))
+# Probability the model must reach before a message skips the pipeline; tuned for precision
+SMALL_TALK_THRESHOLD = float(os.getenv("SMALL_TALK_THRESHOLD", "0.8"))
+# Longer messages almost always carry a real question
+SMALL_TALK_MAX_TOKENS = 8
+
+GREETING = "greeting"
+THANKS = "thanks"
+FAREWELL = "farewell"
+META = "meta"
+ACKNOWLEDGEMENT = "acknowledgement"
+
+REPLIES = {
+    GREETING: "Halo! Saya asisten hukum Lexin. Silakan ajukan pertanyaan seputar peraturan perundang-undangan Indonesia.",
+    THANKS: "Sama-sama! Jika ada pertanyaan hukum lain, silakan tanyakan kembali.",
+    FAREWELL: "Sampai jumpa! Silakan kembali kapan saja jika membutuhkan informasi hukum.",
+    META: (
+        "Saya asisten hukum Lexin. Saya dapat membantu mencari dan menjelaskan peraturan perundang-undangan "
+        "Indonesia, seperti KUHP, KUHPerdata, Undang-Undang, dan Peraturan Presiden, lengkap dengan rujukan "
+        "pasalnya. Silakan tuliskan pertanyaan hukum Anda."
+    ),
+    ACKNOWLEDGEMENT: "Baik. Silakan tuliskan pertanyaan hukum Anda jika ada yang ingin ditanyakan.",
+}
+
+# Any of these means the message needs retrieval, whatever the model says
+LEGAL_TERMS = {
+    "pasal", "ayat", "uu", "undang", "hukum", "hukuman", "kuhp", "kuhper", "kuhperdata", "perdata", "pidana",
+    "perpres", "peraturan", "perjanjian", "kontrak", "sanksi", "denda", "waris", "cerai", "perceraian", "gugat",
+    "gugatan", "pengadilan", "phk", "pesangon", "pajak", "tanah", "sertifikat", "kerja", "pekerja", "karyawan",
+    "nikah", "pernikahan", "laporan", "lapor", "polisi", "legal", "law", "penalty", "regulation", "court",
+}
+
+# Whole-message patterns that are small talk with certainty
+RULES = [
+    (GREETING, re.compile(
+        r"^(halo+|hal+o|hai+|hi+|hello|hey|p|permisi|assalamualaikum( wr wb)?|selamat (pagi|siang|sore|malam)|"
+        r"pagi|siang|sore|malam|good (morning|afternoon|evening))( (kak|min|bang|mas|mbak|semua|there))?$"
+    )),
+    (THANKS, re.compile(
+        r"^((oke?|ok|sip|baik|mantap) )?(terima ?kasih|makasih|thanks?|thank you|thx|tq)"
+        r"( (banyak|ya|kak|min|a lot|so much))*$"
+    )),
+    (FAREWELL, re.compile(r"^(bye( bye)?|dadah|sampai jumpa( lagi)?|selamat tinggal)$")),
+    (ACKNOWLEDGEMENT, re.compile(r"^(oke?|ok|oke siap|siap|baik(lah)?|noted|paham|oke paham|sip|tes( tes)?|test)$")),
+]
+
+# A marker followed by another word names the subject of a request ("bisa bantu soal warisan?")
+TOPIC_MARKERS = {"soal", "masalah", "tentang", "mengenai", "terkait", "perihal", "kasus", "urusan"}
+
+KIND_KEYWORDS = [
+    (THANKS, {"terima", "terimakasih", "makasih", "thanks", "thank", "thx", "tq"}),
+    (FAREWELL, {"bye", "dadah", "jumpa", "tinggal"}),
+    (GREETING, {"halo", "hai", "hi", "hello", "hey", "selamat", "assalamualaikum", "kabar", "permisi"}),
+    (META, {"kamu", "siapa", "bot", "robot", "chatbot", "aplikasi", "you", "who", "namamu"}),
+]
+
+
+def _features(tokens: List[str]) -> List[str]:
+    """Unigrams plus bigrams."""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _names_a_topic(tokens: List[str]) -> bool:
+    return any(token in TOPIC_MARKERS for token in tokens[:-1])
+
+
+class SmallTalkModel:
+    """TF-IDF + logistic regression over word uni/bigrams, stored as NumPy arrays.
+
+    `small_talk_words` holds every word seen in a small-talk training example;
+    the classifier only trusts the model on messages made of those words.
+    """
+
+    def __init__(self, vocab: np.ndarray, idf: np.ndarray, weights: np.ndarray, bias: float,
+                 small_talk_words: np.ndarray):
+        self.vocab = vocab
+        self.idf = idf
+        self.weights = weights
+        self.bias = float(bias)
+        self.small_talk_words = small_talk_words
+        self._index: Dict[str, int] = {term: i for i, term in enumerate(vocab.tolist())}
+        self._known = set(small_talk_words.tolist())
+
+    def knows(self, tokens: Sequence[str]) -> bool:
+        """Whether every token appeared in a small-talk training example."""
+        return self._known.issuperset(tokens)
+
+    def vectorize(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), len(self.vocab)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in _features(tokenize(text)):
+                column = self._index.get(feature)
+                if column is not None:
+                    matrix[row, column] += 1.0
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Probability that each text is small talk."""
+        return 1.0 / (1.0 + np.exp(-(self.vectorize(texts) @ self.weights + self.bias)))
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], labels: Sequence[int], epochs: int = 3000, learning_rate: float = 4.0,
+            l2: float = 1e-4) -> "SmallTalkModel":
+        """Batch gradient descent on the logistic loss; the data set is small enough for that."""
+        documents = [set(_features(tokenize(text))) for text in texts]
+        vocab = np.asarray(sorted(set().union(*documents)))
+        small_talk_words = np.asarray(sorted({
+            token for text, label in zip(texts, labels) if label for token in tokenize(text)
+        }))
+        index = {term: i for i, term in enumerate(vocab.tolist())}
+        df = np.zeros(len(vocab), dtype=np.float32)
+        for features in documents:
+            df[[index[feature] for feature in features]] += 1
+        idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+        model = cls(vocab, idf, np.zeros(len(vocab), dtype=np.float32), 0.0, small_talk_words)
+        x = model.vectorize(texts)
+        y = np.asarray(labels, dtype=np.float32)
+        for _ in range(epochs):
+            error = 1.0 / (1.0 + np.exp(-(x @ model.weights + model.bias))) - y
+            model.weights -= learning_rate * (x.T @ error / len(y) + l2 * model.weights)
+            model.bias -= learning_rate * float(error.mean())
+        return model
+
+    def save(self, path: str):
+        np.savez(path, vocab=self.vocab, idf=self.idf, weights=self.weights, bias=np.asarray(self.bias),
+                 small_talk_words=self.small_talk_words)
+
+    @classmethod
+    def load(cls, path: str) -> "SmallTalkModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["vocab"], data["idf"], data["weights"], float(data["bias"]), data["small_talk_words"])
+
+
+class SmallTalkRoute:
+    def __init__(self, kind: str, confidence: float, source: str):
+        self.kind = kind
+        self.confidence = confidence
+        self.source = source
+
+    @property
+    def reply(self) -> str:
+        return REPLIES[self.kind]
+
+
+class SmallTalkClassifier:
+    """Rules first, then the model, behind a legal-term and topic veto.
+
+    Only short messages without legal vocabulary or a "soal/masalah/tentang X"
+    topic can be routed, so a greeting followed by a question ("halo, saya mau
+    tanya soal pesangon") still goes through retrieval. The model only routes
+    messages made entirely of words from its small-talk examples: an unknown
+    word ("warisan", "utang", "KDRT") may be the subject of a question. Follow-ups only take the rules: mid-conversation,
+    "bisa diulang?" or "oke lanjut" ask about the previous answer, and the
+    model scores them without that context.
+    """
+
+    def __init__(self, model: Optional[SmallTalkModel] = None, threshold: float = SMALL_TALK_THRESHOLD):
+        self.model = model
+        self.threshold = threshold
+
+    def route(self, text: str, follow_up: bool = False) -> Optional[SmallTalkRoute]:
+        tokens = tokenize(text or "")
+        if (not tokens or len(tokens) > SMALL_TALK_MAX_TOKENS or LEGAL_TERMS.intersection(tokens)
+                or _names_a_topic(tokens)):
+            return None
+
+        normalized = " ".join(tokens)
+        for kind, pattern in RULES:
+            if pattern.match(normalized):
+                return SmallTalkRoute(kind, 1.0, "rule")
+
+        if self.model is None or follow_up or not self.model.knows(tokens):
+            return None
+        probability = float(self.model.predict_proba([normalized])[0])
+        if probability < self.threshold:
+            return None
+        for kind, keywords in KIND_KEYWORDS:
+            if keywords.intersection(tokens):
+                return SmallTalkRoute(kind, probability, "model")
+        return SmallTalkRoute(ACKNOWLEDGEMENT, probability, "model")
+
+
+_classifier: Optional[SmallTalkClassifier] = None
+
+
+def get_classifier() -> SmallTalkClassifier:
+    """Load the trained model once; without it only the rules apply."""
+    global _classifier
+    if _classifier is None:
+        model = None
+        if os.path.exists(SMALL_TALK_MODEL_PATH):
+            model = SmallTalkModel.load(SMALL_TALK_MODEL_PATH)
+        else:
+            logger.warning("Small-talk model not found, using rules only", path=SMALL_TALK_MODEL_PATH)
+        _classifier = SmallTalkClassifier(model)
+    return _classifier
+
+
+def route_message(text: str, follow_up: bool = False) -> Optional[SmallTalkRoute]:
+    """Small-talk route for the latest user message, or None when it needs the full pipeline."""
+    if not SMALL_TALK_ROUTING:
+        return None
+    return get_classifier().route(text, follow_up)
@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+from typing import Dict, List, Tuple
+
+from src.utils.logger import setup_logging
+from .small_talk import DATA_DIR, SMALL_TALK_MODEL_PATH, SmallTalkClassifier, SmallTalkModel
+
+SMALL_TALK = "small_talk"
+
+
+def read_examples(path: str) -> List[Tuple[str, int, bool]]:
+    """JSONL of {"text", "label", "follow_up"}; label is "small_talk" or "legal", follow_up defaults to false."""
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["text"], int(row["label"] == SMALL_TALK), bool(row.get("follow_up", False))) for row in rows]
+
+
+def evaluate(classifier: SmallTalkClassifier, examples: List[Tuple[str, int, bool]]) -> Dict[str, object]:
+    """Precision and recall of routing to small talk, through the full rules + model + veto path."""
+    true_positives = false_positives = false_negatives = 0
+    mistakes = []
+    for text, label, follow_up in examples:
+        routed = classifier.route(text, follow_up) is not None
+        if routed and label:
+            true_positives += 1
+        elif routed:
+            false_positives += 1
+            mistakes.append(f"routed legal question: {text}")
+        elif label:
+            false_negatives += 1
+            mistakes.append(f"missed small talk: {text}")
+    return {
+        "precision": round(true_positives / (true_positives + false_positives), 3) if true_positives + false_positives else 1.0,
+        "recall": round(true_positives / (true_positives + false_negatives), 3) if true_positives + false_negatives else 1.0,
+        "examples": len(examples),
+        "mistakes": mistakes,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the small-talk router and report precision on the eval set")
+    parser.add_argument("--train", default=os.path.join(DATA_DIR, "small_talk_train.jsonl"), help="Training JSONL")
+    parser.add_argument("--eval", default=os.path.join(DATA_DIR, "small_talk_eval.jsonl"), help="Held-out JSONL")
+    parser.add_argument("--out", default=SMALL_TALK_MODEL_PATH, help="Where to write the .npz model")
+    parser.add_argument("--eval-only", action="store_true", help="Evaluate the saved model without training")
+    args = parser.parse_args()
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+    if args.eval_only:
+        model = SmallTalkModel.load(args.out)
+    else:
+        texts, labels, _ = zip(*read_examples(args.train))
+        model = SmallTalkModel.fit(texts, labels)
+        model.save(args.out)
+        print(f"Saved {len(model.vocab)}-feature model to {args.out}")
+
+    report = evaluate(SmallTalkClassifier(model), read_examples(args.eval))
+    print(f"precision={report['precision']} recall={report['recall']} examples={report['examples']}")
+    for mistake in report["mistakes"]:
+        print(f"  {mistake}")
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import requests
+from typing import Dict, Any, List
+from dotenv import load_dotenv
+from src.common.deadline import request_timeout
+from src.common.resilience import CircuitOpenError, guarded_search
+from src.tools.search_legal_document import get_elasticsearch_auth
+from src.utils import codec
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("hybrid_search")
+
+# Comma separated indices that carry an `embedding` dense_vector field, e.g. "undang-undang,kuhper,perpres"
+HYBRID_ES_INDICES = [
+    name.strip() for name in os.getenv("HYBRID_ES_INDICES", "").split(",") if name.strip()
+]
+# "rrf" lets ES fuse the lexical and kNN rankings; "sum" adds their (boosted) scores instead
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf")
+
+EMBEDDING_FIELD = "embedding"
+EMBEDDING_DIMS = 768
+
+# Field holding the article text in each index
+HYBRID_TEXT_FIELDS = {
+    "undang-undang": "isi",
+    "kuhper": "content",
+    "perpres": "isi",
+    "kuhp": "content",
+}
+
+
+class HybridSearchError(RuntimeError):
+    """The hybrid request failed; callers fall back to separate ES + Pinecone searches."""
+
+
+def hybrid_enabled(index_name: str) -> bool:
+    return index_name in HYBRID_ES_INDICES
+
+
+def build_hybrid_query(index_name: str, questions: List[str], embeddings: List[List[float]],
+                       size: int = 10, k: int = 5) -> Dict[str, Any]:
+    """Build one ES request combining a lexical `bool.should` with one kNN clause per question."""
+    text_field = HYBRID_TEXT_FIELDS.get(index_name, "content")
+    body = {
+        "size": size,
+        "query": {
+            "bool": {
+                "should": [
+                    {"match": {text_field: question}} for question in questions
+                ]
+            }
+        },
+        "knn": [
+            {
+                "field": EMBEDDING_FIELD,
+                "query_vector": embedding,
+                "k": k,
+                "num_candidates": max(50, k * 10),
+            }
+            for embedding in embeddings
+        ],
+        "_source": {"excludes": [EMBEDDING_FIELD]},
+    }
+    if HYBRID_FUSION == "rrf":
+        body["rank"] = {"rrf": {"window_size": max(50, size * 5), "rank_constant": 60}}
+    return body
+
+
+def hybrid_document_search(index_name: str, questions: List[str], embeddings: List[List[float]],
+                           size: int = 10, k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Search an index with BM25 and kNN in a single round trip, fused server-side.
+
+    Args:
+        index_name: ES index with an `embedding` dense_vector field
+        questions: Question texts for the lexical part
+        embeddings: One text-embedding-004 vector per question for the kNN part
+        size: Number of fused hits to return
+        k: Nearest neighbours per kNN clause
+
+    Returns:
+        List of hits with score, id and source
+
+    Raises:
+        HybridSearchError: ES failed, answered with an error or its breaker is
+            open, so the caller can fall back to ES + Pinecone
+    """
+    url = f"{os.environ.get('ES_BASE_URL', 'https://chat.lexin.cs.ui.ac.id/elasticsearch')}/{index_name}/_search"
+    body = build_hybrid_query(index_name, questions, embeddings, size, k)
+
+    start_time = time.time()
+    try:
+        response = guarded_search(
+            index_name,
+            url,
+            headers={"Content-Type": "application/json"},
+            json=body,
+            auth=get_elasticsearch_auth(),
+            timeout=request_timeout(30),
+        )
+        data = codec.loads(response.content) if response.status_code == 200 else None
+    except (requests.exceptions.RequestException, json.JSONDecodeError, CircuitOpenError) as e:
+        logger.error("Hybrid search failed", index=index_name, error=str(e))
+        raise HybridSearchError(f"Hybrid search on {index_name} failed: {e}") from e
+    if data is None:
+        logger.error("Hybrid search failed", index=index_name, status_code=response.status_code)
+        raise HybridSearchError(f"Hybrid search on {index_name} returned status code {response.status_code}")
+
+    hits = [
+        {
+            "score": hit.get("_score"),
+            "id": hit.get("_id"),
+            "source": hit.get("_source", {}),
+        }
+        for hit in data.get("hits", {}).get("hits", [])
+    ]
+    logger.info("Hybrid search complete", index=index_name, hits=len(hits), duration_ms=int((time.time() - start_time) * 1000))
+    return hits
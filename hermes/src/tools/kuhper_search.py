@@ -3,14 +3,27 @@ import json
 import time
 import requests
 from typing import Dict, Any, List
-from src.common.gemini_client import client as gemini_client
-from src.common.pinecone_client import kuhper_index
+from src.common.llm_gateway import llm_gateway
+from src.common.dense_search import dense_search_client
+from src.local_index.corpus_engine import get_local_engine, parse_query
+from src.utils import codec
+from src.common.deadline import request_timeout
+from src.common.resilience import guarded_search
 from src.utils.logger import HermesLogger
 
 logger = HermesLogger("kuhper_search")
 
 def kuhper_document_search(query: dict) -> List[Dict[str, Any]]:
     start_time = time.time()
+    engine = get_local_engine("kuhper")
+    # Queries the local engine cannot answer exactly still go to Elasticsearch
+    parsed = parse_query(query.get("query", {})) if engine is not None else None
+    if parsed is not None:
+        texts, exact = parsed
+        hits = engine.document_search(texts, query.get("size", 10), exact)
+        logger.info("KUHPER local search complete", hits=len(hits), duration_ms=int((time.time() - start_time) * 1000))
+        return hits
+
     result = search_kuhper_documents_with_fallback(query)
     elapsed = time.time() - start_time
 
@@ -37,12 +50,13 @@ def search_legal_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
 
         request_start = time.time()
 
-        response = requests.post(
-            url=url,
+        response = guarded_search(
+            "kuhper",
+            url,
             headers=headers,
             json=request_body,
             auth=("elastic", "password"),
-            timeout=30
+            timeout=request_timeout(30)
         )
 
         request_time = time.time() - request_start
@@ -55,7 +69,7 @@ def search_legal_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
                 "message": "Failed to execute search query. Please check your query syntax."
             }
 
-        data = response.json()
+        data = codec.loads(response.content)
 
         # Format the response to be more user-friendly
         total_hits = data.get("hits", {}).get("total", {}).get("value", 0)
@@ -115,33 +129,37 @@ def search_legal_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
     
 def search_dense_kuhper_documents(query_or_embedding, top_k: int = 10) -> List[Dict[str, Any]]:
     """
-    Search Pinecone index using either query string or pre-computed embedding.
+    Search the KUHPerdata dense index using either query string or pre-computed embedding.
 
     Args:
         query_or_embedding: Either a string query or a list of floats (embedding vector)
         top_k: Number of results to return
 
     Returns:
-        Pinecone query response as dictionary
+        List of matches with id, score and metadata
     """
     if isinstance(query_or_embedding, str):
-        embed_res = gemini_client.models.embed_content(
+        embed_res = llm_gateway.embed_content(
             model="text-embedding-004",
-            contents=[query_or_embedding]
+            contents=[query_or_embedding],
+            caller="kuhper_search",
         )
         embeddings = [float(x) for x in embed_res.embeddings[0].values]
     else:
         embeddings = query_or_embedding
 
-    response = kuhper_index.query(
-        vector=embeddings,
-        top_k=top_k,
-        include_values=True,
-        include_metadata=True
-    )
-    logger.debug("Pinecone search complete", matches=len(response.matches), top_k=top_k)
+    matches = dense_search_client.query("kuhper", embeddings, top_k)
+    logger.debug("Dense search complete", matches=len(matches), top_k=top_k)
+    return matches
+
+def search_dense_kuhper_documents_batch(embeddings: List[List[float]], top_k: int = 10) -> List[List[Dict[str, Any]]]:
+    """
+    Run one dense query per pre-computed embedding, concurrently.
 
-    return response.to_dict()
+    Returns:
+        One list of matches per embedding, in input order
+    """
+    return dense_search_client.query_many("kuhper", embeddings, top_k)
 
 def search_kuhper_documents_with_fallback(search_query: Dict[str, Any]) -> Dict[str, Any]:
     # Try the original query first
@@ -1,10 +1,12 @@
 import os
 import json
 import time
-import requests
 from typing import Dict, Any, List
-from src.common.gemini_client import client as gemini_client
-from src.common.pinecone_client import perpres_index
+from src.common.llm_gateway import llm_gateway
+from src.common.dense_search import dense_search_client
+from src.utils import codec
+from src.common.deadline import request_timeout
+from src.common.resilience import guarded_search
 from src.utils.logger import HermesLogger
 from dotenv import load_dotenv
 load_dotenv()
@@ -34,12 +36,13 @@ def search_perpres_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
     search_query["size"] = search_query.get("size", 10)
 
     try:
-        response = requests.post(
-            url=url,
+        response = guarded_search(
+            "perpres",
+            url,
             headers=headers,
             json=search_query,
             auth=("elastic", "password"),
-            timeout=30
+            timeout=request_timeout(30)
         )
 
         if response.status_code != 200:
@@ -47,7 +50,7 @@ def search_perpres_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
             logger.error("Elasticsearch request failed", status_code=response.status_code)
             return {"error": error_msg, "message": "Failed to execute search query."}
 
-        data = response.json()
+        data = codec.loads(response.content)
         formatted_response = {
             "total_hits": data.get("hits", {}).get("total", {}).get("value", 0),
             "max_score": data.get("hits", {}).get("max_score"),
@@ -113,7 +116,7 @@ def _extract_search_terms(query: Dict[str, Any]) -> List[str]:
 
 def search_dense_perpres_documents(query_or_embedding, k: int = 10) -> List[Dict[str, Any]]:
     """
-    Search Pinecone index using either query string or pre-computed embedding.
+    Search the Perpres dense index using either query string or pre-computed embedding.
 
     Args:
         query_or_embedding: Either a string query or a list of floats (embedding vector)
@@ -122,35 +125,49 @@ def search_dense_perpres_documents(query_or_embedding, k: int = 10) -> List[Dict
     Returns:
         List of document dictionaries with id, score, and source metadata
     """
-    logger.debug("Starting Pinecone dense search", k=k)
+    logger.debug("Starting dense search", k=k)
 
     try:
         if isinstance(query_or_embedding, str):
-            res = gemini_client.models.embed_content(
+            res = llm_gateway.embed_content(
                 model="text-embedding-004",
-                contents=query_or_embedding
+                contents=query_or_embedding,
+                caller="perpres_search",
             )
             query_embedding = res.embeddings[0].values
         else:
             query_embedding = query_or_embedding
 
-        results = perpres_index.query(
-            vector=query_embedding,
-            top_k=k,
-            include_metadata=True
-        )
-
-        documents = []
-        for match in results.get('matches', []):
-            documents.append({
-                "id": match.get('id'),
-                "score": match.get('score'),
-                "source": match.get('metadata', {})
-            })
-
-        logger.debug("Pinecone search complete", documents=len(documents))
+        documents = _to_perpres_documents(dense_search_client.query("perpres", query_embedding, k))
+        logger.debug("Dense search complete", documents=len(documents))
         return documents
 
     except Exception as e:
-        logger.error("Pinecone search failed", error=str(e))
+        logger.error("Dense search failed", error=str(e))
         return []
+
+def search_dense_perpres_documents_batch(embeddings: List[List[float]], k: int = 10) -> List[List[Dict[str, Any]]]:
+    """
+    Run one dense query per pre-computed embedding, concurrently.
+
+    Returns:
+        One list of documents per embedding, in input order
+    """
+    try:
+        return [
+            _to_perpres_documents(matches)
+            for matches in dense_search_client.query_many("perpres", embeddings, k)
+        ]
+    except Exception as e:
+        logger.error("Dense search failed", error=str(e))
+        return [[] for _ in embeddings]
+
+def _to_perpres_documents(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": match["id"],
+            "score": match["score"],
+            "source": match["metadata"]
+        }
+        for match in matches
+    ]
@@ -1,11 +1,29 @@
+import os
 from .search_legal_document import search_legal_documents
+from src.utils.cache import get_cache, doc_tag, index_tag
 from src.utils.logger import HermesLogger
 
 logger = HermesLogger("retrieve_metadata")
 
+# Document metadata only changes when the corpus is synced, which invalidates by tag
+metadata_cache = get_cache(
+    "document_metadata",
+    maxsize=int(os.getenv("METADATA_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("METADATA_CACHE_TTL", "3600")),
+)
+
+
+def _cache_metadata(normalized_id: str, metadata: dict):
+    metadata_cache.set(normalized_id, metadata, tags=[doc_tag(normalized_id), index_tag("peraturan_indonesia")])
+
 def get_document_metadata(id: str):
     normalized_id = id.replace("Nomor_", "").replace("Tahun_", "").replace(".pdf", "")
     normalized_id = id.split("___")[0]
+    cached = metadata_cache.get(normalized_id)
+    if cached is not None:
+        return dict(cached)
+
+    # Metadata callers use `files[].download_url`, never the regulation text, so `files.content` stays in ES
     docs = search_legal_documents({
         "query": {
             "bool": {
@@ -16,7 +34,7 @@ def get_document_metadata(id: str):
                         }
                     }
                 ]
-    }}})
+    }}}, content_chars=0)
     if docs is None or docs.get("hits") is None or len(docs.get("hits")) == 0:
         return None
 
@@ -24,12 +42,14 @@ def get_document_metadata(id: str):
 
     # Note: search_legal_documents() already returns normalized structure
     # with "id" and "source" fields (not "_id" and "_source")
-    return {
+    metadata = {
         "_id": hit.get("id"),  # Use "id" from normalized hit
         "id": hit.get("id"),
         "source": hit.get("source"),
         "pasal": None  # Ensure it's document metadata, not pasal-specific
     }
+    _cache_metadata(normalized_id, metadata)
+    return dict(metadata)
 
 def get_documents_metadata_batch(ids: list[str]):
     if not ids:
@@ -45,26 +65,38 @@ def get_documents_metadata_batch(ids: list[str]):
     # Remove duplicates
     normalized_ids = list(set(normalized_ids))
 
+    results = []
+    missing_ids = []
+    for nid in normalized_ids:
+        cached = metadata_cache.get(nid)
+        if cached is not None:
+            results.append(dict(cached))
+        else:
+            missing_ids.append(nid)
+    if not missing_ids:
+        return results
+
     docs = search_legal_documents({
         "query": {
             "terms": {
-                "_id": normalized_ids
+                "_id": missing_ids
             }
         },
-        "size": len(normalized_ids)
-    })
+        "size": len(missing_ids)
+    }, content_chars=0)
 
     if docs is None or docs.get("hits") is None:
-        return []
+        return results
 
-    results = []
     for hit in docs.get("hits"):
-        results.append({
+        metadata = {
             "_id": hit.get("id"),
             "id": hit.get("id"),
             "source": hit.get("source"),
             "pasal": None
-        })
+        }
+        _cache_metadata(hit.get("id"), metadata)
+        results.append(dict(metadata))
     return results
 
 if __name__ == "__main__":
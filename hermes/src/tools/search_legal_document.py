@@ -1,9 +1,13 @@
 from dotenv import load_dotenv
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Dict, List
 import os
 import json
+import ijson
 import requests
 import time
+from src.common.deadline import request_timeout
+from src.common.resilience import CircuitOpenError, guarded_search
+from src.utils.es_stream import StreamingSearchResponse
 from src.utils.logger import HermesLogger
 
 load_dotenv()
@@ -53,6 +57,17 @@ ES_MAPPING_SCHEMA = {
     "catatan": "text (indonesian_analyzer)"
 }
 
+# Passage mode keeps `files.content` (the full regulation text) out of `_source`
+# for queries that search it, and returns only the best matching fragments of
+# it in `hit["passages"]`
+PASSAGE_MODE = os.getenv("LEGAL_DOC_PASSAGE_MODE", "true").lower() == "true"
+PASSAGE_FRAGMENTS = int(os.getenv("LEGAL_DOC_PASSAGE_FRAGMENTS", "3"))
+PASSAGE_FRAGMENT_SIZE = int(os.getenv("LEGAL_DOC_PASSAGE_FRAGMENT_SIZE", "400"))
+# Other hits (title and metadata searches) keep only the start of `files.content`, cut while parsing
+LEGAL_DOC_CONTENT_CHARS = int(os.getenv("LEGAL_DOC_CONTENT_CHARS", "4000"))
+
+FILE_CONTENT_FIELD = "files.content"
+
 def get_elasticsearch_auth() -> tuple:
     """
     Get the Elasticsearch authentication credentials from environment variables.
@@ -91,7 +106,130 @@ def legal_document_search(query: dict) -> List[Dict[str, Any]]:
     hits = result.get("hits", [])
     return hits
 
-def search_legal_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
+def _exclude_file_content(source: Any) -> Any:
+    """Merge a `files.content` exclude into whatever `_source` filter the query already has."""
+    if source is None or source is True:
+        return {"excludes": [FILE_CONTENT_FIELD]}
+    if source is False:
+        return False
+    if isinstance(source, (str, list)):
+        return {"includes": [source] if isinstance(source, str) else source, "excludes": [FILE_CONTENT_FIELD]}
+    if isinstance(source, dict):
+        source = dict(source)
+        excludes = source.get("excludes", [])
+        excludes = [excludes] if isinstance(excludes, str) else list(excludes)
+        if FILE_CONTENT_FIELD not in excludes:
+            excludes.append(FILE_CONTENT_FIELD)
+        source["excludes"] = excludes
+        return source
+    return source
+
+def _add_passage_inner_hits(query: Any, counter: List[int]) -> Any:
+    """Attach highlighted inner_hits to every nested query on `files`.
+
+    inner_hits names must be unique per request, so each clause gets its own.
+    """
+    if isinstance(query, list):
+        return [_add_passage_inner_hits(item, counter) for item in query]
+    if not isinstance(query, dict):
+        return query
+
+    result = {}
+    for key, value in query.items():
+        if key == "nested" and isinstance(value, dict) and value.get("path") == "files":
+            nested = dict(value)
+            nested["query"] = _add_passage_inner_hits(nested.get("query"), counter)
+            if "inner_hits" not in nested:
+                counter[0] += 1
+                nested["inner_hits"] = {
+                    "name": f"passages_{counter[0]}",
+                    "size": PASSAGE_FRAGMENTS,
+                    "_source": {"excludes": [FILE_CONTENT_FIELD]},
+                    "highlight": {
+                        "fields": {
+                            FILE_CONTENT_FIELD: {
+                                "fragment_size": PASSAGE_FRAGMENT_SIZE,
+                                "number_of_fragments": PASSAGE_FRAGMENTS,
+                            }
+                        }
+                    },
+                }
+            result[key] = nested
+        else:
+            result[key] = _add_passage_inner_hits(value, counter)
+    return result
+
+def apply_passage_mode(search_query: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of the query that fetches matching fragments instead of full file contents.
+
+    Only queries with a nested `files` clause have fragments to return; any
+    other query (title or metadata searches) is returned unchanged and keeps
+    `files.content`.
+    """
+    counter = [0]
+    passage_query = dict(search_query)
+    if "query" in passage_query:
+        passage_query["query"] = _add_passage_inner_hits(passage_query["query"], counter)
+    if counter[0] == 0:
+        return search_query
+    passage_query["_source"] = _exclude_file_content(search_query.get("_source"))
+    return passage_query
+
+def extract_passages(hit: Dict[str, Any]) -> List[str]:
+    """Collect the highlighted fragments from every inner_hits group of a hit, best first."""
+    fragments = []
+    for inner in (hit.get("inner_hits") or {}).values():
+        for inner_hit in inner.get("hits", {}).get("hits", []):
+            for fragment in inner_hit.get("highlight", {}).get(FILE_CONTENT_FIELD, []):
+                fragments.append((inner_hit.get("_score") or 0, fragment))
+    fragments.sort(key=lambda item: item[0], reverse=True)
+
+    passages = []
+    for _, fragment in fragments:
+        if fragment not in passages:
+            passages.append(fragment)
+        if len(passages) >= PASSAGE_FRAGMENTS:
+            break
+    return passages
+
+def read_search_response(stream: BinaryIO, passages: bool = False,
+                         content_chars: int = LEGAL_DOC_CONTENT_CHARS) -> Dict[str, Any]:
+    """
+    Build the formatted search response from a streamed ES body, one hit at a time.
+
+    Args:
+        stream: Binary file-like object with the `_search` response body
+        passages: Whether the request asked for passages instead of `files.content`
+        content_chars: Characters of `files.content` to keep per file; 0 drops the field
+
+    Returns:
+        Dictionary with total_hits, max_score, hits and aggregations if present
+    """
+    if content_chars > 0:
+        reader = StreamingSearchResponse(stream, source_limits={FILE_CONTENT_FIELD: content_chars})
+    else:
+        reader = StreamingSearchResponse(stream, source_excludes=[FILE_CONTENT_FIELD])
+
+    hits = []
+    for hit in reader.hits():
+        inner_hits = hit.pop("inner_hits", None)
+        if passages:
+            hit["passages"] = extract_passages({"inner_hits": inner_hits})
+        hits.append(hit)
+
+    formatted_response = {
+        "total_hits": reader.total_hits,
+        "max_score": reader.max_score,
+        "hits": hits
+    }
+
+    # Include aggregations if present
+    if reader.aggregations is not None:
+        formatted_response["aggregations"] = reader.aggregations
+
+    return formatted_response
+
+def search_legal_documents(search_query: Dict[str, Any], content_chars: int = LEGAL_DOC_CONTENT_CHARS) -> Dict[str, Any]:
     """
     Advanced search tool for Gemini LLM to search legal documents with complete flexibility.
     The LLM can construct any valid Elasticsearch query and aggregations.
@@ -104,9 +242,12 @@ def search_legal_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
             - from: Optional. Starting offset for pagination (default: 0)
             - sort: Optional. Sorting criteria
             - _source: Optional. Fields to include in the results
+        content_chars: Characters of `files.content` to keep per file; 0 leaves it out of the request
     
     Returns:
-        Complete Elasticsearch response with hits and aggregations
+        Complete Elasticsearch response with hits and aggregations. In passage
+        mode, hits of queries on `files.content` carry `passages` instead of
+        `files.content`; other hits carry its first `content_chars` characters.
     """
     
     url = f"{os.environ.get('ES_BASE_URL', 'https://chat.lexin.cs.ui.ac.id/elasticsearch')}/peraturan_indonesia/_search"
@@ -121,60 +262,44 @@ def search_legal_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
     
     try:
         # Execute the search using requests directly - don't wrap in another "query" object
-        request_body = search_query
+        request_body = apply_passage_mode(search_query) if PASSAGE_MODE else search_query
+        passages = request_body is not search_query
+        if content_chars <= 0 and not passages:
+            request_body = {**request_body, "_source": _exclude_file_content(request_body.get("_source"))}
 
         request_start = time.time()
 
-        response = requests.post(
-            url=url,
+        response = guarded_search(
+            "peraturan_indonesia",
+            url,
             auth=auth,
             headers=headers,
             json=request_body,
-            timeout=30,
+            timeout=request_timeout(30),
+            stream=True,
         )
 
-        request_time = time.time() - request_start
+        with response:
+            request_time = time.time() - request_start
 
-        if response.status_code != 200:
-            error_msg = f"Elasticsearch returned status code {response.status_code}: {response.text}"
-            logger.error("Elasticsearch request failed", status_code=response.status_code)
-            return {
-                "error": error_msg,
-                "message": "Failed to execute search query. Please check your query syntax."
-            }
-
-        data = response.json()
-        
-        # Format the response to be more user-friendly
-        total_hits = data.get("hits", {}).get("total", {}).get("value", 0)
-        max_score = data.get("hits", {}).get("max_score")
+            if response.status_code != 200:
+                error_msg = f"Elasticsearch returned status code {response.status_code}: {response.text}"
+                logger.error("Elasticsearch request failed", status_code=response.status_code)
+                return {
+                    "error": error_msg,
+                    "message": "Failed to execute search query. Please check your query syntax."
+                }
 
+            # Parse hits straight off the socket instead of holding the body, the parsed tree and a reformatted copy
+            response.raw.decode_content = True
+            return read_search_response(response.raw, passages=passages, content_chars=content_chars)
         
-        formatted_response = {
-            "total_hits": total_hits,
-            "max_score": max_score,
-            "hits": []
+    except CircuitOpenError:
+        logger.warning("Elasticsearch circuit open, skipping search")
+        return {
+            "error": "Elasticsearch circuit is open",
+            "message": "Search service is temporarily unavailable. Please try again later."
         }
-        
-        # Process hits
-        hits_data = data.get("hits", {}).get("hits", [])
-        
-        for i, hit in enumerate(hits_data):
-            formatted_hit = {
-                "score": hit.get("_score"),
-                "id": hit.get("_id"),
-                "source": hit.get("_source", {})
-            }
-            formatted_response["hits"].append(formatted_hit)
-        
-        # Include aggregations if present
-        if "aggregations" in data:
-            agg_keys = list(data["aggregations"].keys())
-
-            formatted_response["aggregations"] = data["aggregations"]
-
-        return formatted_response
-        
     except requests.exceptions.Timeout:
         error_msg = "Elasticsearch request timed out after 30 seconds"
         logger.warning("Elasticsearch timeout")
@@ -189,7 +314,7 @@ def search_legal_documents(search_query: Dict[str, Any]) -> Dict[str, Any]:
             "error": error_msg,
             "message": "Unable to connect to search service. Please try again later."
         }
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, ijson.JSONError) as e:
         error_msg = f"Failed to parse Elasticsearch response: {str(e)}"
         logger.error("JSON parsing failed", error=str(e))
         return {
@@ -0,0 +1,61 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.model.search import QnAList
+from src.utils import codec
+from src.utils.cache import get_cache
+from src.utils.logger import HermesLogger
+from src.utils.semantic_cache import retrieval_tags
+from src.utils.session_documents import passage_text
+
+load_dotenv()
+
+logger = HermesLogger("answer_inputs")
+
+# How long a message's documents and planned answers stay available for regeneration
+ANSWER_INPUTS_TTL = int(os.getenv("ANSWER_INPUTS_TTL", "3600"))
+ANSWER_INPUTS_SIZE = int(os.getenv("ANSWER_INPUTS_SIZE", "1024"))
+
+answer_inputs = get_cache("answer_inputs", maxsize=ANSWER_INPUTS_SIZE, ttl=ANSWER_INPUTS_TTL)
+
+
+def remember_answer_inputs(message_id: str, documents: List[Dict[str, Any]], planned: QnAList):
+    """Snapshot what the final generation for a message is built on, before it rewrites the documents."""
+    if not documents:
+        return
+    answer_inputs.set(
+        message_id,
+        codec.dumpb({"documents": documents, "planned": planned.model_dump()}),
+        tags=retrieval_tags(documents),
+    )
+
+
+def load_answer_inputs(message_id: str,
+                       stored_documents: Optional[List[Dict[str, Any]]] = None,
+                       stored_planned: Optional[Dict[str, Any]] = None) -> Optional[Tuple[List[Dict[str, Any]], QnAList]]:
+    """
+    Documents and planned answers to generate a message's answer again.
+
+    Args:
+        message_id: Chat message being regenerated
+        stored_documents: The `documents` column of the chat row, used when this process has no snapshot
+        stored_planned: The `planned_answers` column of the chat row, None when it was never written
+
+    Returns:
+        (documents, planned answers), or None when there is nothing to reuse
+    """
+    snapshot = answer_inputs.get(message_id)
+    if snapshot is not None:
+        inputs = codec.loads(snapshot)
+        return inputs["documents"], QnAList.model_validate(inputs["planned"])
+
+    # The stored row has the answering stage's metadata entries appended; they carry no article text
+    documents = [document for document in stored_documents or [] if passage_text(document)]
+    if not documents:
+        return None
+    if stored_planned:
+        return documents, QnAList.model_validate(stored_planned)
+    logger.debug("Regenerating from stored documents without planned answers", message_id=message_id)
+    return documents, QnAList(is_sufficient=False, answers=[])
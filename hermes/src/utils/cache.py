@@ -0,0 +1,158 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("cache")
+
+# Fanout exchange corpus syncs publish to so every hermes process drops stale entries
+CORPUS_UPDATES_EXCHANGE = os.getenv("CORPUS_UPDATES_EXCHANGE", "corpus_updates")
+
+_MISSING = object()
+
+
+class _ExpiringCache(TTLCache):
+    """TTLCache that reports every key it drops on its own, by expiry or eviction."""
+
+    def __init__(self, maxsize: int, ttl: float, on_drop: Callable[[Hashable], None]):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._on_drop = on_drop
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for key, _ in expired:
+            self._on_drop(key)
+        return expired
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_drop(key)
+        return key, value
+
+
+class TaggedTTLCache:
+    """Thread-safe TTL cache whose entries can be dropped by tag.
+
+    Tags name what an entry was derived from, e.g. `index:perpres` for a search
+    result or `doc:UU_5_1975` for document metadata, so a corpus update can
+    invalidate exactly the entries it made stale.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._cache = _ExpiringCache(maxsize, ttl, self._forget)
+        # Both directions, so expired and evicted keys can be pruned from their tags
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._key_tags: Dict[Hashable, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like `get`, without counting a hit or miss."""
+        with self._lock:
+            return self._cache.get(key, default)
+
+    @property
+    def maxsize(self) -> int:
+        return self._cache.maxsize
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()):
+        with self._lock:
+            self._forget(key)
+            self._cache[key] = value
+            tags = set(tags)
+            if tags:
+                self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying one of the tags; returns the number removed."""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._forget(key)
+                    if self._cache.pop(key, _MISSING) is not _MISSING:
+                        removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def _forget(self, key: Hashable):
+        """Remove a key from the tag index; called with the lock held."""
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+
+_registry: Dict[str, TaggedTTLCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(name: str, maxsize: int = 1024, ttl: float = 300) -> TaggedTTLCache:
+    """Return the named cache, creating it on first use."""
+    with _registry_lock:
+        cache = _registry.get(name)
+        if cache is None:
+            cache = TaggedTTLCache(name, maxsize, ttl)
+            _registry[name] = cache
+        return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Size, hits and misses of every registered cache."""
+    with _registry_lock:
+        caches = dict(_registry)
+    return {name: {"size": len(cache), "hits": cache.hits, "misses": cache.misses} for name, cache in caches.items()}
+
+
+def invalidate(tags: Iterable[str], cache_name: Optional[str] = None) -> int:
+    """Drop tagged entries from one cache, or from every registered cache."""
+    tags = list(tags)
+    with _registry_lock:
+        caches = [_registry[cache_name]] if cache_name in _registry else ([] if cache_name else list(_registry.values()))
+    removed = sum(cache.invalidate(tags) for cache in caches)
+    logger.debug("Cache entries invalidated", tags=len(tags), removed=removed)
+    return removed
+
+
+def invalidate_corpus_update(index_name: str, document_ids: Iterable[str]) -> int:
+    """Drop everything derived from an index and from the updated documents."""
+    return invalidate([index_tag(index_name)] + [doc_tag(doc_id) for doc_id in document_ids])
+
+
+def index_tag(index_name: str) -> str:
+    return f"index:{index_name}"
+
+
+def doc_tag(document_id: str) -> str:
+    return f"doc:{document_id}"
+
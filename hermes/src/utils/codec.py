@@ -0,0 +1,73 @@
+"""JSON codec shared by the message, prompt and persistence paths.
+
+Uses orjson when it is installed and falls back to the standard library, so
+every caller gets the same compact output either way: no whitespace between
+tokens, UTF-8 instead of `\\uXXXX` escapes, and support for pydantic models,
+sets, datetimes and NumPy values. `JSON_CODEC=json` forces the fallback.
+
+Vendored byte-for-byte as `hermes/src/utils/codec.py` and
+`chronos/src/common/codec.py`, one per image build context;
+`hermes/tests/test_vendored.py` fails when they differ.
+"""
+import datetime
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+# Content type set on AMQP messages published with `dumpb`
+WIRE_CONTENT_TYPE = "application/json"
+
+BACKEND = "orjson" if orjson is not None and os.getenv("JSON_CODEC", "orjson") == "orjson" else "json"
+
+
+def _default(obj: Any) -> Any:
+    """Serialize the non-JSON types that show up in documents and agent results."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+if BACKEND == "orjson":
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumpb(obj: Any, indent: bool = False) -> bytes:
+        """Encode to compact UTF-8 bytes, the wire format for queues and HTTP bodies."""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+else:
+    def dumpb(obj: Any, indent: bool = False) -> bytes:
+        """Encode to compact UTF-8 bytes, the wire format for queues and HTTP bodies."""
+        return dumps(obj, indent=indent).encode("utf-8")
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode to a compact string, for prompts and text columns."""
+    if BACKEND == "orjson":
+        return dumpb(obj, indent=indent).decode("utf-8")
+    return json.dumps(
+        obj,
+        default=_default,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+    )
@@ -1,13 +1,12 @@
 from typing import List
-from src.common.gemini_client import client as gemini_client
+from src.common.llm_gateway import llm_gateway
+from src.utils.metrics import EMBEDDING_SECONDS
 
 
 def batch_embed_queries(queries: List[str], model: str = "text-embedding-004") -> List[List[float]]:
     """
     Generate embeddings for multiple queries in a single batch request.
 
-    Falls back to sequential embedding if batch_embed_contents is unavailable.
-
     Args:
         queries: List of text strings to embed
         model: Embedding model name (default: text-embedding-004)
@@ -21,28 +20,14 @@ def batch_embed_queries(queries: List[str], model: str = "text-embedding-004") -
     if not queries:
         return []
 
-    if len(queries) == 1:
-        embed_res = gemini_client.models.embed_content(
-            model=model,
-            contents=[queries[0]]
-        )
-        return [[float(x) for x in embed_res.embeddings[0].values]]
-
-    if hasattr(gemini_client.models, 'batch_embed_contents'):
-        embed_res = gemini_client.models.batch_embed_contents(
+    # embed_content takes a list of contents and returns one embedding per item
+    with EMBEDDING_SECONDS.time():
+        embed_res = llm_gateway.embed_content(
             model=model,
-            requests=[{"content": query} for query in queries]
+            contents=list(queries),
+            caller="batch_embed",
         )
-        return [
-            [float(x) for x in embedding.values]
-            for embedding in embed_res.embeddings
-        ]
-    else:
-        results = []
-        for query in queries:
-            embed_res = gemini_client.models.embed_content(
-                model=model,
-                contents=[query]
-            )
-            results.append([float(x) for x in embed_res.embeddings[0].values])
-        return results
+    return [
+        [float(x) for x in embedding.values]
+        for embedding in embed_res.embeddings
+    ]
@@ -0,0 +1,175 @@
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import ijson
+
+HITS_PREFIX = "hits.hits.item"
+SOURCE_PREFIX = f"{HITS_PREFIX}._source"
+INNER_HITS_PREFIX = f"{HITS_PREFIX}.inner_hits"
+
+# Parts of a hit the normalized {"score", "id", "source"} shape is built from
+HIT_FIELDS = {"_id", "_score", "_source", "inner_hits"}
+INNER_HIT_FIELDS = {"_score", "highlight"}
+
+
+def _field_path(prefix: str, base: str) -> str:
+    """Turn an ijson prefix under `base` into a dotted field path, dropping array markers."""
+    relative = prefix[len(base) + 1:] if len(prefix) > len(base) else ""
+    return ".".join(part for part in relative.split(".") if part and part != "item")
+
+
+class _Builder:
+    """Assemble a JSON value from ijson events (the parts of ijson.ObjectBuilder we need)."""
+
+    def __init__(self):
+        self.value = None
+        self._containers: List[Any] = []
+        self._keys: List[Optional[str]] = []
+
+    def event(self, event: str, value: Any):
+        if event == "map_key":
+            self._keys[-1] = value
+        elif event in ("start_map", "start_array"):
+            container = {} if event == "start_map" else []
+            self._add(container)
+            self._containers.append(container)
+            self._keys.append(None)
+        elif event in ("end_map", "end_array"):
+            self._containers.pop()
+            self._keys.pop()
+        else:
+            self._add(value)
+
+    def _add(self, value: Any):
+        if not self._containers:
+            self.value = value
+            return
+        container = self._containers[-1]
+        if isinstance(container, list):
+            container.append(value)
+        else:
+            container[self._keys[-1]] = value
+
+
+class StreamingSearchResponse:
+    """Lazily parse an Elasticsearch `_search` response from a byte stream.
+
+    Hits are built one at a time and only from the fields the normalized shape
+    uses. `_source` fields matching `source_excludes` (or outside
+    `source_includes`) are discarded event by event instead of being assembled
+    into the hit, and string fields in `source_limits` are cut to their first
+    characters as they are parsed. Only one hit is held at a time, so peak
+    memory follows the largest hit rather than the whole body. `total_hits`,
+    `max_score` and `aggregations` are filled in as the parser passes them and
+    are complete once `hits()` is exhausted.
+
+    Args:
+        stream: Binary file-like object with the response body
+        source_includes: Dotted `_source` field prefixes to keep, everything when None
+        source_excludes: Dotted `_source` field prefixes to drop
+        source_limits: Dotted `_source` string fields -> characters to keep
+    """
+
+    def __init__(self, stream: BinaryIO, source_includes: Optional[List[str]] = None,
+                 source_excludes: Optional[List[str]] = None, source_limits: Optional[Dict[str, int]] = None):
+        self._stream = stream
+        self.source_includes = source_includes
+        self.source_excludes = source_excludes or []
+        self.source_limits = source_limits or {}
+        self.total_hits = 0
+        self.max_score = None
+        self.aggregations: Optional[Dict[str, Any]] = None
+
+    def _keep_source_field(self, path: str) -> bool:
+        if not path:
+            return True
+        for excluded in self.source_excludes:
+            if path == excluded or path.startswith(excluded + "."):
+                return False
+        if self.source_includes is None:
+            return True
+        # Keep parents of included fields so the nesting survives
+        return any(
+            path == included or path.startswith(included + ".") or included.startswith(path + ".")
+            for included in self.source_includes
+        )
+
+    def _keep(self, prefix: str) -> bool:
+        """Whether the value at a prefix inside a hit belongs to the projected hit."""
+        field = prefix[len(HITS_PREFIX) + 1:].split(".", 1)[0]
+        if field not in HIT_FIELDS:
+            return False
+        if prefix.startswith(SOURCE_PREFIX):
+            return self._keep_source_field(_field_path(prefix, SOURCE_PREFIX))
+        if prefix.startswith(INNER_HITS_PREFIX):
+            parts = prefix.split(".")
+            # hits.hits.item.inner_hits.<name>.hits.hits.item.<field>
+            if len(parts) > 8 and parts[5:8] == ["hits", "hits", "item"]:
+                return parts[8] in INNER_HIT_FIELDS
+        return True
+
+    def hits(self) -> Iterator[Dict[str, Any]]:
+        """Yield normalized {"score", "id", "source"} hits, plus raw inner_hits when present."""
+        builder: Optional[_Builder] = None
+        aggregations_builder: Optional[_Builder] = None
+        skip_key_depth = 0
+        pending_key: Optional[str] = None
+
+        for prefix, event, value in ijson.parse(self._stream, use_float=True):
+            if aggregations_builder is not None:
+                aggregations_builder.event(event, value)
+                if prefix == "aggregations" and event == "end_map":
+                    self.aggregations = aggregations_builder.value
+                    aggregations_builder = None
+                continue
+
+            if builder is None:
+                if prefix == HITS_PREFIX and event == "start_map":
+                    builder = _Builder()
+                    builder.event(event, value)
+                elif prefix == "hits.total.value" or (prefix == "hits.total" and event == "number"):
+                    self.total_hits = value
+                elif prefix == "hits.max_score":
+                    self.max_score = value
+                elif prefix == "aggregations" and event == "start_map":
+                    aggregations_builder = _Builder()
+                    aggregations_builder.event(event, value)
+                continue
+
+            # Inside a hit: drop whole subtrees that fall outside the projection
+            if skip_key_depth:
+                if event in ("start_map", "start_array"):
+                    skip_key_depth += 1
+                elif event in ("end_map", "end_array"):
+                    skip_key_depth -= 1
+                continue
+
+            if event == "map_key":
+                child_prefix = f"{prefix}.{value}"
+                if not self._keep(child_prefix):
+                    pending_key = child_prefix
+                    continue
+                builder.event(event, value)
+                continue
+
+            if pending_key is not None:
+                pending_key = None
+                if event in ("start_map", "start_array"):
+                    skip_key_depth = 1
+                continue
+
+            if event == "string" and self.source_limits and prefix.startswith(SOURCE_PREFIX):
+                limit = self.source_limits.get(_field_path(prefix, SOURCE_PREFIX))
+                if limit is not None:
+                    value = value[:limit]
+            builder.event(event, value)
+            if prefix == HITS_PREFIX and event == "end_map":
+                hit = builder.value
+                builder = None
+                normalized = {
+                    "score": hit.get("_score"),
+                    "id": hit.get("_id"),
+                    "source": hit.get("_source", {}),
+                }
+                if hit.get("inner_hits"):
+                    normalized["inner_hits"] = hit["inner_hits"]
+                yield normalized
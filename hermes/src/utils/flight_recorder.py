@@ -0,0 +1,224 @@
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.utils import codec, metrics
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("flight_recorder")
+
+# Slowest messages kept, across all outcomes
+FLIGHT_RECORDER_SLOWEST = int(os.getenv("FLIGHT_RECORDER_SLOWEST", "20"))
+# Most recent failed messages kept
+FLIGHT_RECORDER_FAILURES = int(os.getenv("FLIGHT_RECORDER_FAILURES", "50"))
+# Written on shutdown when set, with the worker's pid before the extension (flight.json -> flight.1234.json)
+FLIGHT_RECORDER_FILE = os.getenv("FLIGHT_RECORDER_FILE", "")
+
+# MESSAGES outcomes that mean the user did not get an answer from this attempt
+FAILED_OUTCOMES = {"timeout", "rejected", "retried"}
+
+
+class FlightRecord:
+    """Everything measured while processing one chat message.
+
+    Stage timings, retries, fallbacks and the outcome arrive through the
+    metrics the pipeline already records; Gemini usage comes from the gateway.
+    """
+
+    def __init__(self, **attributes):
+        self.attributes: Dict[str, Any] = attributes
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.monotonic()
+        self.duration_s: Optional[float] = None
+        self.outcome: Optional[str] = None
+        self.error: Optional[str] = None
+        # stage -> [calls, total seconds]
+        self.stages: Dict[str, List[float]] = {}
+        self.retries: Dict[str, int] = {}
+        self.fallbacks: List[str] = []
+        self.documents: Dict[str, int] = {}
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or self.outcome in FAILED_OUTCOMES
+
+    def annotate(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def observe(self, metric: metrics._Metric, labels: Dict[str, str], value: float):
+        with self._lock:
+            if self.finished:
+                return
+            if metric is metrics.MESSAGES:
+                self.outcome = labels["outcome"]
+            elif metric is metrics.RETRIES:
+                self.retries[labels["func"]] = self.retries.get(labels["func"], 0) + int(value)
+            elif metric is metrics.FALLBACKS:
+                self.fallbacks.append(labels["fallback"])
+            elif metric.kind == "histogram":
+                stage = metric.name.removeprefix("hermes_").removesuffix("_seconds")
+                if labels:
+                    stage += "[" + ",".join(f"{k}={v}" for k, v in labels.items()) + "]"
+                calls, seconds = self.stages.get(stage, (0, 0.0))
+                self.stages[stage] = [calls + 1, seconds + value]
+
+    def llm_call(self, **usage):
+        with self._lock:
+            if not self.finished:
+                self.llm_calls.append(usage)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.attributes,
+                "started_at": self.started_at.isoformat(),
+                "duration_s": round(self.duration_s, 3) if self.duration_s is not None else None,
+                "outcome": self.outcome,
+                "error": self.error,
+                "stages": {
+                    stage: {"calls": int(calls), "seconds": round(seconds, 3)}
+                    for stage, (calls, seconds) in sorted(self.stages.items(), key=lambda item: -item[1][1])
+                },
+                "documents": dict(self.documents),
+                "retries": dict(self.retries),
+                "fallbacks": list(self.fallbacks),
+                "llm": {
+                    "calls": len(self.llm_calls),
+                    "prompt_tokens": sum(call.get("prompt_tokens", 0) for call in self.llm_calls),
+                    "output_tokens": sum(call.get("output_tokens", 0) for call in self.llm_calls),
+                    "cached_tokens": sum(call.get("cached_tokens", 0) for call in self.llm_calls),
+                    "by_call": list(self.llm_calls),
+                },
+            }
+
+
+_current: contextvars.ContextVar[Optional[FlightRecord]] = contextvars.ContextVar("flight_record", default=None)
+
+
+def current_record() -> Optional[FlightRecord]:
+    return _current.get()
+
+
+def annotate(**attributes):
+    """Attach attributes, such as the message id, to the message being processed."""
+    record = _current.get()
+    if record is not None:
+        record.annotate(**attributes)
+
+
+def record_documents(counts: Dict[str, int]):
+    """Documents each retrieval strategy returned for the message being processed."""
+    record = _current.get()
+    if record is not None:
+        with record._lock:
+            for strategy, count in counts.items():
+                record.documents[strategy] = record.documents.get(strategy, 0) + count
+
+
+def record_llm_call(**usage):
+    """Prompt size and token usage of one Gemini call made for the message being processed."""
+    record = _current.get()
+    if record is not None:
+        record.llm_call(**usage)
+
+
+def record_error(error: BaseException):
+    record = _current.get()
+    if record is not None:
+        with record._lock:
+            record.error = f"{type(error).__name__}: {error}"
+
+
+def _observe(metric: metrics._Metric, labels: Dict[str, str], value: float):
+    record = _current.get()
+    if record is not None:
+        record.observe(metric, labels, value)
+
+
+metrics.add_listener(_observe)
+
+
+class FlightRecorder:
+    """Ring buffers of the slowest messages and the latest failures.
+
+    The slowest are a min-heap on duration, so a new message only displaces
+    the fastest of the kept ones; failures are a plain bounded deque. Records
+    are frozen to dicts when the message finishes, so reading the buffers
+    never races the pipeline.
+    """
+
+    def __init__(self, slowest: int = FLIGHT_RECORDER_SLOWEST, failures: int = FLIGHT_RECORDER_FAILURES):
+        self.slowest_size = slowest
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._failures: Deque[Dict[str, Any]] = deque(maxlen=failures)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def message(self, **attributes) -> Iterator[FlightRecord]:
+        """Record the block as one message; exceptions are recorded and re-raised."""
+        record = FlightRecord(**attributes)
+        token = _current.set(record)
+        try:
+            yield record
+        except BaseException as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            self.finish(record)
+
+    def finish(self, record: FlightRecord):
+        with record._lock:
+            record.duration_s = time.monotonic() - record._start
+            record.finished = True
+        entry = record.as_dict()
+        with self._lock:
+            if record.failed:
+                self._failures.append(entry)
+            item = (record.duration_s, next(self._sequence), entry)
+            if len(self._slowest) < self.slowest_size:
+                heapq.heappush(self._slowest, item)
+            elif self._slowest and item[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Slowest messages first, then failures newest first, for this worker process only."""
+        with self._lock:
+            slowest = [entry for _, _, entry in sorted(self._slowest, key=lambda item: -item[0])]
+            failures = list(reversed(self._failures))
+        return {"pid": os.getpid(), "slowest": slowest, "failures": failures}
+
+    def dump(self, path: str = FLIGHT_RECORDER_FILE) -> bool:
+        """Write the snapshot as JSON to a per-worker file; False when no path is configured or the write failed."""
+        if not path:
+            return False
+        # Every uvicorn worker dumps on shutdown; one file each, so none overwrites another
+        root, extension = os.path.splitext(path)
+        path = f"{root}.{os.getpid()}{extension}"
+        try:
+            with open(path, "wb") as f:
+                f.write(codec.dumpb(self.snapshot(), indent=True))
+        except OSError as e:
+            logger.warning("Failed to dump flight recorder", path=path, error=str(e))
+            return False
+        logger.info("Flight recorder dumped", path=path)
+        return True
+
+
+flight_recorder = FlightRecorder()
@@ -1,7 +1,20 @@
+import atexit
 import logging
+import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict, Optional
 
+from src.utils import codec, tracing
+
+# "json" for one object per line, "text" for the classic `[CONTEXT] message: k=v` lines
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Records waiting for the writer thread; more are dropped rather than blocking the caller
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
 class HermesLogger:
     """Centralized logging utility for Hermes service.
 
@@ -54,36 +67,153 @@ class HermesLogger:
         """
         self._log(logging.ERROR, message, **kwargs)
 
-    def _log(self, level: int, message: str, **kwargs):
-        """Internal method to format and log messages.
+    def exception(self, message: str, **kwargs):
+        """Log an error message with the traceback of the exception being handled.
+
+        Args:
+            message: Log message
+            **kwargs: Additional context key-value pairs
+        """
+        self._log(logging.ERROR, message, exc_info=True, **kwargs)
+
+    def _log(self, level: int, message: str, exc_info: bool = False, **kwargs):
+        """Internal method to hand a record to the logging backend.
+
+        Nothing is formatted here: the context travels on the record and the
+        formatter renders it on the writer thread, only for enabled levels.
 
         Args:
             level: Logging level
             message: Log message
+            exc_info: Attach the current exception's traceback
             **kwargs: Additional context key-value pairs
         """
-        if kwargs:
-            context_str = " ".join(f"{k}={v}" for k, v in kwargs.items())
-            formatted_message = f"[{self.context}] {message}: {context_str}"
-        else:
-            formatted_message = f"[{self.context}] {message}"
+        if not self.logger.isEnabledFor(level):
+            return
+        # The trace context lives in a contextvar, so it must be read on the calling thread
+        trace_id = tracing.trace_id()
+        if trace_id is not None:
+            kwargs["trace_id"] = trace_id
+        self.logger.log(level, message, exc_info=exc_info,
+                        extra={"hermes_context": self.context, "hermes_fields": kwargs})
+
+
+class TextFormatter(logging.Formatter):
+    """`timestamp - LEVEL - [CONTEXT] message: k=v` lines."""
+
+    def __init__(self):
+        super().__init__(fmt="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        context = getattr(record, "hermes_context", None)
+        fields: Dict[str, Any] = getattr(record, "hermes_fields", None) or {}
+        message = record.message
+        if context:
+            message = f"[{context}] {message}"
+        if fields:
+            message = f"{message}: " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return self._fmt % {**record.__dict__, "message": message}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the HermesLogger context as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        context = getattr(record, "hermes_context", None)
+        if context:
+            entry["context"] = context
+        fields = getattr(record, "hermes_fields", None)
+        if fields:
+            entry.update({k: v for k, v in fields.items() if k not in entry})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        try:
+            return codec.dumps(entry)
+        except TypeError:
+            return codec.dumps({k: v if isinstance(v, (str, int, float, bool, type(None))) else str(v)
+                                for k, v in entry.items()})
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that never blocks: when the writer falls behind, records are counted and dropped.
+
+    Unlike the stock handler it does not format on the calling thread; the
+    record is queued as is and the listener's handler formats it.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
 
-        self.logger.log(level, formatted_message)
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # The traceback refers to frames that keep changing after we return
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
 
-def setup_logging(level: str = "INFO"):
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def dropped_log_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def shutdown_logging():
+    """Stop the writer thread after it has written everything queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(level: str = "INFO", log_format: str = LOG_FORMAT, stream=None):
     """Configure logging for the entire Hermes application.
 
+    Callers only enqueue records; a background listener formats them and
+    writes to the stream, so a slow stdout never stalls the event loop.
+
     Args:
         level: Log level (DEBUG, INFO, WARNING, ERROR)
+        log_format: "json" or "text"
+        stream: Where the writer thread writes, stdout when None
     """
+    global _queue_handler, _listener
     log_level = getattr(logging, level.upper(), logging.INFO)
 
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        stream=sys.stdout,
-    )
+    shutdown_logging()
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(TextFormatter() if log_format == "text" else JsonFormatter())
 
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    root.addHandler(_queue_handler)
+    root.setLevel(log_level)
     logging.getLogger("hermes").setLevel(log_level)
+
+    _listener = QueueListener(_queue_handler.queue, writer, respect_handler_level=False)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,403 @@
+import glob
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.utils import codec
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Directory shared by the uvicorn workers of one container. Each worker writes its samples there and
+# /metrics merges every live worker's file, so a scrape sees the whole container; unset, only this process
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+# Seconds between a worker's snapshots; another worker's samples are at most this old in a scrape
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+
+# Seconds; spans a cached lookup up to a full answer stream
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.registered = False
+        self._lock = threading.Lock()
+
+    def _notify(self, labels: Dict[str, str], value: float):
+        if self.registered:
+            for listener in _listeners:
+                listener(self, labels, value)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples()]
+        return lines
+
+
+# Called with (metric, labels, value) on every observation of a registered metric
+_listeners: List[Callable[["_Metric", Dict[str, str], float], None]] = []
+
+
+def add_listener(listener: Callable[["_Metric", Dict[str, str], float], None]):
+    """Also hand observations of the registered metrics to `listener`, e.g. the flight recorder."""
+    _listeners.append(listener)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        self._notify(labels, amount)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    """A value that goes up and down.
+
+    `aggregate` says how workers' values combine: "sum" for amounts such as
+    tasks in flight, "max" for states such as an open breaker.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), aggregate: str = "sum"):
+        super().__init__(name, documentation, labels)
+        self.aggregate = aggregate
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> (per-bucket counts, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+        self._notify(labels, value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the block, also when it raises."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels)) or ([0], 0.0)
+            return sum(counts)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        samples = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names + ("le",), key + (_format_value(bound),))
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.label_names, key), total))
+            samples.append((f"{self.name}_count", _format_labels(self.label_names, key), cumulative))
+        return samples
+
+
+_registry: List[_Metric] = []
+
+
+def _register(metric):
+    metric.registered = True
+    _registry.append(metric)
+    return metric
+
+
+EVALUATOR_SECONDS = _register(Histogram("hermes_evaluator_seconds", "Question evaluation latency"))
+RETRIEVAL_STRATEGY_SECONDS = _register(
+    Histogram("hermes_retrieval_strategy_seconds", "Latency of one retrieval strategy", ["strategy"])
+)
+ELASTICSEARCH_REQUEST_SECONDS = _register(
+    Histogram("hermes_elasticsearch_request_seconds", "Elasticsearch _search latency, hedges included", ["index"])
+)
+DENSE_QUERY_SECONDS = _register(
+    Histogram("hermes_dense_query_seconds", "Dense vector query latency", ["index", "backend"])
+)
+EMBEDDING_SECONDS = _register(Histogram("hermes_embedding_seconds", "Query embedding latency"))
+PLANNING_SECONDS = _register(Histogram("hermes_planning_seconds", "Planned answer generation latency"))
+TIME_TO_FIRST_TOKEN_SECONDS = _register(
+    Histogram("hermes_time_to_first_token_seconds", "Time from starting the answer stream to its first chunk")
+)
+STREAM_SECONDS = _register(Histogram("hermes_stream_seconds", "Answer streaming duration"))
+SUPABASE_WRITE_SECONDS = _register(
+    Histogram("hermes_supabase_write_seconds", "Supabase write latency", ["operation"])
+)
+RETRIES = _register(Counter("hermes_retries_total", "Agent call retries", ["func"]))
+FALLBACKS = _register(Counter("hermes_fallbacks_total", "Degraded paths taken", ["fallback"]))
+MESSAGES_IN_FLIGHT = _register(Gauge("hermes_messages_in_flight", "Chat messages being processed"))
+MESSAGES = _register(Counter("hermes_messages_total", "Chat messages processed", ["outcome"]))
+
+
+def _runtime_metrics() -> List[_Metric]:
+    """Snapshot the counters the runtime components already keep, at scrape time."""
+    from src.common.executors import executor_stats
+    from src.common.llm_gateway import llm_gateway
+    from src.common.resilience import CLOSED, HALF_OPEN, OPEN, breaker_stats
+    from src.consumer.message_processor.retrieval_manager import DROPPED_STRATEGIES
+    from src.utils.cache import cache_stats
+    from src.utils.logger import dropped_log_records
+
+    breaker_state = Gauge("hermes_circuit_breaker_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open", ["breaker"],
+                          aggregate="max")
+    breaker_calls = Counter("hermes_circuit_breaker_calls_total", "Calls through a circuit breaker", ["breaker", "result"])
+    for name, stats in breaker_stats().items():
+        breaker_state.set({CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[stats["state"]], breaker=name)
+        for result in ("calls", "failures", "rejected", "opened", "hedged", "hedge_wins"):
+            breaker_calls.inc(stats[result], breaker=name, result=result)
+
+    executor_busy = Gauge("hermes_executor_tasks", "Executor tasks running or queued", ["executor", "state"])
+    executor_done = Counter("hermes_executor_tasks_total", "Executor task outcomes", ["executor", "outcome"])
+    for name, stats in executor_stats().items():
+        executor_busy.set(stats["active"], executor=name, state="active")
+        executor_busy.set(stats["queued"], executor=name, state="queued")
+        for outcome in ("completed", "failed", "rejected"):
+            executor_done.inc(stats[outcome], executor=name, outcome=outcome)
+
+    llm = llm_gateway.stats()
+    llm_waiting = Gauge("hermes_llm_requests", "Gemini calls in flight or waiting for admission", ["state"])
+    llm_waiting.set(llm["in_flight"], state="in_flight")
+    llm_waiting.set(llm["waiting"], state="waiting")
+    llm_calls = Counter("hermes_llm_calls_total", "Gemini calls per model", ["model", "result"])
+    llm_tokens = Counter("hermes_llm_tokens_total", "Gemini tokens per model", ["model", "kind"])
+    for model, stats in llm["models"].items():
+        for result in ("calls", "errors", "rate_limited"):
+            llm_calls.inc(stats[result], model=model, result=result)
+        for kind in ("input", "output", "cached"):
+            llm_tokens.inc(stats[f"{kind}_tokens"], model=model, kind=kind)
+
+    dropped = Counter("hermes_retrieval_dropped_total", "Strategies dropped for missing the retrieval budget", ["strategy"])
+    for strategy, count in DROPPED_STRATEGIES.items():
+        dropped.inc(count, strategy=strategy)
+
+    cache_lookups = Counter("hermes_cache_lookups_total", "Cache lookups", ["cache", "result"])
+    cache_size = Gauge("hermes_cache_entries", "Entries held per cache", ["cache"])
+    for name, stats in cache_stats().items():
+        cache_lookups.inc(stats["hits"], cache=name, result="hit")
+        cache_lookups.inc(stats["misses"], cache=name, result="miss")
+        cache_size.set(stats["size"], cache=name)
+
+    log_dropped = Counter("hermes_log_records_dropped_total", "Log records dropped because the log queue was full")
+    log_dropped.inc(dropped_log_records())
+
+    return [breaker_state, breaker_calls, executor_busy, executor_done, llm_waiting, llm_calls, llm_tokens,
+            dropped, cache_lookups, cache_size, log_dropped]
+
+
+def _dump(metric: _Metric) -> Dict[str, Any]:
+    with metric._lock:
+        values = [[list(key), value] for key, value in metric._values.items()]
+    dump = {"name": metric.name, "kind": metric.kind, "documentation": metric.documentation,
+            "labels": list(metric.label_names), "values": values}
+    if isinstance(metric, Histogram):
+        dump["buckets"] = list(metric.buckets[:-1])
+    if isinstance(metric, Gauge):
+        dump["aggregate"] = metric.aggregate
+    return dump
+
+
+def _load(dump: Dict[str, Any]) -> _Metric:
+    if dump["kind"] == "histogram":
+        return Histogram(dump["name"], dump["documentation"], dump["labels"], buckets=dump["buckets"])
+    if dump["kind"] == "gauge":
+        return Gauge(dump["name"], dump["documentation"], dump["labels"], aggregate=dump["aggregate"])
+    return Counter(dump["name"], dump["documentation"], dump["labels"])
+
+
+def _merge(snapshots: List[List[Dict[str, Any]]]) -> List[_Metric]:
+    """Combine workers' snapshots: counters and histograms add up, gauges follow their `aggregate`."""
+    merged: Dict[str, _Metric] = {}
+    for snapshot in snapshots:
+        for dump in snapshot:
+            metric = merged.get(dump["name"])
+            if metric is None:
+                metric = merged[dump["name"]] = _load(dump)
+            for key, value in dump["values"]:
+                key = tuple(key)
+                current = metric._values.get(key)
+                if isinstance(metric, Histogram):
+                    counts, total = value
+                    if current is not None:
+                        counts = [a + b for a, b in zip(current[0], counts)]
+                        total += current[1]
+                    metric._values[key] = (counts, total)
+                elif current is None:
+                    metric._values[key] = value
+                elif isinstance(metric, Gauge) and metric.aggregate == "max":
+                    metric._values[key] = max(current, value)
+                else:
+                    metric._values[key] = current + value
+    return list(merged.values())
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"metrics-{pid}.json")
+
+
+def write_snapshot():
+    """Write this process's samples to METRICS_DIR, replacing its previous snapshot atomically."""
+    path = _snapshot_path(os.getpid())
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(codec.dumpb([_dump(metric) for metric in _registry + _runtime_metrics()]))
+    os.replace(temporary, path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshots() -> List[List[Dict[str, Any]]]:
+    """Every live worker's snapshot; files of exited workers are removed."""
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(METRICS_DIR, "metrics-*.json"))):
+        pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+        if pid != os.getpid() and not _alive(pid):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path, "rb") as f:
+                snapshots.append(codec.loads(f.read()))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def render() -> str:
+    """Every metric in the Prometheus text format, across all workers when METRICS_DIR is set."""
+    if METRICS_DIR:
+        write_snapshot()
+        metrics = _merge(_read_snapshots())
+    else:
+        metrics = _registry + _runtime_metrics()
+    lines = []
+    for metric in metrics:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+_snapshot_stop = threading.Event()
+_snapshot_thread: Optional[threading.Thread] = None
+
+
+def _snapshot_loop():
+    while not _snapshot_stop.wait(METRICS_SNAPSHOT_INTERVAL):
+        try:
+            write_snapshot()
+        except Exception:
+            # A full disk must not take the worker down; the next interval tries again
+            pass
+
+
+def start_snapshots():
+    """Publish this worker's samples to METRICS_DIR every METRICS_SNAPSHOT_INTERVAL seconds."""
+    global _snapshot_thread
+    if not METRICS_DIR or _snapshot_thread is not None:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    write_snapshot()
+    _snapshot_stop.clear()
+    _snapshot_thread = threading.Thread(target=_snapshot_loop, name="metrics-snapshot", daemon=True)
+    _snapshot_thread.start()
+
+
+def stop_snapshots():
+    """Stop publishing and remove this worker's snapshot, so an exited worker's gauges do not linger."""
+    global _snapshot_thread
+    if _snapshot_thread is None:
+        return
+    _snapshot_stop.set()
+    _snapshot_thread.join(timeout=5)
+    _snapshot_thread = None
+    try:
+        os.remove(_snapshot_path(os.getpid()))
+    except OSError:
+        pass
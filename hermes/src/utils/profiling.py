@@ -0,0 +1,175 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List
+
+from dotenv import load_dotenv
+
+from src.utils import flight_recorder
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("profiling")
+
+# Off by default: the profiling endpoints return 404 and the consumer skips the profiler entirely
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Seconds between stack samples of the sampling profiler
+PROFILING_SAMPLE_INTERVAL = float(os.getenv("PROFILING_SAMPLE_INTERVAL", "0.01"))
+# Longest window one sampling request may cover
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "120"))
+# Message profiles kept for GET, and the most that can be requested at once
+PROFILING_MAX_MESSAGES = int(os.getenv("PROFILING_MAX_MESSAGES", "20"))
+# Functions listed per message profile
+PROFILING_TOP_FUNCTIONS = 40
+
+
+class ProfilerBusy(Exception):
+    """A sampling window is already running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}"
+
+
+def collapse_stack(frame, thread_name: str) -> str:
+    """One stack in the collapsed format flamegraph.pl and speedscope read: root first, `;`-separated."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval for a bounded window.
+
+    Nothing is installed in the profiled threads: the calling thread reads
+    `sys._current_frames()`, so the cost is one stack walk per thread per
+    sample, and nothing at all outside a window.
+    """
+
+    def __init__(self, interval: float = PROFILING_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float) -> Dict[str, int]:
+        """Block for `seconds` and return collapsed stack -> sample count."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A sampling window is already running")
+        try:
+            stacks: Counter = Counter()
+            own = threading.get_ident()
+            deadline = time.monotonic() + min(seconds, PROFILING_MAX_SECONDS)
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != own:
+                        stacks[collapse_stack(frame, names.get(ident, f"thread-{ident}"))] += 1
+                time.sleep(self.interval)
+            return dict(stacks)
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def render(stacks: Dict[str, int]) -> str:
+        """The collapsed-stack file: `frame;frame;frame count` per line, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+class MessageProfiler:
+    """cProfile for the next K chat messages.
+
+    cProfile hooks only the thread that enables it. Here that is the event
+    loop thread, which runs the answer and citation work. Retrieval and other
+    executor work shows up only as time spent waiting on futures, and those
+    stages are covered by the flight record's timings in each profile. Only
+    one message is profiled at a time. Other messages interleaved on the loop
+    while it runs are counted in its profile.
+    """
+
+    def __init__(self, keep: int = PROFILING_MAX_MESSAGES):
+        self._remaining = 0
+        self._active = False
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def arm(self, count: int) -> int:
+        """Profile the next `count` messages; returns how many are pending."""
+        with self._lock:
+            self._remaining = max(0, min(count, self._profiles.maxlen))
+            return self._remaining
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    def _claim(self) -> bool:
+        with self._lock:
+            if self._remaining <= 0 or self._active:
+                return False
+            self._remaining -= 1
+            self._active = True
+            return True
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        """Profile the block if a profile is pending; a single integer check otherwise."""
+        if self._remaining <= 0 or not self._claim():
+            yield
+            return
+        profile = cProfile.Profile()
+        started_at = datetime.now(timezone.utc)
+        start = time.monotonic()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._finish(profile, started_at, time.monotonic() - start)
+
+    def _finish(self, profile: cProfile.Profile, started_at: datetime, duration: float):
+        record = flight_recorder.current_record()
+        entry = record.as_dict() if record is not None else {}
+        output = io.StringIO()
+        stats = pstats.Stats(profile, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILING_TOP_FUNCTIONS)
+        with self._lock:
+            self._active = False
+            self._profiles.append({
+                "message_id": entry.get("message_id"),
+                "trace_id": entry.get("trace_id"),
+                "started_at": started_at.isoformat(),
+                "duration_s": round(duration, 3),
+                "stages": entry.get("stages", {}),
+                "stats": output.getvalue(),
+            })
+        logger.info("Message profiled", message_id=entry.get("message_id"), duration_s=round(duration, 3))
+
+    def profiles(self) -> List[Dict[str, Any]]:
+        """Collected profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+
+sampling_profiler = SamplingProfiler()
+message_profiler = MessageProfiler()
+_disabled = nullcontext()
+
+
+def profile_message():
+    """Context manager the consumer wraps each message in."""
+    if not PROFILING_ENABLED:
+        return _disabled
+    return message_profiler.profile()
+
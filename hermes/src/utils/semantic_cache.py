@@ -0,0 +1,186 @@
+import os
+import re
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils import codec
+from src.utils.cache import doc_tag, get_cache, index_tag
+from src.utils.logger import HermesLogger
+
+load_dotenv()
+
+logger = HermesLogger("semantic_cache")
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+# Cosine similarity of the question embeddings above which a previous answer is reused
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2048"))
+# "answer" replays the final answer; "documents" reuses documents and planned answers and generates anew
+SEMANTIC_CACHE_REUSE = os.getenv("SEMANTIC_CACHE_REUSE", "answer")
+
+# Every retrieval strategy reads these, so an update to any of them can change a cached answer
+RETRIEVAL_INDICES = ["undang-undang", "kuhper", "kuhp", "perpres", "peraturan_indonesia"]
+
+
+def normalize_questions(questions: List[str]) -> str:
+    """Order- and case-insensitive form of the evaluator's questions."""
+    cleaned = {re.sub(r"\s+", " ", question).strip(" ?.!").lower() for question in questions}
+    return "\n".join(sorted(question for question in cleaned if question))
+
+
+def document_ids(documents: List[Dict[str, Any]]) -> List[str]:
+    """Corpus document ids of retrieved passages, without the `___pasal` suffix."""
+    ids = set()
+    for document in documents:
+        document_id = document.get("_id") or document.get("id")
+        if isinstance(document_id, str):
+            ids.add(document_id.split("___")[0])
+    return sorted(ids)
+
+
+def retrieval_tags(documents: List[Dict[str, Any]]) -> List[str]:
+    """Tags that drop an entry built from these documents when the corpus changes."""
+    return [index_tag(index_name) for index_name in RETRIEVAL_INDICES] + [
+        doc_tag(document_id) for document_id in document_ids(documents)
+    ]
+
+
+class SemanticProbe:
+    """One lookup, carried through the message so a miss can be stored without re-embedding."""
+
+    def __init__(self, key: str, vector: Optional[np.ndarray], hit: Optional[Dict[str, Any]], similarity: float):
+        self.key = key
+        self.vector = vector
+        self.hit = hit
+        self.similarity = similarity
+        self._retrieved: Optional[bytes] = None
+        self._tags: List[str] = []
+
+    def retrieved(self, documents: List[Dict[str, Any]], planned: Any):
+        """Snapshot retrieval output before the answering stage rewrites the documents in place."""
+        self._retrieved = codec.dumpb({"documents": documents, "planned": planned})
+        self._tags = [doc_tag(document_id) for document_id in document_ids(documents)]
+
+
+class SemanticAnswerCache:
+    """Reuse answers to questions that mean the same thing.
+
+    Entries are keyed by the embedding of the evaluator's normalized questions
+    and matched by cosine similarity over an in-memory NumPy matrix. The
+    payloads live in a `TaggedTTLCache`, so they expire with the TTL and a
+    corpus update drops them like every other derived cache. Exact repeats of
+    the normalized text skip the embedding call.
+    """
+
+    def __init__(self, embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: int = SEMANTIC_CACHE_TTL,
+                 maxsize: int = SEMANTIC_CACHE_SIZE, enabled: bool = SEMANTIC_CACHE_ENABLED,
+                 reuse: str = SEMANTIC_CACHE_REUSE, name: str = "semantic_answers"):
+        self._embed = embed
+        self.threshold = threshold
+        self.enabled = enabled
+        self.reuse_answer = reuse == "answer"
+        self.entries = get_cache(name, maxsize=maxsize, ttl=ttl)
+        self._keys: List[str] = []
+        self._ids: List[str] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._exact: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> np.ndarray:
+        if self._embed is None:
+            from src.utils.embedding_helper import batch_embed_queries
+            self._embed = batch_embed_queries
+        vector = np.asarray(self._embed([text])[0], dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _compact(self):
+        """Drop rows whose payload expired or was invalidated. Caller holds the lock."""
+        alive = [i for i, entry_id in enumerate(self._ids) if self.entries.peek(entry_id) is not None]
+        if len(alive) == len(self._ids):
+            return
+        self._keys = [self._keys[i] for i in alive]
+        self._ids = [self._ids[i] for i in alive]
+        self._vectors = self._vectors[alive] if alive else np.zeros((0, 0), dtype=np.float32)
+        self._exact = {key: entry_id for key, entry_id in zip(self._keys, self._ids)}
+
+    def probe(self, questions: List[str]) -> Optional[SemanticProbe]:
+        """Look up the questions; None when the cache is disabled or they cannot be keyed."""
+        if not self.enabled:
+            return None
+        key = normalize_questions(questions)
+        if not key:
+            return None
+
+        with self._lock:
+            entry_id = self._exact.get(key)
+        if entry_id is not None:
+            hit = self.entries.get(entry_id)
+            if hit is not None:
+                return SemanticProbe(key, None, codec.loads(hit), 1.0)
+
+        try:
+            vector = self.embed(key)
+        except Exception as e:
+            logger.warning("Failed to embed questions for the semantic cache", error=str(e))
+            return None
+
+        with self._lock:
+            if not self._ids:
+                return SemanticProbe(key, vector, None, 0.0)
+            similarities = self._vectors @ vector
+            best_similarity = float(similarities.max())
+            above = np.flatnonzero(similarities >= self.threshold)
+            candidates = [(float(similarities[i]), self._ids[i]) for i in above[np.argsort(-similarities[above])]]
+
+        # Rows outlive their payloads until compaction, so the closest row may be expired or invalidated
+        stale = False
+        for similarity, entry_id in candidates:
+            hit = self.entries.get(entry_id)
+            if hit is None:
+                stale = True
+                continue
+            if stale:
+                with self._lock:
+                    self._compact()
+            logger.info("Semantic cache hit", similarity=round(similarity, 4))
+            return SemanticProbe(key, vector, codec.loads(hit), similarity)
+        if stale:
+            with self._lock:
+                self._compact()
+        return SemanticProbe(key, vector, None, best_similarity)
+
+    def store(self, probe: SemanticProbe, answer: Optional[Dict[str, Any]] = None):
+        """
+        Keep a probe's retrieval output, and the final answer when there is one.
+
+        Args:
+            probe: The probe from this message, after `retrieved()` was called
+            answer: {"content", "citations", "documents"} exactly as written to the chat row
+        """
+        if probe._retrieved is None:
+            return
+        if probe.vector is None:
+            probe.vector = self.embed(probe.key)
+        payload = codec.loads(probe._retrieved)
+        payload["answer"] = answer if self.reuse_answer else None
+        entry_id = uuid.uuid4().hex
+        tags = [index_tag(index_name) for index_name in RETRIEVAL_INDICES] + probe._tags
+        self.entries.set(entry_id, codec.dumpb(payload), tags=tags)
+
+        with self._lock:
+            if len(self._ids) >= self.entries.maxsize:
+                self._compact()
+            vectors = self._vectors if self._vectors.size else np.zeros((0, probe.vector.shape[0]), dtype=np.float32)
+            self._vectors = np.vstack([vectors, probe.vector[None, :]])
+            self._keys.append(probe.key)
+            self._ids.append(entry_id)
+            self._exact[probe.key] = entry_id
+
+
+semantic_answer_cache = SemanticAnswerCache()
@@ -0,0 +1,162 @@
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils import codec
+from src.utils.cache import get_cache
+from src.utils.logger import HermesLogger
+from src.utils.semantic_cache import retrieval_tags
+
+load_dotenv()
+
+logger = HermesLogger("session_documents")
+
+SESSION_REUSE_ENABLED = os.getenv("SESSION_REUSE_ENABLED", "true").lower() == "true"
+# Question-to-passage cosine similarity at which a stored passage counts as covering a question
+SESSION_COVERAGE_THRESHOLD = float(os.getenv("SESSION_COVERAGE_THRESHOLD", "0.7"))
+# Stored passages reused per covered question, most similar first
+SESSION_REUSE_TOP_K = int(os.getenv("SESSION_REUSE_TOP_K", "5"))
+SESSION_DOCUMENTS_TTL = int(os.getenv("SESSION_DOCUMENTS_TTL", "3600"))
+SESSION_DOCUMENTS_SIZE = int(os.getenv("SESSION_DOCUMENTS_SIZE", "1024"))
+# Passages are embedded from their first characters only
+PASSAGE_EMBED_CHARS = 2000
+
+# Fields holding the article text, across ES hits, hybrid hits and Pinecone matches
+TEXT_FIELDS = ("isi", "content", "text")
+
+
+def passage_text(document: Dict[str, Any]) -> str:
+    """Article text of a retrieved document, or "" for metadata-only entries."""
+    for container in (document.get("source"), document.get("_source"), document.get("metadata"), document):
+        if not isinstance(container, dict):
+            continue
+        for field in TEXT_FIELDS:
+            value = container.get(field)
+            if isinstance(value, str) and value.strip():
+                return value[:PASSAGE_EMBED_CHARS]
+    return ""
+
+
+class SessionReuse:
+    """Outcome of checking a follow-up against the session's documents."""
+
+    def __init__(self, documents: List[Dict[str, Any]], covered: List[str], uncovered: List[str],
+                 vectors: Optional[Dict[str, np.ndarray]] = None):
+        self.documents = documents
+        self.covered = covered
+        self.uncovered = uncovered
+        self.vectors = vectors or {}
+
+
+class SessionDocuments:
+    """The documents each session's last answer was built on, for reuse by follow-ups.
+
+    Follow-ups ("lalu bagaimana sanksinya?") mostly ask about what was just
+    retrieved. `plan` embeds the new questions together with any stored
+    passages not embedded yet, in one call, and splits the questions into
+    those a stored passage already covers and those that still need
+    retrieval. `remember` snapshots the documents of the current turn before
+    the answering stage rewrites them. Entries are tagged like the other
+    derived caches, so a corpus update drops them. When this process has no
+    entry (restart, another replica) the caller's loader reads the previous
+    answer's documents from the chat row instead.
+    """
+
+    def __init__(self, embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 threshold: float = SESSION_COVERAGE_THRESHOLD, top_k: int = SESSION_REUSE_TOP_K,
+                 ttl: int = SESSION_DOCUMENTS_TTL, maxsize: int = SESSION_DOCUMENTS_SIZE,
+                 enabled: bool = SESSION_REUSE_ENABLED, name: str = "session_documents"):
+        self._embed = embed
+        self.threshold = threshold
+        self.top_k = top_k
+        self.enabled = enabled
+        self.entries = get_cache(name, maxsize=maxsize, ttl=ttl)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if self._embed is None:
+            from src.utils.embedding_helper import batch_embed_queries
+            self._embed = batch_embed_queries
+        vectors = np.asarray(self._embed(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _load(self, session_uid: str, load_previous: Optional[Callable[[], List[Dict[str, Any]]]]):
+        """The session's documents and their known passage embeddings, from this process or the loader."""
+        entry = self.entries.get(session_uid)
+        if entry is not None:
+            return codec.loads(entry["documents"]), entry["vectors"]
+        if load_previous is None:
+            return [], {}
+        try:
+            return load_previous() or [], {}
+        except Exception as e:
+            logger.warning("Failed to load previous session documents", session_uid=session_uid, error=str(e))
+            return [], {}
+
+    def previous(self, session_uid: str,
+                 load_previous: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> List[Dict[str, Any]]:
+        """The session's last documents, for a follow-up the history already answers."""
+        return self._load(session_uid, load_previous)[0]
+
+    def plan(self, session_uid: str, questions: List[str],
+             load_previous: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> SessionReuse:
+        """
+        Decide which questions the session's previous documents already answer.
+
+        Args:
+            session_uid: Chat session
+            questions: The evaluator's questions for this message
+            load_previous: Reads the previous answer's documents when this process has none
+
+        Returns:
+            The stored documents to reuse, and the questions left for retrieval
+        """
+        nothing = SessionReuse([], [], list(questions))
+        if not self.enabled or not questions:
+            return nothing
+
+        documents, known = self._load(session_uid, load_previous)
+        passages = [(document, passage_text(document)) for document in documents]
+        passages = [(document, text) for document, text in passages if text]
+        if not passages:
+            return nothing
+
+        missing = sorted({text for _, text in passages if text not in known})
+        try:
+            embedded = self.embed(list(questions) + missing)
+        except Exception as e:
+            logger.warning("Failed to embed for session reuse, retrieving everything", error=str(e))
+            return nothing
+        vectors = dict(known)
+        vectors.update(zip(missing, embedded[len(questions):]))
+
+        similarities = embedded[:len(questions)] @ np.stack([vectors[text] for _, text in passages]).T
+        covered, uncovered, reused = [], [], []
+        for question, row in zip(questions, similarities):
+            if row.max() < self.threshold:
+                uncovered.append(question)
+                continue
+            covered.append(question)
+            for position in np.argsort(-row)[:self.top_k]:
+                if row[position] >= self.threshold and position not in reused:
+                    reused.append(int(position))
+
+        logger.debug("Session documents checked", session_uid=session_uid, passages=len(passages),
+                     covered=len(covered), uncovered=len(uncovered), reused=len(reused))
+        return SessionReuse([passages[position][0] for position in reused], covered, uncovered, vectors)
+
+    def remember(self, session_uid: str, documents: List[Dict[str, Any]], reuse: Optional[SessionReuse] = None):
+        """Snapshot this turn's documents, keeping the embeddings `plan` already computed."""
+        if not self.enabled or not documents:
+            return
+        # Dense vectors are dropped by the answering stage anyway and would dominate the entry
+        snapshot = [{key: value for key, value in document.items() if key != "values"} for document in documents]
+        texts = {passage_text(document) for document in snapshot}
+        vectors = {text: vector for text, vector in (reuse.vectors if reuse else {}).items() if text in texts}
+        self.entries.set(session_uid, {"documents": codec.dumpb(snapshot), "vectors": vectors},
+                         tags=retrieval_tags(snapshot))
+
+
+session_documents = SessionDocuments()
@@ -0,0 +1,340 @@
+"""Minimal W3C trace-context tracing shared by chronos and hermes.
+
+Spans carry a trace id across the HTTP request in chronos, the RabbitMQ hop
+(`traceparent` AMQP header) and the whole answer pipeline in hermes, so one
+request's critical path, queue wait included, can be read end to end. The
+current span lives in a contextvar, which the hermes executors copy into
+their worker threads, so spans opened in a pool nest under the caller's.
+
+Finished spans are exported by a background thread, either as JSON lines to
+`TRACE_FILE` or as OTLP/HTTP JSON to a local collector at
+`TRACE_OTLP_ENDPOINT`. With `TRACE_EXPORTER=none` (the default) context is
+still propagated but nothing is written.
+
+Each image is built from its own service directory, so both carry an
+identical copy: `hermes/src/utils/tracing.py` and
+`chronos/src/common/tracing.py`. Edit one and copy it over;
+`hermes/tests/test_vendored.py` compares them.
+"""
+import contextvars
+import functools
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Mapping, MutableMapping, Optional
+
+from . import codec
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# Share of new traces that are exported; continued traces follow the caller's decision
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+# Finished spans waiting for export; more are dropped rather than blocking the request
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "4096"))
+TRACE_EXPORT_INTERVAL = 1.0
+TRACE_EXPORT_BATCH = 512
+
+TRACEPARENT = "traceparent"
+# AMQP header with the publish time, so the consumer can record the queue wait
+PUBLISHED_AT_HEADER = "x-published-at-ns"
+
+INTERNAL = "internal"
+SERVER = "server"
+CLIENT = "client"
+PRODUCER = "producer"
+CONSUMER = "consumer"
+# OTLP SpanKind numbers
+_OTLP_KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3, PRODUCER: 4, CONSUMER: 5}
+
+
+class SpanContext:
+    """The part of a span that crosses process boundaries."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+class Span:
+    def __init__(self, name: str, context: SpanContext, parent_id: Optional[str], kind: str,
+                 start_ns: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": _service_name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_service_name = os.getenv("SERVICE_NAME", "unknown")
+
+
+def _new_id(hex_digits: int) -> str:
+    value = 0
+    while value == 0:
+        value = random.getrandbits(hex_digits * 4)
+    return f"{value:0{hex_digits}x}"
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """The context in a `traceparent` header, or None when it is missing or malformed."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[0] == "ff":
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+        if int(parts[1], 16) == 0 or int(parts[2], 16) == 0:
+            return None
+    except ValueError:
+        return None
+    return SpanContext(parts[1].lower(), parts[2].lower(), bool(flags & 1))
+
+
+def extract(headers: Optional[Mapping[str, Any]]) -> Optional[SpanContext]:
+    """Read the trace context from HTTP or AMQP headers."""
+    if not headers:
+        return None
+    value = headers.get(TRACEPARENT)
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "ignore")
+    return parse_traceparent(value)
+
+
+def inject(headers: Optional[MutableMapping[str, Any]] = None) -> MutableMapping[str, Any]:
+    """Add the current span's `traceparent` to `headers` (a new dict when None)."""
+    headers = {} if headers is None else headers
+    span = _current.get()
+    if span is not None:
+        headers[TRACEPARENT] = span.context.traceparent()
+    return headers
+
+
+@contextmanager
+def start_span(name: str, kind: str = INTERNAL, parent: Optional[SpanContext] = None,
+               start_ns: Optional[int] = None, **attributes) -> Iterator[Span]:
+    """
+    Open a span for the block, as a child of `parent` or of the current span.
+
+    Exceptions are recorded on the span and re-raised.
+
+    Args:
+        name: Operation, e.g. "elasticsearch.search"
+        kind: INTERNAL, SERVER, CLIENT, PRODUCER or CONSUMER
+        parent: Remote context to continue, e.g. from `extract`
+        start_ns: Start time in epoch nanoseconds, now when None
+        **attributes: Span attributes
+    """
+    if parent is None:
+        current = _current.get()
+        parent = current.context if current is not None else None
+    if parent is not None:
+        context = SpanContext(parent.trace_id, _new_id(16), parent.sampled)
+    else:
+        context = SpanContext(_new_id(32), _new_id(16), random.random() < TRACE_SAMPLE_RATIO)
+    span = Span(name, context, parent.span_id if parent else None, kind,
+                start_ns if start_ns is not None else time.time_ns(), attributes)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        span.end_ns = time.time_ns()
+        _export(span)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, parent: Optional[SpanContext] = None,
+                kind: str = INTERNAL, **attributes) -> Optional[Span]:
+    """Record an interval that already happened, such as the time a message waited in the queue."""
+    current = _current.get()
+    parent = parent or (current.context if current is not None else None)
+    if parent is None:
+        return None
+    span = Span(name, SpanContext(parent.trace_id, _new_id(16), parent.sampled), parent.span_id, kind,
+                start_ns, attributes)
+    span.end_ns = end_ns
+    _export(span)
+    return span
+
+
+def traced(name: Optional[str] = None, kind: str = INTERNAL) -> Callable:
+    """Run the decorated function in a span named after it."""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name, kind):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_id() -> Optional[str]:
+    """Trace id of the current span, for log lines."""
+    span = _current.get()
+    return span.context.trace_id if span is not None else None
+
+
+# Export
+
+_queue: "queue.Queue[Span]" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+_exporter_thread: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+_dropped = 0
+
+
+def _export(span: Span):
+    global _dropped
+    if TRACE_EXPORTER == "none" or not span.context.sampled:
+        return
+    try:
+        _queue.put_nowait(span)
+    except queue.Full:
+        _dropped += 1
+
+
+def dropped_spans() -> int:
+    """Spans dropped because the export queue was full."""
+    return _dropped
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    """OTLP/HTTP JSON body for a batch of finished spans."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": _service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "tracing"},
+                "spans": [
+                    {
+                        "traceId": span.context.trace_id,
+                        "spanId": span.context.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": _OTLP_KINDS[span.kind],
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+                        # STATUS_CODE_ERROR = 2, STATUS_CODE_UNSET = 0
+                        "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+                    }
+                    for span in spans
+                ],
+            }],
+        }],
+    }
+
+
+def _write(spans: List[Span]):
+    if TRACE_EXPORTER == "file":
+        with open(TRACE_FILE, "ab") as f:
+            for span in spans:
+                f.write(codec.dumpb(span.as_dict()) + b"\n")
+    elif TRACE_EXPORTER == "otlp":
+        request = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT,
+            data=codec.dumpb(otlp_payload(spans)),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+
+def flush():
+    """Export everything queued so far; the background thread calls this every second."""
+    spans = []
+    while True:
+        try:
+            spans.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+        if len(spans) >= TRACE_EXPORT_BATCH:
+            _write_safely(spans)
+            spans = []
+    if spans:
+        _write_safely(spans)
+
+
+def _write_safely(spans: List[Span]):
+    try:
+        _write(spans)
+    except Exception as e:
+        logger.warning(f"Failed to export {len(spans)} spans: {e}")
+
+
+def _export_loop():
+    while True:
+        time.sleep(TRACE_EXPORT_INTERVAL)
+        flush()
+
+
+def configure_tracing(service_name: str):
+    """Name this process's spans and start the exporter thread."""
+    global _service_name, _exporter_thread
+    _service_name = service_name
+    if TRACE_EXPORTER == "none":
+        return
+    with _exporter_lock:
+        if _exporter_thread is None:
+            _exporter_thread = threading.Thread(target=_export_loop, name="trace-exporter", daemon=True)
+            _exporter_thread.start()
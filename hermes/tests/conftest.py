@@ -0,0 +1,7 @@
+import os
+
+# Client modules build their SDK clients at import time; tests never call them
+os.environ.setdefault("GENAI_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+# create_client only checks that the key is shaped like a JWT
+os.environ.setdefault("SUPABASE_ANON_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
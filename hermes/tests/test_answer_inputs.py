@@ -0,0 +1,38 @@
+from src.model.search import QnA, QnAList
+from src.utils.answer_inputs import load_answer_inputs, remember_answer_inputs
+from src.utils.cache import invalidate_corpus_update
+
+DOCUMENTS = [{"id": "UU_13_2003___156", "source": {"isi": "Pasal 156: dalam hal terjadi pemutusan hubungan kerja"}}]
+PLANNED = QnAList(is_sufficient=True, answers=[QnA(question="berapa pesangon?", answer="Pasal 156")])
+
+
+def test_snapshot_survives_the_answering_stage_rewriting_documents():
+    documents = [dict(document) for document in DOCUMENTS]
+    remember_answer_inputs("message-1", documents, PLANNED)
+    documents[0]["id"] = "UU_13_2003"
+
+    loaded_documents, planned = load_answer_inputs("message-1")
+    assert loaded_documents == DOCUMENTS
+    assert planned == PLANNED
+
+
+def test_stored_row_is_used_without_its_metadata_entries():
+    stored = DOCUMENTS + [{"_id": "UU_13_2003", "id": "UU_13_2003", "source": {"judul": "Ketenagakerjaan"}, "pasal": None}]
+    documents, planned = load_answer_inputs("message-2", stored)
+    assert documents == DOCUMENTS
+    assert planned.answers == []
+
+    assert load_answer_inputs("message-3") is None
+
+
+def test_stored_row_brings_its_planned_answers():
+    # Another worker, or this one after a restart, has no snapshot; the row carries the plan
+    documents, planned = load_answer_inputs("message-5", DOCUMENTS, PLANNED.model_dump())
+    assert documents == DOCUMENTS
+    assert planned == PLANNED
+
+
+def test_corpus_update_drops_the_snapshot():
+    remember_answer_inputs("message-4", [dict(document) for document in DOCUMENTS], PLANNED)
+    invalidate_corpus_update("undang-undang", ["UU_13_2003"])
+    assert load_answer_inputs("message-4") is None
@@ -0,0 +1,76 @@
+import datetime
+import importlib.util
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from src.model.search import QnA, QnAList
+from src.utils import codec
+
+
+class _Question(BaseModel):
+    question: str
+
+
+def _fallback_codec(monkeypatch):
+    """A separate copy of the module loaded with JSON_CODEC=json, leaving the shared one alone."""
+    monkeypatch.setenv("JSON_CODEC", "json")
+    spec = importlib.util.spec_from_file_location("codec_fallback", codec.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.BACKEND == "json"
+    return module
+
+
+@pytest.fixture(params=["default", "json"])
+def any_codec(request, monkeypatch):
+    return codec if request.param == "default" else _fallback_codec(monkeypatch)
+
+
+def test_codec_round_trip_is_compact_and_utf8():
+    payload = {"isi": "Pasal 1 — ketentuan", "ids": {"a"}, "q": _Question(question="apa?"), "at": datetime.date(2024, 1, 2)}
+    encoded = codec.dumpb(payload)
+
+    assert b": " not in encoded and b", " not in encoded
+    assert "—".encode("utf-8") in encoded
+    assert codec.loads(encoded) == {"isi": "Pasal 1 — ketentuan", "ids": ["a"], "q": {"question": "apa?"}, "at": "2024-01-02"}
+    assert codec.loads(codec.dumps(payload, indent=True)) == codec.loads(encoded)
+
+
+def test_pydantic_models_round_trip(any_codec):
+    planned = QnAList(is_sufficient=True, answers=[QnA(question="Apa syarat sah perjanjian?", answer="Pasal 1320")])
+    assert QnAList.model_validate(any_codec.loads(any_codec.dumps(planned))) == planned
+    assert any_codec.loads(any_codec.dumpb([_Question(question="a")])) == [{"question": "a"}]
+
+
+def test_datetimes_encode_as_iso_8601(any_codec):
+    at = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    decoded = any_codec.loads(any_codec.dumps({"at": at, "day": datetime.date(2024, 1, 2)}))
+    assert datetime.datetime.fromisoformat(decoded["at"]) == at
+    assert decoded["day"] == "2024-01-02"
+
+
+def test_numpy_values_encode_as_plain_numbers(any_codec):
+    payload = {"vector": np.array([0.5, 0.25], dtype=np.float32), "score": np.float64(0.75), "rank": np.int64(3)}
+    assert any_codec.loads(any_codec.dumpb(payload)) == {"vector": [0.5, 0.25], "score": 0.75, "rank": 3}
+
+
+def test_non_ascii_text_is_written_as_utf8(any_codec):
+    text = "Pasal 28E ayat (3) — kebebasan berserikat, “berkumpul” dan 表现"
+    encoded = any_codec.dumpb({"isi": text})
+    assert text.encode("utf-8") in encoded and b"\\u" not in encoded
+    assert any_codec.loads(encoded) == {"isi": text}
+    assert any_codec.loads(memoryview(encoded)) == {"isi": text}
+
+
+def test_backends_agree_on_the_wire_format(monkeypatch):
+    fallback = _fallback_codec(monkeypatch)
+    payload = {"messages": [{"role": "user", "content": "Apa itu KUHP?"}], "ids": ("a", "b"), "n": 1.5}
+    assert fallback.dumpb(payload) == codec.dumpb(payload)
+    assert fallback.loads(codec.dumpb(payload)) == codec.loads(fallback.dumpb(payload))
+
+
+def test_unsupported_types_raise_type_error(any_codec):
+    with pytest.raises(TypeError):
+        any_codec.dumps({"value": object()})
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from src.common.deadline import Deadline, current_deadline, request_timeout
+from src.common.executors import BoundedExecutor
+from src.consumer.message_processor import retrieval_manager
+from src.consumer.message_processor.retrieval_manager import RetrievalManager
+from src.model.search import Questions
+
+
+def test_carved_deadline_never_outlives_parent_reserve():
+    parent = Deadline(10)
+    assert parent.carve(30, reserve=4).remaining() == pytest.approx(6, abs=0.1)
+    assert parent.carve(2, reserve=4).remaining() == pytest.approx(2, abs=0.1)
+    assert parent.carve(30, reserve=20).expired()
+
+
+def test_request_timeout_follows_current_deadline_into_executors():
+    assert request_timeout(30) == 30
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    try:
+        with Deadline(5).scope():
+            assert request_timeout(30) == pytest.approx(5, abs=0.1)
+            future = executor.submit(current_deadline)
+        assert future.result() is not None
+        assert current_deadline() is None
+        with Deadline(0).scope():
+            assert request_timeout(30) == 0.5
+    finally:
+        executor.shutdown()
+
+
+class FakeStrategy:
+    delay = 0.0
+    documents = []
+
+    def cached_search(self, questions):
+        time.sleep(self.delay)
+        return list(self.documents)
+
+
+def strategy(delay, documents):
+    return type("Strategy", (FakeStrategy,), {"delay": delay, "documents": documents})
+
+
+def test_retrieval_returns_partial_results_at_budget(monkeypatch):
+    release = threading.Event()
+
+    class StuckStrategy(FakeStrategy):
+        def cached_search(self, questions):
+            release.wait(5)
+            return [{"id": "late"}]
+
+    monkeypatch.setattr(retrieval_manager, "UndangUndangRetrievalStrategy", strategy(0, [{"id": "uu"}]))
+    monkeypatch.setattr(retrieval_manager, "KuhperRetrievalStrategy", strategy(0, [{"id": "kuhper"}]))
+    monkeypatch.setattr(retrieval_manager, "LegalDocumentRetrievalStrategy", StuckStrategy)
+    monkeypatch.setattr(retrieval_manager, "PerpresRetrievalStrategy", strategy(0, []))
+    monkeypatch.setattr(RetrievalManager, "set_search_state", staticmethod(lambda message_id: None))
+    monkeypatch.setattr(retrieval_manager, "RETRIEVAL_BUDGET_SECONDS", 0.3)
+    monkeypatch.setattr(retrieval_manager, "ANSWER_RESERVE_SECONDS", 0)
+    dropped_before = retrieval_manager.DROPPED_STRATEGIES["legal_doc"]
+
+    questions = Questions(is_sufficient=False, classification="legal", questions=["apa itu PKWT?"])
+    start = time.monotonic()
+    try:
+        documents = RetrievalManager.perform_retrieval(questions, "msg-1", Deadline(300))
+    finally:
+        release.set()
+
+    assert time.monotonic() - start < 1
+    assert sorted(document["id"] for document in documents) == ["kuhper", "uu"]
+    assert retrieval_manager.DROPPED_STRATEGIES["legal_doc"] == dropped_before + 1
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args):
+            self.calls.append((name, *args))
+            return self
+        return call
+
+
+def test_search_state_only_moves_loading_rows(monkeypatch):
+    query = RecordingQuery()
+    monkeypatch.setattr(retrieval_manager, "supabase", query)
+    RetrievalManager.set_search_state("msg-1")
+    assert ("eq", "state", "loading") in query.calls
+    assert query.calls[-1] == ("execute",)
@@ -0,0 +1,114 @@
+import pytest
+
+from src.common import dense_search
+from src.common.dense_search import DenseSearchClient, matches_filter
+from src.common.resilience import CircuitOpenError
+
+METADATA = {"pasal": "1320", "year": 1847, "_type": "kuhper", "tags": "perjanjian"}
+
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"pasal": "1320"}, True),
+    ({"pasal": {"$eq": "1338"}}, False),
+    ({"pasal": {"$ne": "1338"}}, True),
+    ({"_type": {"$in": ["kuhp", "kuhper"]}}, True),
+    ({"_type": {"$nin": ["kuhp", "kuhper"]}}, False),
+    ({"year": {"$gt": 1847}}, False),
+    ({"year": {"$gte": 1847, "$lt": 1900}}, True),
+    ({"year": {"$lte": 1800}}, False),
+    ({"pasal": {"$gt": 1000}}, False),
+    ({"missing": {"$gte": 1}}, False),
+    ({"$and": [{"_type": "kuhper"}, {"year": {"$lt": 1900}}]}, True),
+    ({"$and": [{"_type": "kuhper"}, {"year": {"$gt": 1900}}]}, False),
+    ({"$or": [{"_type": "kuhp"}, {"pasal": "1320"}]}, True),
+    ({"$or": [{"_type": "kuhp"}, {"pasal": "1"}]}, False),
+])
+def test_matches_filter_operators(filter, expected):
+    assert matches_filter(METADATA, filter) is expected
+
+
+class FakeEngine:
+    has_vectors = True
+
+    def __init__(self):
+        self.top_k = None
+
+    def dense_search(self, vector, top_k):
+        self.top_k = top_k
+        return {"matches": [
+            {"id": "engine-1", "score": 0.9, "metadata": {"_type": "kuhp", "pasal": "1"}},
+            {"id": "engine-2", "score": 0.8, "metadata": {"_type": "kuhper", "pasal": "2"}},
+        ]}
+
+
+class FakeReplica:
+    def query(self, vector, top_k):
+        return {"matches": [{"id": "replica-1", "score": 0.7, "metadata": {"pasal": "3"}}]}
+
+
+class FakeResponse:
+    def to_dict(self):
+        return {"matches": [{"id": "pinecone-1", "score": 0.6, "metadata": {"pasal": "4"}}]}
+
+
+class FakeIndex:
+    def __init__(self):
+        self.kwargs = None
+
+    def query(self, **kwargs):
+        self.kwargs = kwargs
+        return FakeResponse()
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    state = {"engine": None, "replica": None}
+    monkeypatch.setattr(dense_search, "get_local_engine", lambda name: state["engine"])
+    monkeypatch.setattr(dense_search, "get_replica", lambda name: state["replica"])
+    client = DenseSearchClient()
+    client._indexes["kuhper"] = FakeIndex()
+    return client, state
+
+
+def test_local_engine_wins_and_filters_client_side(backends):
+    client, state = backends
+    state["engine"], state["replica"] = FakeEngine(), FakeReplica()
+
+    matches = client.query("kuhper", [1.0, 0.0], top_k=2, filter={"_type": "kuhper"}, fields=["pasal"])
+    assert matches == [{"id": "engine-2", "score": 0.8, "metadata": {"pasal": "2"}}]
+    assert state["engine"].top_k == 2 * dense_search.LOCAL_FILTER_OVERSAMPLE
+
+
+def test_replica_is_used_without_a_local_engine(backends):
+    client, state = backends
+    state["replica"] = FakeReplica()
+    assert [match["id"] for match in client.query("kuhper", [1.0, 0.0])] == ["replica-1"]
+
+
+def test_pinecone_gets_the_filter_and_skips_values(backends):
+    client, _ = backends
+
+    matches = client.query("kuhper", (1.0, 0.0), top_k=3, filter={"pasal": "99"}, namespace="ns")
+    # Pinecone filtered server-side, so the returned match is not re-checked locally
+    assert matches == [{"id": "pinecone-1", "score": 0.6, "metadata": {"pasal": "4"}}]
+    kwargs = client._indexes["kuhper"].kwargs
+    assert kwargs["filter"] == {"pasal": "99"} and kwargs["namespace"] == "ns"
+    assert kwargs["include_values"] is False and kwargs["vector"] == [1.0, 0.0]
+
+
+def test_open_circuit_returns_no_matches(backends, monkeypatch):
+    client, _ = backends
+
+    def circuit_open(*args, **kwargs):
+        raise CircuitOpenError("pinecone:kuhper circuit is open")
+
+    monkeypatch.setattr(dense_search, "guarded_call", circuit_open)
+    assert client.query("kuhper", [1.0, 0.0]) == []
+
+
+def test_query_many_keeps_input_order(backends):
+    client, state = backends
+    state["engine"] = FakeEngine()
+    assert client.query_many("kuhper", []) == []
+    results = client.query_many("kuhper", [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], top_k=1)
+    assert [[match["id"] for match in matches] for matches in results] == [["engine-1"]] * 3
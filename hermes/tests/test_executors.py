@@ -0,0 +1,69 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from src.common.executors import BoundedExecutor, BulkheadFullError
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_executor_rejects_when_workers_and_queue_are_full():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1, submit_timeout=0.05)
+    release = threading.Event()
+    try:
+        running = executor.submit(release.wait)
+        queued = executor.submit(lambda: "queued")
+        with pytest.raises(BulkheadFullError):
+            executor.submit(lambda: "rejected")
+        assert executor.stats()["saturation"] == 1.0
+        release.set()
+        assert running.result() is True and queued.result() == "queued"
+        stats = executor.stats()
+        assert (stats["completed"], stats["rejected"], stats["active"], stats["queued"]) == (2, 1, 0, 0)
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_submit_nowait_rejects_without_waiting():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0, submit_timeout=30)
+    release = threading.Event()
+    try:
+        running = executor.submit(release.wait)
+        started = time.monotonic()
+        with pytest.raises(BulkheadFullError):
+            executor.submit_nowait(lambda: "rejected")
+        assert time.monotonic() - started < 1
+        release.set()
+        assert running.result() is True
+        assert executor.submit_nowait(lambda: "accepted").result() == "accepted"
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_executor_runs_tasks_in_the_submitters_context():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    try:
+        request_id.set("msg-1")
+        assert executor.call(request_id.get) == "msg-1"
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_queued_task_gives_its_slot_back():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1, submit_timeout=0.05)
+    release = threading.Event()
+    try:
+        running = executor.submit(release.wait)
+        queued = executor.submit(lambda: "never")
+        assert queued.cancel()
+        replacement = executor.submit(lambda: "replacement")
+        release.set()
+        assert running.result() is True and replacement.result() == "replacement"
+        assert executor.stats()["queued"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
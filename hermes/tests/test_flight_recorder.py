@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from src.common.executors import RETRIEVAL, get_executor
+from src.utils import flight_recorder as recorder_module
+from src.utils.flight_recorder import FlightRecorder
+from src.utils.metrics import EVALUATOR_SECONDS, FALLBACKS, MESSAGES, RETRIES, RETRIEVAL_STRATEGY_SECONDS
+
+
+def _message(recorder: FlightRecorder, message_id: str, seconds: float, outcome: str = "answered"):
+    with recorder.message(message_id=message_id):
+        EVALUATOR_SECONDS.observe(seconds)
+        MESSAGES.inc(outcome=outcome)
+
+
+def test_record_collects_stages_documents_fallbacks_and_llm_usage():
+    recorder = FlightRecorder(slowest=5, failures=5)
+    with recorder.message(message_id="m1") as record:
+        recorder_module.annotate(session_uid="s1")
+        EVALUATOR_SECONDS.observe(0.5)
+        # Pool work still lands on the message's record
+        get_executor(RETRIEVAL).submit(RETRIEVAL_STRATEGY_SECONDS.observe, 1.5, strategy="kuhp").result()
+        RETRIEVAL_STRATEGY_SECONDS.observe(0.5, strategy="kuhp")
+        recorder_module.record_documents({"kuhp": 4, "undang_undang": 0})
+        RETRIES.inc(func="call_agent")
+        FALLBACKS.inc(fallback="stream_to_generate")
+        recorder_module.record_llm_call(caller="evaluator", model="m", prompt_tokens=1200, output_tokens=80,
+                                        cached_tokens=1000)
+        MESSAGES.inc(outcome="answered")
+    # Observations outside a message are ignored
+    EVALUATOR_SECONDS.observe(9.0)
+
+    entry = recorder.snapshot()["slowest"][0]
+    assert entry["message_id"] == "m1" and entry["session_uid"] == "s1" and entry["outcome"] == "answered"
+    assert entry["stages"]["retrieval_strategy[strategy=kuhp]"] == {"calls": 2, "seconds": 2.0}
+    assert entry["stages"]["evaluator"] == {"calls": 1, "seconds": 0.5}
+    assert list(entry["stages"])[0] == "retrieval_strategy[strategy=kuhp]"
+    assert entry["documents"] == {"kuhp": 4, "undang_undang": 0}
+    assert entry["retries"] == {"call_agent": 1} and entry["fallbacks"] == ["stream_to_generate"]
+    assert entry["llm"]["calls"] == 1 and entry["llm"]["prompt_tokens"] == 1200 and entry["llm"]["cached_tokens"] == 1000
+    assert recorder.snapshot()["failures"] == []
+
+
+def test_keeps_only_the_slowest_and_the_latest_failures():
+    recorder = FlightRecorder(slowest=2, failures=2)
+    for i, seconds in enumerate([3.0, 1.0, 5.0, 2.0]):
+        record = recorder_module.FlightRecord(message_id=f"m{i}")
+        record.outcome = "answered"
+        record._start -= seconds
+        recorder.finish(record)
+    assert [entry["message_id"] for entry in recorder.snapshot()["slowest"]] == ["m2", "m0"]
+
+    for i, outcome in enumerate(["retried", "answered", "timeout", "rejected"]):
+        _message(recorder, f"f{i}", 0.1, outcome)
+    assert [entry["message_id"] for entry in recorder.snapshot()["failures"]] == ["f3", "f2"]
+
+    with pytest.raises(RuntimeError):
+        with recorder.message(message_id="boom"):
+            raise RuntimeError("supabase down")
+    failure = recorder.snapshot()["failures"][0]
+    assert failure["message_id"] == "boom" and failure["error"] == "RuntimeError: supabase down"
+
+
+def test_dump_writes_the_snapshot(tmp_path):
+    recorder = FlightRecorder()
+    _message(recorder, "m1", 0.2)
+    assert recorder.dump(str(tmp_path / "flight.json")) and not recorder.dump("")
+    dumped = json.loads((tmp_path / f"flight.{os.getpid()}.json").read_text())
+    assert dumped["pid"] == os.getpid() and dumped["slowest"][0]["message_id"] == "m1"
@@ -0,0 +1,68 @@
+from src.common.executors import BulkheadFullError
+from src.consumer.message_processor import history_manager
+from src.consumer.message_processor.history_manager import ANSWER, EVALUATOR, HistoryManager, summaries
+
+
+def conversation(messages, words=5):
+    return [
+        {"role": "user" if i % 2 == 0 else "model", "parts": [{"text": f"pesan {i} " + "kata " * words}]}
+        for i in range(messages)
+    ]
+
+
+def test_short_sessions_are_sent_whole():
+    history = conversation(5)
+    assert HistoryManager.window(history, "short", ANSWER) == history
+
+
+def test_budget_drops_oldest_turns_but_keeps_the_question(monkeypatch):
+    monkeypatch.setitem(history_manager.HISTORY_TOKEN_BUDGETS, EVALUATOR, 60)
+    history = conversation(9, words=20)
+    window = HistoryManager.window(history, "budget", EVALUATOR)
+    assert window[-1] == history[-1]
+    assert window[0]["role"] == "user"
+    assert len(window) < len(history)
+
+    monkeypatch.setitem(history_manager.HISTORY_TOKEN_BUDGETS, EVALUATOR, 1)
+    assert HistoryManager.window(history, "budget", EVALUATOR) == [history[-1]]
+
+
+def test_summary_replaces_older_turns_and_is_folded_incrementally(monkeypatch):
+    calls = []
+
+    def fake_summarize(previous_summary, turns):
+        calls.append((previous_summary, len(turns)))
+        return f"ringkasan {len(calls)}"
+
+    monkeypatch.setattr(history_manager, "summarize_history", fake_summarize)
+    history = conversation(11)
+    HistoryManager.refresh_summary(history, "long")
+    # 11 messages + answer + next question, minus the 6 kept verbatim, back to a user message
+    assert calls == [("", 6)]
+
+    next_history = conversation(13)
+    window = HistoryManager.window(next_history, "long", ANSWER)
+    assert "ringkasan 1" in window[0]["parts"][0]["text"]
+    assert window[1:] == next_history[6:]
+
+    HistoryManager.refresh_summary(next_history, "long")
+    assert calls[-1] == ("ringkasan 1", 2)
+    assert summaries.get("long")["covered"] == 8
+
+
+def test_schedule_runs_once_per_session(monkeypatch):
+    monkeypatch.setattr(history_manager, "summarize_history", lambda previous, turns: "ringkasan")
+    future = HistoryManager.schedule_summary(conversation(11), "scheduled")
+    future.result(timeout=5)
+    assert summaries.get("scheduled")["text"] == "ringkasan"
+
+
+def test_schedule_skips_instead_of_blocking_when_the_pool_is_full(monkeypatch):
+    class SaturatedExecutor:
+        def submit_nowait(self, fn, *args, **kwargs):
+            raise BulkheadFullError("gemini executor is saturated")
+
+    monkeypatch.setattr(history_manager, "get_executor", lambda name: SaturatedExecutor())
+    assert HistoryManager.schedule_summary(conversation(11), "saturated") is None
+    # The session is free to schedule again on the next turn
+    assert "saturated" not in history_manager._in_flight
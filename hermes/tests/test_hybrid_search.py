@@ -0,0 +1,78 @@
+import json
+
+import pytest
+import requests
+
+from src.agents import search_kuhper_agent
+from src.common.resilience import CircuitOpenError
+from src.tools import hybrid_search
+from src.tools.hybrid_search import HybridSearchError, build_hybrid_query, hybrid_document_search
+from src.utils.metrics import FALLBACKS
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+
+
+def test_hybrid_query_combines_lexical_and_knn_clauses():
+    body = build_hybrid_query("kuhper", ["syarat sah", "hak milik"], [[0.1] * 3, [0.2] * 3], size=10, k=5)
+    assert body["query"]["bool"]["should"][0] == {"match": {"content": "syarat sah"}}
+    assert [clause["query_vector"] for clause in body["knn"]] == [[0.1] * 3, [0.2] * 3]
+    assert body["_source"] == {"excludes": ["embedding"]}
+
+
+def test_hybrid_search_parses_hits(monkeypatch):
+    sent = {}
+
+    def search(index_name, url, **kwargs):
+        sent.update(index_name=index_name, url=url, body=kwargs["json"])
+        return FakeResponse(200, {"hits": {"hits": [
+            {"_id": "KUH_Perdata___1320", "_score": 0.03, "_source": {"content": "Syarat sah perjanjian"}},
+            {"_id": "KUH_Perdata___1338"},
+        ]}})
+
+    monkeypatch.setattr(hybrid_search, "guarded_search", search)
+    hits = hybrid_document_search("kuhper", ["syarat sah"], [[0.1] * 3], size=2)
+
+    assert sent["index_name"] == "kuhper" and sent["url"].endswith("/kuhper/_search")
+    assert sent["body"]["size"] == 2
+    assert hits == [
+        {"score": 0.03, "id": "KUH_Perdata___1320", "source": {"content": "Syarat sah perjanjian"}},
+        {"score": None, "id": "KUH_Perdata___1338", "source": {}},
+    ]
+
+
+@pytest.mark.parametrize("outcome", [
+    FakeResponse(500, {"error": "search_phase_execution_exception"}),
+    FakeResponse(200, b"{not json"),
+    requests.exceptions.ConnectTimeout("timed out"),
+    CircuitOpenError("elasticsearch:kuhper circuit is open"),
+])
+def test_hybrid_search_raises_on_failure(monkeypatch, outcome):
+    def search(*args, **kwargs):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(hybrid_search, "guarded_search", search)
+    with pytest.raises(HybridSearchError):
+        hybrid_document_search("kuhper", ["syarat sah"], [[0.1] * 3])
+
+
+def test_agent_counts_fallback_when_hybrid_fails(monkeypatch):
+    def failing(*args, **kwargs):
+        raise HybridSearchError("Hybrid search on kuhper returned status code 500")
+
+    monkeypatch.setattr(search_kuhper_agent, "hybrid_enabled", lambda index_name: True)
+    monkeypatch.setattr(search_kuhper_agent, "hybrid_document_search", failing)
+    monkeypatch.setattr(search_kuhper_agent, "batch_embed_queries", lambda questions: [[0.1] * 3])
+    monkeypatch.setattr(search_kuhper_agent, "search_dense_kuhper_documents_batch", lambda embeddings, top_k: [[]])
+    monkeypatch.setattr(search_kuhper_agent, "evaluate_es_query", lambda query: ([{"id": "KUH_Perdata___1320"}], None))
+
+    before = FALLBACKS.value(fallback="hybrid_to_separate")
+    documents, dense = search_kuhper_agent.generate_and_execute_es_query_kuhper(["syarat sah"])
+
+    assert documents == [{"id": "KUH_Perdata___1320"}] and dense == []
+    assert FALLBACKS.value(fallback="hybrid_to_separate") == before + 1
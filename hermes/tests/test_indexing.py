@@ -0,0 +1,143 @@
+import json
+
+from src.indexing import ingest
+from src.indexing.ingest import Checkpoint, IngestPipeline, to_records
+from src.indexing.pasal_splitter import split_pasal
+
+REGULATION = """PERATURAN PRESIDEN REPUBLIK INDONESIA
+Menimbang: bahwa perlu diatur
+BAB I
+KETENTUAN UMUM
+Pasal 1
+Dalam Peraturan Presiden ini yang dimaksud dengan Menteri.
+Pasal 2
+Ketentuan sebagaimana dimaksud dalam Pasal 1 berlaku.
+BAB II
+PELAKSANAAN
+Pasal 3
+Menteri melaksanakan tugas.
+PENJELASAN
+Pasal 1
+Cukup jelas.
+Pasal 3
+Tugas meliputi koordinasi.
+"""
+
+
+def test_split_pasal_tracks_bab_and_penjelasan():
+    records = list(split_pasal(REGULATION))
+    assert [record["pasal"] for record in records] == ["Pembukaan", "Pasal 1", "Pasal 2", "Pasal 3"]
+    assert records[2]["text"] == "Ketentuan sebagaimana dimaksud dalam Pasal 1 berlaku."
+    assert [record["bab"] for record in records[1:]] == ["BAB I", "BAB I", "BAB II"]
+    assert records[3]["penjelasan"] == "Tugas meliputi koordinasi."
+
+
+def test_to_records_keeps_document_fields_and_ids():
+    document = {"id": "Perpres_Nomor_1_Tahun_2020", "source": {"isi": REGULATION, "Tahun": "2020"}}
+    records = to_records("perpres", document)
+    assert records[1]["id"] == "Perpres_Nomor_1_Tahun_2020___1"
+    assert records[1]["source"]["Tahun"] == "2020"
+    assert records[1]["source"]["isi"].startswith("Dalam Peraturan Presiden")
+
+
+def test_kuhper_records_keep_bare_pasal_ids():
+    document = {"id": "KUH_Perdata", "source": {"content": "Pasal 1\nSatu.\nPasal 2\nDua."}}
+    assert [record["id"] for record in to_records("kuhper", document)] == ["1", "2"]
+
+
+def test_checkpoint_stops_at_first_failed_batch(tmp_path, monkeypatch):
+    def bulk(actions):
+        ids = [action["index"]["_id"] for action in actions[::2]]
+        return {"items": len(ids), "errors": [{"id": i, "error": "mapper_parsing_exception"} for i in ids if i.startswith("bad")]}
+
+    monkeypatch.setattr(ingest, "bulk", bulk)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    pipeline = IngestPipeline("peraturan_indonesia", checkpoint, batch_size=1, concurrency=1, pinecone=False)
+    pipeline.run(iter([
+        ("a.jsonl", 1, [{"id": "ok-1", "source": {}}]),
+        ("a.jsonl", 2, [{"id": "bad-2", "source": {}}]),
+        ("a.jsonl", 3, [{"id": "ok-3", "source": {}}]),
+    ]))
+
+    assert pipeline.failed_ids == {"bad-2"}
+    assert Checkpoint(checkpoint.path).lines_done("a.jsonl") == 1
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    Checkpoint(path).mark("data/uu.jsonl", 42)
+    assert Checkpoint(path).lines_done("data/uu.jsonl") == 42
+
+
+def test_sync_plan_yields_only_changed_records_and_finds_revoked(tmp_path):
+    from src.indexing.sync import Manifest, SyncPlan
+
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    first = SyncPlan("perpres", manifest)
+    documents = [
+        ("a.jsonl", 1, {"id": "Perpres_1", "source": {"isi": "Pasal 1\nSatu.\nPasal 2\nDua."}}),
+        ("a.jsonl", 2, {"id": "Perpres_2", "source": {"isi": "Pasal 1\nLama."}}),
+    ]
+    assert sum(len(records) for _, _, records in first.changed(iter(documents))) == 3
+    manifest.documents.update(first.updated)
+
+    second = SyncPlan("perpres", manifest)
+    edited = [("a.jsonl", 1, {"id": "Perpres_1", "source": {"isi": "Pasal 1\nSatu.\nPasal 2\nDua diubah."}})]
+    changed = [record["id"] for _, _, records in second.changed(iter(edited)) for record in records]
+    assert changed == ["Perpres_1___2"]
+    assert second.revoked == ["Perpres_2"]
+
+
+def test_sync_leaves_documents_with_failed_records_out_of_the_manifest(tmp_path, monkeypatch):
+    from src.indexing import sync
+
+    def bulk(actions):
+        ids = [next(iter(action.values()))["_id"] for action in actions if "index" in action or "delete" in action]
+        return {"items": len(ids), "errors": [{"id": i, "error": "mapper_parsing_exception"} for i in ids if i == "Perpres_2___1"]}
+
+    monkeypatch.setattr(ingest, "bulk", bulk)
+    monkeypatch.setattr(ingest, "embed_texts", lambda texts: [[0.1] * 3 for _ in texts])
+    monkeypatch.setattr(sync, "bulk", bulk)
+    source = tmp_path / "perpres.jsonl"
+    source.write_text(
+        json.dumps({"id": "Perpres_1", "source": {"isi": "Pasal 1\nSatu."}}) + "\n"
+        + json.dumps({"id": "Perpres_2", "source": {"isi": "Pasal 1\nDua."}}) + "\n",
+        encoding="utf-8",
+    )
+    manifest_path = str(tmp_path / "manifest.json")
+
+    summary = sync.sync_index("perpres", [str(source)], manifest_path, pinecone=False, publish=False)
+    assert summary["failed_documents"] == 1
+    assert set(sync.Manifest(manifest_path).documents) == {"Perpres_1"}
+
+    # The next run writes the failed document again and leaves the other alone
+    summary = sync.sync_index("perpres", [str(source)], manifest_path, pinecone=False, publish=False)
+    assert (summary["unchanged_documents"], summary["written_records"]) == (1, 1)
+
+
+def test_cache_invalidation_by_tag():
+    from src.utils.cache import TaggedTTLCache
+
+    cache = TaggedTTLCache("test", maxsize=10, ttl=60)
+    cache.set(("perpres", ("q",)), [1], tags=["index:perpres"])
+    cache.set("UU_5_1975", {"id": "UU_5_1975"}, tags=["doc:UU_5_1975"])
+    assert cache.invalidate(["index:perpres"]) == 1
+    assert cache.get(("perpres", ("q",))) is None
+    assert cache.get("UU_5_1975") == {"id": "UU_5_1975"}
+
+
+def test_tag_index_forgets_expired_and_evicted_keys():
+    from src.utils.cache import TaggedTTLCache
+
+    cache = TaggedTTLCache("test_prune", maxsize=10, ttl=60)
+    for i in range(1000):
+        cache.set(("perpres", i), [i], tags=["index:perpres", f"doc:{i}"])
+    assert len(cache) == 10
+    assert len(cache._tags["index:perpres"]) == 10
+    assert len(cache._tags) == 11 and len(cache._key_tags) == 10
+
+    cache.set(("perpres", 999), [999], tags=["index:kuhper"])
+    assert ("perpres", 999) not in cache._tags["index:perpres"] and "doc:999" not in cache._tags
+
+    cache._cache.expire(cache._cache.timer() + 61)
+    assert len(cache) == 0 and cache._tags == {} and cache._key_tags == {}
@@ -0,0 +1,108 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from src.common.llm_gateway import BACKGROUND, INTERACTIVE, STREAM, LLMGateway, TokenBucket, retry_delay
+
+
+def rate_limit_error(delay="0.1s"):
+    return errors.ClientError(429, {"error": {
+        "code": 429,
+        "status": "RESOURCE_EXHAUSTED",
+        "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": delay}],
+    }})
+
+
+def response(text="ok"):
+    return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(prompt_token_count=10, candidates_token_count=5))
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = []
+        self.failures = []
+        self.gate = None
+
+    def generate_content(self, model, contents, config=None):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(contents)
+        if self.failures:
+            raise self.failures.pop(0)
+        return response(contents)
+
+
+def gateway(**kwargs):
+    models = FakeModels()
+    client = SimpleNamespace(models=models)
+    return LLMGateway(client=client, **kwargs), models
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1, abs=0.05)
+    # Larger than the bucket: wait for a full bucket, not forever
+    assert bucket.wait_time(600) == pytest.approx(60, abs=0.1)
+
+
+def test_rate_limited_call_retries_after_server_hint():
+    llm, models = gateway(limits={})
+    models.failures = [rate_limit_error("0.2s")]
+    start = time.monotonic()
+    assert llm.generate_content("gemini-2.5-flash", "hai", caller="test").text == "hai"
+    assert time.monotonic() - start >= 0.2
+    stats = llm.stats()["models"]["gemini-2.5-flash"]
+    assert (stats["calls"], stats["errors"], stats["rate_limited"]) == (2, 1, 1)
+    assert (stats["input_tokens"], stats["output_tokens"]) == (10, 5)
+
+
+def test_non_rate_limit_errors_are_not_retried():
+    llm, models = gateway(limits={})
+    models.failures = [errors.ServerError(500, {"error": {"code": 500, "status": "INTERNAL"}})]
+    with pytest.raises(errors.ServerError):
+        llm.generate_content("gemini-2.5-flash", "hai")
+    assert len(models.calls) == 1
+
+
+def test_retry_delay_falls_back_to_backoff():
+    error = errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}})
+    assert retry_delay(error, 0) < retry_delay(error, 1)
+    assert retry_delay(rate_limit_error("17s"), 0) == 17
+
+
+def test_saturated_gateway_admits_streaming_before_background():
+    llm, models = gateway(max_concurrency=1, limits={})
+    models.gate = threading.Event()
+    blocker = threading.Thread(target=llm.generate_content, args=("gemini-2.5-flash", "blocker"))
+    blocker.start()
+    while llm.stats()["in_flight"] == 0:
+        time.sleep(0.01)
+
+    threads = []
+    for contents, priority in (("title", BACKGROUND), ("plan", INTERACTIVE), ("answer", STREAM)):
+        thread = threading.Thread(target=llm.generate_content, args=("gemini-2.5-flash", contents),
+                                  kwargs={"priority": priority})
+        thread.start()
+        threads.append(thread)
+        while llm.stats()["waiting"] < len(threads):
+            time.sleep(0.01)
+
+    models.gate.set()
+    for thread in [blocker] + threads:
+        thread.join(5)
+    assert models.calls == ["blocker", "answer", "plan", "title"]
+
+
+def test_cached_token_ratio_comes_from_usage_metadata():
+    llm, models = gateway(limits={})
+    models.generate_content = lambda model, contents, config=None: SimpleNamespace(
+        usage_metadata=SimpleNamespace(prompt_token_count=1000, candidates_token_count=50, cached_content_token_count=800)
+    )
+    llm.generate_content("gemini-2.5-flash", "hai")
+    stats = llm.stats()["models"]["gemini-2.5-flash"]
+    assert (stats["cached_tokens"], stats["cached_token_ratio"]) == (800, 0.8)
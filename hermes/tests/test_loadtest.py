@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from src.benchmarks.loadtest.distributions import Distribution, percentile
+from src.benchmarks.loadtest.fake_elasticsearch import FakeElasticsearch
+from src.benchmarks.loadtest.fake_gemini import FakeGemini
+from src.benchmarks.loadtest.fake_supabase import FakeSupabase
+from src.model.search import Questions
+
+
+def test_distributions_parse_and_sample():
+    assert Distribution("fixed:0.5").sample() == 0.5
+    uniform = Distribution("uniform:0.2,0.4", rng=random.Random(1))
+    assert all(0.2 <= uniform.sample() <= 0.4 for _ in range(100))
+    assert Distribution("normal:0,0.1", rng=random.Random(1)).sample() >= 0.0
+    with pytest.raises(ValueError):
+        Distribution("lognormal:1")
+
+    values = list(range(1, 101))
+    assert [percentile(values, q) for q in (50, 95, 99, 100)] == [50, 95, 99, 100]
+
+
+def test_fake_gemini_fills_response_schema():
+    gemini = FakeGemini(Distribution("fixed:0"), Distribution("fixed:40"), 1000.0, Distribution("fixed:0"),
+                        field_values={"classification": ["kuhper"]})
+    schema = Questions.model_json_schema()
+    parsed = Questions.model_validate(gemini._instance(schema, schema.get("$defs", {})))
+
+    assert parsed.classification == "kuhper"
+    assert parsed.is_sufficient is False
+    assert 1 <= len(parsed.questions) <= 3
+
+
+def test_fake_elasticsearch_ranks_by_overlap_and_looks_up_ids():
+    corpus = {"kuhp": [
+        {"_id": "a", "_source": {"content": "pencurian dengan kekerasan"}},
+        {"_id": "b", "_source": {"content": "penipuan dan penggelapan"}},
+        {"_id": "c", "_source": {"content": "penipuan online"}},
+    ]}
+    es = FakeElasticsearch(corpus, Distribution("fixed:0"))
+
+    hits = es.search("kuhp", {"query": {"match": {"content": "penipuan penggelapan"}}})["hits"]["hits"]
+    assert [hit["_id"] for hit in hits] == ["b", "c"]
+    hits = es.search("kuhp", {"query": {"terms": {"_id": ["a"]}}})["hits"]["hits"]
+    assert [hit["_id"] for hit in hits] == ["a"]
+    assert es.search("missing", {"query": {"match_all": {}}})["hits"]["hits"] == []
+
+
+def test_fake_supabase_filters_and_tracks_chat_timeline():
+    supabase = FakeSupabase(Distribution("fixed:0"))
+    supabase.tables["chat"] = [
+        {"id": "1", "session_uid": "s", "role": "user", "created_at": "1"},
+        {"id": "2", "session_uid": "s", "role": "assistant", "created_at": "2", "documents": None},
+        {"id": "3", "session_uid": "t", "role": "assistant", "created_at": "3"},
+    ]
+
+    rows = supabase._matching("chat", {"session_uid": "eq.s", "order": "created_at.desc", "limit": "1"})
+    assert [row["id"] for row in rows] == ["2"]
+    rows = supabase._matching("chat", {"id": "in.(1,3)", "documents": "is.null"})
+    assert [row["id"] for row in rows] == ["1", "3"]
+
+    row = supabase.tables["chat"][1]
+    supabase._track("chat", {**row, "state": "searching"}, 10.0)
+    supabase._track("chat", {**row, "state": "streaming", "content": "Menurut"}, 12.0)
+    supabase._track("chat", {**row, "state": "done", "content": "Menurut Pasal 378"}, 15.0)
+    timeline = supabase.timelines["2"].as_dict()
+    assert timeline["first_content_at"] == 12.0
+    assert timeline["states"] == {"searching": 10.0, "streaming": 12.0, "done": 15.0}
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+
+from src.local_index.bm25 import BM25Index
+from src.local_index.corpus_engine import LocalCorpusEngine, parse_query
+
+
+def _write_snapshot(directory):
+    articles = [
+        {"id": "1320", "source": {"content": "Syarat sah perjanjian adalah kesepakatan dan kecakapan"}},
+        {"id": "570", "source": {"content": "Hak milik adalah hak untuk menikmati suatu barang"}},
+        {"id": "1338", "source": {"content": "Semua perjanjian yang dibuat secara sah berlaku sebagai undang-undang"}},
+    ]
+    with open(directory / "articles.jsonl", "w", encoding="utf-8") as f:
+        for article in articles:
+            f.write(json.dumps(article) + "\n")
+
+    np.save(directory / "vectors.npy", np.eye(3, 8, dtype=np.float32))
+    with open(directory / "vector_metadata.jsonl", "w", encoding="utf-8") as f:
+        for i in range(3):
+            f.write(json.dumps({"id": f"vec-{i}", "metadata": {"pasal": str(i)}}) + "\n")
+
+
+def test_bm25_ranks_matching_documents_first(tmp_path):
+    index = BM25Index.build(["perjanjian sah", "hak milik", "perjanjian"])
+    index.save(str(tmp_path / "bm25.npz"))
+    loaded = BM25Index.load(str(tmp_path / "bm25.npz"))
+
+    results = loaded.search(["perjanjian sah"], size=2)
+    assert [position for position, _ in results] == [0, 2]
+    assert loaded.search(["tidak ada"]) == []
+
+
+def test_engine_returns_search_tool_shapes(tmp_path):
+    _write_snapshot(tmp_path)
+    engine = LocalCorpusEngine("kuhper", str(tmp_path))
+
+    hits = engine.document_search(["syarat sah perjanjian"], size=2)
+    assert hits[0]["id"] == "1320"
+    assert set(hits[0]) == {"score", "id", "source"}
+
+    dense = engine.dense_search([0, 1, 0, 0, 0, 0, 0, 0], top_k=2)
+    assert dense["matches"][0]["id"] == "vec-1"
+    assert dense["matches"][0]["metadata"] == {"pasal": "1"}
+    assert "values" not in dense["matches"][0]
+
+
+def test_parse_query_reads_match_clauses():
+    query = {"bool": {"should": [{"match": {"content": "syarat sah"}}, {"match": {"content": {"query": "hak milik"}}}]}}
+    assert parse_query(query) == (["syarat sah", "hak milik"], {})
+
+
+def test_parse_query_separates_exact_lookups_and_rejects_filters():
+    query = {"bool": {"should": [
+        {"match": {"_id": {"query": "570", "boost": 3}}},
+        {"match": {"content": {"query": "Pasal 570"}}},
+    ]}}
+    assert parse_query(query) == (["Pasal 570"], {"_id": ["570"]})
+    assert parse_query({"term": {"pasal.keyword": "Pasal 1"}}) == ([], {"pasal": ["Pasal 1"]})
+    assert parse_query({"bool": {"filter": [{"term": {"bab_id": 2}}]}}) is None
+    assert parse_query({"term": {"bab_id": 2}}) is None
+
+
+def test_parse_query_sends_combined_must_clauses_to_elasticsearch():
+    assert parse_query({"bool": {"must": [{"match": {"content": "hak milik"}}]}}) == (["hak milik"], {})
+    assert parse_query({"bool": {"must": [
+        {"match": {"content": "hak milik"}},
+        {"term": {"pasal.keyword": "Pasal 570"}},
+    ]}}) is None
+
+
+def test_exact_lookup_ranks_the_requested_article_first(tmp_path):
+    _write_snapshot(tmp_path)
+    engine = LocalCorpusEngine("kuhper", str(tmp_path))
+
+    texts, exact = parse_query({"bool": {"should": [
+        {"match": {"_id": {"query": "570", "boost": 3}}},
+        {"match": {"content": "perjanjian"}},
+    ]}})
+    hits = engine.document_search(texts, size=2, exact=exact)
+    assert hits[0]["id"] == "570"
+    assert hits[1]["id"] in ("1320", "1338")
+    assert hits[0]["score"] > hits[1]["score"]
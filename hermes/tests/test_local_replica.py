@@ -0,0 +1,102 @@
+import json
+import os
+
+import numpy as np
+
+from src.common import dense_search
+from src.local_index import sync_pinecone
+from src.local_index.ivf import IVFFlatIndex, normalize_rows
+from src.local_index.replica import METADATA_FILE, LocalReplica, MetadataWriter
+
+
+def _vectors(count=2000, dim=32, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def _brute_force(vectors, query, top_k):
+    scores = normalize_rows(vectors) @ normalize_rows(query)
+    return set(np.argsort(-scores)[:top_k].tolist())
+
+
+def _write_replica(directory, vectors, metadata):
+    IVFFlatIndex.build(vectors, n_lists=8).save(str(directory))
+    with MetadataWriter(str(directory)) as writer:
+        for i, record in enumerate(metadata):
+            writer.write(f"vec-{i}", record)
+
+
+def test_ivf_recall_against_brute_force(tmp_path):
+    vectors = _vectors()
+    queries = _vectors(count=20, seed=1)
+    for quantization, min_recall in (("float32", 0.99), ("int8", 0.9)):
+        index = IVFFlatIndex.build(vectors, n_lists=16, quantization=quantization)
+        index.save(str(tmp_path / quantization))
+        loaded = IVFFlatIndex.load(str(tmp_path / quantization), nprobe=16)
+
+        # Probing every list is exhaustive, so only quantization costs recall
+        found = sum(len({position for position, _ in loaded.search(query, 10)} & _brute_force(vectors, query, 10))
+                    for query in queries)
+        assert found / (10 * len(queries)) >= min_recall
+
+        narrow = [position for position, _ in loaded.search(queries[0], 10, nprobe=2)]
+        assert len(narrow) == len(set(narrow)) <= 10
+
+
+def test_metadata_writer_round_trips_records(tmp_path):
+    records = [{"pasal": "1"}, {"judul": "Undang-Undang Nomor 5 — Agraria"}, {}]
+    _write_replica(tmp_path, _vectors(count=3, dim=4), records)
+
+    replica = LocalReplica("kuhper", str(tmp_path))
+    try:
+        assert [replica.record(i) for i in range(3)] == [
+            {"id": f"vec-{i}", "metadata": record} for i, record in enumerate(records)
+        ]
+        assert len(replica.metadata_offsets) == 4
+        assert replica.metadata_offsets[-1] == os.path.getsize(tmp_path / METADATA_FILE)
+    finally:
+        replica.close()
+
+
+def test_replica_query_returns_pinecone_shape_and_filters(tmp_path, monkeypatch):
+    vectors = _vectors(count=200, dim=16)
+    metadata = [{"year": 2000 + i % 20, "_type": "undang-undang" if i % 2 else "perpres"} for i in range(200)]
+    _write_replica(tmp_path, vectors, metadata)
+    replica = LocalReplica("undang-undang", str(tmp_path), nprobe=8)
+
+    try:
+        response = replica.query(vectors[7], top_k=3)
+        assert response["matches"][0]["id"] == "vec-7"
+        assert response["matches"][0]["metadata"] == metadata[7]
+        assert "metadata" not in replica.query(vectors[7], top_k=1, include_metadata=False)["matches"][0]
+
+        monkeypatch.setattr(dense_search, "get_local_engine", lambda name: None)
+        monkeypatch.setattr(dense_search, "get_replica", lambda name: replica)
+        matches = dense_search.DenseSearchClient().query(
+            "undang-undang", vectors[7], top_k=5,
+            filter={"_type": "undang-undang", "year": {"$gte": 2010}}, fields=["year"],
+        )
+        assert matches and len(matches) <= 5
+        assert all(metadata[int(match["id"].split("-")[1])]["_type"] == "undang-undang" for match in matches)
+        assert all(match["metadata"]["year"] >= 2010 and set(match["metadata"]) == {"year"} for match in matches)
+    finally:
+        replica.close()
+
+
+def test_sync_index_builds_replica_from_export(tmp_path, monkeypatch):
+    vectors = _vectors(count=50, dim=8)
+    exported = [(f"id-{i}", vectors[i].tolist(), {"pasal": str(i)}) for i in range(50)]
+    monkeypatch.setattr(sync_pinecone, "export_pinecone_vectors", lambda index_name: iter(exported))
+
+    sync_pinecone.sync_index("kuhper", str(tmp_path), n_lists=4)
+
+    target = tmp_path / "kuhper"
+    assert not (tmp_path / "kuhper.staging").exists()
+    assert not (target / sync_pinecone.RAW_VECTORS_FILE).exists()
+    with open(target / "ivf.json", encoding="utf-8") as f:
+        assert json.load(f) == {"count": 50, "dim": 8, "n_lists": 4, "quantization": "int8"}
+    replica = LocalReplica("kuhper", str(target))
+    try:
+        match = replica.query(vectors[3], top_k=1)["matches"][0]
+        assert match == {"id": "id-3", "score": match["score"], "metadata": {"pasal": "3"}}
+    finally:
+        replica.close()
@@ -0,0 +1,79 @@
+import io
+import json
+import logging
+import queue
+
+from src.utils import logger as logger_module, tracing
+from src.utils.logger import DroppingQueueHandler, HermesLogger, JsonFormatter, TextFormatter
+
+
+class Exploding:
+    def __str__(self):
+        raise AssertionError("formatted a disabled record")
+
+
+def _capture(formatter: logging.Formatter, level: int = logging.DEBUG):
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter)
+    hermes_logger = HermesLogger("test")
+    hermes_logger.logger.handlers = [handler]
+    hermes_logger.logger.propagate = False
+    hermes_logger.logger.setLevel(level)
+    return hermes_logger, stream
+
+
+def test_disabled_levels_are_never_formatted():
+    hermes_logger, stream = _capture(JsonFormatter(), level=logging.INFO)
+    hermes_logger.debug("Chunk received", value=Exploding())
+    assert stream.getvalue() == ""
+
+
+def test_json_lines_carry_context_fields_trace_and_traceback():
+    hermes_logger, stream = _capture(JsonFormatter())
+    with tracing.start_span("work") as span:
+        hermes_logger.info("Search complete", hits=27, index="kuhp", raw=object())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        hermes_logger.exception("Search failed")
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["message"] == "Search complete" and first["context"] == "TEST" and first["level"] == "INFO"
+    assert first["hits"] == 27 and first["index"] == "kuhp" and first["trace_id"] == span.context.trace_id
+    assert first["raw"].startswith("<object object")
+    assert second["level"] == "ERROR" and "ValueError: boom" in second["exception"]
+
+
+def test_text_format_matches_the_classic_lines():
+    hermes_logger, stream = _capture(TextFormatter())
+    hermes_logger.warning("Search slow", duration_ms=1523)
+    assert stream.getvalue().rstrip().endswith("- WARNING - [TEST] Search slow: duration_ms=1523")
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    record_logger = logging.getLogger("hermes.test_queue")
+    record_logger.handlers = [handler]
+    record_logger.propagate = False
+    record_logger.setLevel(logging.INFO)
+    for i in range(5):
+        record_logger.info("message %d", i)
+    assert handler.queue.qsize() == 2 and handler.dropped == 3
+
+
+def test_setup_logging_writes_on_the_listener_thread():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        logger_module.setup_logging("INFO", log_format="json", stream=stream)
+        HermesLogger("consumer").info("Message processed successfully", session_uid="abc-123")
+        logger_module.shutdown_logging()
+        entry = json.loads(stream.getvalue().splitlines()[-1])
+        assert entry["session_uid"] == "abc-123" and entry["logger"] == "hermes.consumer"
+        assert logger_module.dropped_log_records() == 0
+    finally:
+        logger_module.shutdown_logging()
+        root.handlers, root.level = handlers, level
+        logger_module._queue_handler = None
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from src.common.resilience import get_breaker
+from src.utils import codec, metrics
+from src.utils.cache import get_cache
+from src.utils.metrics import Counter, Gauge, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5, stage="a")
+    with histogram.time(stage="b"):
+        pass
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP test_stage_seconds Stage latency", "# TYPE test_stage_seconds histogram"]
+    assert 'test_stage_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_stage_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'test_stage_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_stage_seconds_sum{stage="a"} 5.55' in lines
+    assert 'test_stage_seconds_count{stage="a"} 3' in lines
+    assert histogram.count(stage="b") == 1
+
+
+def test_counter_and_gauge_labels():
+    counter = Counter("test_fallbacks_total", "Fallbacks", ["fallback"])
+    counter.inc(fallback='quote"d')
+    counter.inc(2, fallback='quote"d')
+    assert counter.render()[-1] == 'test_fallbacks_total{fallback="quote\\"d"} 3'
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+
+    gauge = Gauge("test_in_flight", "In flight")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.render() == ["# HELP test_in_flight In flight", "# TYPE test_in_flight gauge", "test_in_flight 1"]
+
+
+def test_render_includes_runtime_components():
+    get_breaker("elasticsearch:metrics-test")
+    cache = get_cache("metrics_test")
+    cache.set("key", "value")
+    cache.get("key")
+    metrics.FALLBACKS.inc(fallback="evaluator_default")
+
+    text = metrics.render()
+    assert 'hermes_circuit_breaker_state{breaker="elasticsearch:metrics-test"} 0' in text
+    assert 'hermes_cache_lookups_total{cache="metrics_test",result="hit"} 1' in text
+    assert 'hermes_fallbacks_total{fallback="evaluator_default"}' in text
+    assert "# TYPE hermes_messages_in_flight gauge" in text
+    assert text.endswith("\n")
+
+
+def test_render_merges_live_worker_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    metrics.MESSAGES.inc(outcome="merge_test")
+    own = metrics.MESSAGES.value(outcome="merge_test")
+
+    sibling = [
+        {"name": "hermes_messages_total", "kind": "counter", "documentation": "Chat messages processed",
+         "labels": ["outcome"], "values": [[["merge_test"], 4.0]]},
+        {"name": "hermes_circuit_breaker_state", "kind": "gauge", "aggregate": "max",
+         "documentation": "Circuit breaker state", "labels": ["breaker"], "values": [[["elasticsearch:merge-test"], 2]]},
+        {"name": "test_merge_seconds", "kind": "histogram", "documentation": "Sibling-only histogram",
+         "labels": [], "buckets": list(metrics.DEFAULT_BUCKETS), "values": [[[], [[1] + [0] * 14, 0.001]]]},
+    ]
+    # The parent process stands in for a live sibling worker; a pid that cannot exist for one that exited
+    (tmp_path / f"metrics-{os.getppid()}.json").write_bytes(codec.dumpb(sibling))
+    dead = tmp_path / "metrics-999999999.json"
+    dead.write_bytes(codec.dumpb([{**sibling[0], "values": [[["merge_test"], 100.0]]}]))
+    get_breaker("elasticsearch:merge-test")
+
+    text = metrics.render()
+    assert f'hermes_messages_total{{outcome="merge_test"}} {int(own) + 4}' in text
+    assert 'hermes_circuit_breaker_state{breaker="elasticsearch:merge-test"} 2' in text
+    assert 'test_merge_seconds_bucket{le="+Inf"} 1' in text and "test_merge_seconds_count 1" in text
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+    assert not dead.exists()
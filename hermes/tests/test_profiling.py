@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from src.utils import profiling
+from src.utils.flight_recorder import FlightRecorder
+from src.utils.metrics import EVALUATOR_SECONDS
+from src.utils.profiling import MessageProfiler, ProfilerBusy, SamplingProfiler
+
+
+def _spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_returns_collapsed_stacks_of_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        stacks = SamplingProfiler(interval=0.001).sample(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    spinner = [stack for stack in stacks if stack.startswith("spinner;")]
+    assert spinner and all("test_profiling:_spin" in stack for stack in spinner)
+    lines = SamplingProfiler.render(stacks).splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) == max(stacks.values()) and ";" in stack
+
+
+def test_only_one_sampling_window_at_a_time():
+    profiler = SamplingProfiler(interval=0.001)
+    thread = threading.Thread(target=profiler.sample, args=(0.3,))
+    thread.start()
+    time.sleep(0.05)
+    with pytest.raises(ProfilerBusy):
+        profiler.sample(0.1)
+    thread.join()
+
+
+def test_profiles_exactly_the_next_k_messages_with_stage_timings():
+    profiler, recorder = MessageProfiler(keep=5), FlightRecorder()
+    assert profiler.arm(2) == 2
+    for i in range(3):
+        with recorder.message(message_id=f"m{i}"), profiler.profile():
+            EVALUATOR_SECONDS.observe(0.25)
+            sorted(range(10000), key=lambda x: -x)
+
+    profiles = profiler.profiles()
+    assert [profile["message_id"] for profile in profiles] == ["m1", "m0"] and profiler.remaining == 0
+    assert profiles[0]["stages"]["evaluator"] == {"calls": 1, "seconds": 0.25}
+    assert "function calls" in profiles[0]["stats"] and "<lambda>" in profiles[0]["stats"]
+
+
+def test_disabled_profiling_skips_the_profiler(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", False)
+    profiling.message_profiler.arm(1)
+    try:
+        with profiling.profile_message():
+            pass
+        assert profiling.message_profiler.remaining == 1
+    finally:
+        profiling.message_profiler.arm(0)
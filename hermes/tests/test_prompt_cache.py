@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from src.common.prompt_cache import CHATBOT, MIN_CACHE_TOKENS, PromptCache
+
+LARGE_PROMPT = "static " * MIN_CACHE_TOKENS
+HISTORY = [
+    {"role": "user", "parts": [{"text": "Apa itu wanprestasi?"}]},
+    {"role": "model", "parts": [{"text": "Wanprestasi adalah ..."}]},
+    {"role": "user", "parts": [{"text": "Apa sanksinya?"}]},
+]
+
+
+class FakeCaches:
+    """Cached contents of one project, as every worker's client sees them."""
+
+    def __init__(self, fail_create=False):
+        self.fail_create = fail_create
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.live = []
+
+    def create(self, model, config):
+        if self.fail_create:
+            raise RuntimeError("caching unavailable")
+        self.created.append(config)
+        now = datetime.now(timezone.utc)
+        cached = SimpleNamespace(name=f"cachedContents/{len(self.created)}", display_name=config.display_name,
+                                 model=f"models/{model}", create_time=now + timedelta(microseconds=len(self.created)),
+                                 expire_time=now + timedelta(seconds=int(config.ttl[:-1])))
+        self.live.append(cached)
+        return cached
+
+    def list(self):
+        return list(self.live)
+
+    def update(self, name, config):
+        self.updated.append((name, config.ttl))
+
+    def delete(self, name):
+        self.deleted.append(name)
+        self.live = [cached for cached in self.live if cached.name != name]
+
+
+def prompt_cache(caches, **kwargs):
+    return PromptCache(client=SimpleNamespace(caches=caches), prompts={CHATBOT: LARGE_PROMPT}, **kwargs)
+
+
+def test_cached_prompt_is_referenced_and_dynamic_part_leads_the_last_user_turn():
+    caches = FakeCaches()
+    cache = prompt_cache(caches, ttl_seconds=600)
+    cache.start()
+    try:
+        config, contents = cache.config(CHATBOT, HISTORY, "Retrieved Context: [...]", temperature=0.2)
+        assert config.cached_content == "cachedContents/1" and config.system_instruction is None
+        assert config.temperature == 0.2
+        # The user's question stays the last thing the model reads
+        assert contents[:2] == HISTORY[:2]
+        assert contents[2] == {"role": "user", "parts": [{"text": "Retrieved Context: [...]"}, {"text": "Apa sanksinya?"}]}
+        assert HISTORY[2]["parts"] == [{"text": "Apa sanksinya?"}]
+        assert cache.config(CHATBOT, HISTORY)[1] is HISTORY
+        assert caches.created[0].system_instruction == LARGE_PROMPT and caches.created[0].ttl == "600s"
+    finally:
+        cache.stop()
+    # Other workers keep using it
+    assert caches.deleted == []
+
+
+def test_workers_share_one_handle_per_prompt():
+    caches = FakeCaches()
+    first, second = prompt_cache(caches), prompt_cache(caches)
+    first.refresh_due()
+    second.refresh_due()
+    assert len(caches.created) == 1
+    assert first.handle(CHATBOT) == second.handle(CHATBOT) == "cachedContents/1"
+
+    # An edited prompt never adopts the old prompt's handle
+    edited = PromptCache(client=SimpleNamespace(caches=caches), prompts={CHATBOT: LARGE_PROMPT + "edited"})
+    edited.refresh_due()
+    assert edited.handle(CHATBOT) == "cachedContents/2"
+
+
+def test_workers_starting_together_keep_the_oldest_handle():
+    caches = FakeCaches()
+    first, second = prompt_cache(caches), prompt_cache(caches)
+    first.refresh_due()
+    # The second worker listed before the first one's handle existed, so it creates its own too
+    listings = [[]]
+    second._existing = lambda key: listings.pop() if listings else PromptCache._existing(second, key)
+    second.refresh_due()
+    assert caches.deleted == ["cachedContents/2"]
+    assert second.handle(CHATBOT) == "cachedContents/1"
+
+
+def test_falls_back_to_inline_prompt_with_static_prefix_first():
+    cache = prompt_cache(FakeCaches(fail_create=True))
+    cache.start()
+    try:
+        config, contents = cache.config(CHATBOT, HISTORY, "Retrieved Context: [...]")
+        assert config.cached_content is None and contents is HISTORY
+        assert config.system_instruction == LARGE_PROMPT + "Retrieved Context: [...]"
+    finally:
+        cache.stop()
+
+
+def test_refresh_extends_handles_close_to_expiry_and_retries_missing_ones():
+    caches = FakeCaches(fail_create=True)
+    cache = prompt_cache(caches, ttl_seconds=600, refresh_margin=700, enabled=False)
+    cache.refresh_due()
+    assert cache.handle(CHATBOT) is None
+
+    caches.fail_create = False
+    cache.refresh_due()
+    assert cache.handle(CHATBOT) == "cachedContents/1"
+    # The margin exceeds the TTL, so the next pass refreshes right away
+    cache.refresh_due()
+    assert caches.updated == [("cachedContents/1", "600s")]
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.common import resilience
+from src.common.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, es_breaker, guarded_search
+from src.tools.perpres_search import perpres_document_search
+
+SEARCH_RESPONSE = {"hits": {"total": {"value": 1}, "max_score": 1.0, "hits": [{"_id": "1", "_score": 1.0, "_source": {}}]}}
+
+
+class StandInElasticsearch:
+    """Local `_search` endpoint whose status and latency each test scripts."""
+
+    def __init__(self):
+        self.status = 200
+        self.delays = []
+        self.requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stand_in.requests += 1
+                if stand_in.delays:
+                    time.sleep(stand_in.delays.pop(0))
+                body = json.dumps(SEARCH_RESPONSE if stand_in.status == 200 else {"error": "injected"}).encode()
+                self.send_response(stand_in.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def es(monkeypatch):
+    stand_in = StandInElasticsearch()
+    monkeypatch.setenv("ES_BASE_URL", stand_in.url)
+    monkeypatch.setattr(resilience, "_breakers", {})
+    yield stand_in
+    stand_in.close()
+
+
+def install_breaker(index_name, **kwargs):
+    breaker = CircuitBreaker(es_breaker(index_name), **kwargs)
+    resilience._breakers[breaker.name] = breaker
+    return breaker
+
+
+def test_breaker_opens_on_server_errors_and_fails_fast(es):
+    breaker = install_breaker("perpres", min_calls=4, open_seconds=60)
+    es.status = 503
+
+    # Each tool call tries the original query and the fallback query
+    assert perpres_document_search({"query": {"match": {"isi": "pajak"}}}) == []
+    assert perpres_document_search({"query": {"match": {"isi": "pajak"}}}) == []
+    assert breaker.state == OPEN and es.requests == 4
+
+    start = time.monotonic()
+    assert perpres_document_search({"query": {"match": {"isi": "pajak"}}}) == []
+    assert time.monotonic() - start < 0.1
+    assert es.requests == 4 and breaker.stats()["rejected"] == 2
+
+
+def test_breaker_ignores_client_errors(es):
+    breaker = install_breaker("perpres", min_calls=2)
+    es.status = 400
+    for _ in range(3):
+        assert perpres_document_search({"query": {"match": {"isi": "pajak"}}}) == []
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_breaker_opens_on_slow_calls_and_recovers_after_trial(es):
+    breaker = install_breaker("perpres", min_calls=2, slow_call_seconds=0.05, slow_call_rate=1.0, open_seconds=0.2)
+    es.delays = [0.1, 0.1]
+    for _ in range(2):
+        assert guarded_search("perpres", f"{es.url}/perpres/_search", json={}).status_code == 200
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        guarded_search("perpres", f"{es.url}/perpres/_search", json={})
+
+    time.sleep(0.25)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+    assert guarded_search("perpres", f"{es.url}/perpres/_search", json={}).status_code == 200
+
+
+def test_failed_trial_reopens_breaker(es):
+    breaker = install_breaker("perpres", min_calls=1, open_seconds=0.1)
+    es.status = 500
+    guarded_search("perpres", f"{es.url}/perpres/_search", json={})
+    assert breaker.state == OPEN
+    time.sleep(0.15)
+    guarded_search("perpres", f"{es.url}/perpres/_search", json={})
+    assert breaker.state == OPEN and breaker.opened == 2
+
+
+def test_hedged_request_beats_a_stalled_attempt(es, monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(resilience, "HEDGE_DEFAULT_DELAY", 0.05)
+    breaker = install_breaker("perpres")
+    es.delays = [1.0]
+
+    start = time.monotonic()
+    response = guarded_search("perpres", f"{es.url}/perpres/_search", json={})
+    assert response.status_code == 200
+    assert time.monotonic() - start < 0.5
+    assert (breaker.hedged, breaker.hedge_wins) == (1, 1)
+
+
+def test_hedge_delay_tracks_p95_latency():
+    breaker = CircuitBreaker("test")
+    assert breaker.hedge_delay() == resilience.HEDGE_DEFAULT_DELAY
+    for latency_ms in range(1, 101):
+        breaker.record(True, latency_ms / 1000)
+    assert breaker.hedge_delay() == pytest.approx(0.095)
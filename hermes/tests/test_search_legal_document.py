@@ -0,0 +1,99 @@
+import io
+import json
+
+from src.tools.search_legal_document import apply_passage_mode, extract_passages, read_search_response
+from src.utils.es_stream import StreamingSearchResponse
+
+
+def test_passage_mode_excludes_file_content_and_names_inner_hits():
+    query = {
+        "query": {
+            "bool": {
+                "should": [
+                    {"nested": {"path": "files", "query": {"match": {"files.content": "notaris"}}}},
+                    {"nested": {"path": "files", "query": {"match": {"files.content": "akta"}}}},
+                    {"match": {"metadata.Judul": "notaris"}},
+                ]
+            }
+        },
+        "_source": ["metadata", "files"],
+    }
+    passage_query = apply_passage_mode(query)
+
+    assert passage_query["_source"] == {"includes": ["metadata", "files"], "excludes": ["files.content"]}
+    clauses = passage_query["query"]["bool"]["should"]
+    assert [clause["nested"]["inner_hits"]["name"] for clause in clauses[:2]] == ["passages_1", "passages_2"]
+    assert "inner_hits" not in query["query"]["bool"]["should"][0]["nested"]
+
+
+def test_passage_mode_leaves_queries_without_file_clauses_alone():
+    query = {"query": {"bool": {"must": [{"term": {"_id": "UU_5_1975"}}]}}, "size": 1}
+    assert apply_passage_mode(query) is query
+
+
+def test_extract_passages_orders_by_inner_hit_score():
+    hit = {
+        "inner_hits": {
+            "passages_1": {"hits": {"hits": [{"_score": 1.0, "highlight": {"files.content": ["rendah"]}}]}},
+            "passages_2": {"hits": {"hits": [{"_score": 3.0, "highlight": {"files.content": ["tinggi", "rendah"]}}]}},
+        }
+    }
+    assert extract_passages(hit) == ["tinggi", "rendah"]
+
+
+def _stream(body):
+    return io.BytesIO(json.dumps(body).encode("utf-8"))
+
+
+RESPONSE = {
+    "hits": {
+        "total": {"value": 2, "relation": "eq"},
+        "max_score": 2.0,
+        "hits": [
+            {
+                "_index": "peraturan_indonesia",
+                "_id": "UU_5_1975",
+                "_score": 2.0,
+                "_source": {"metadata": {"Judul": "Pemerintahan Daerah"},
+                            "files": [{"download_url": "/u", "content": "Pasal 1 " + "x" * 1000}]},
+                "inner_hits": {"passages_1": {"hits": {"hits": [
+                    {"_score": 1.0, "highlight": {"files.content": ["<em>daerah</em>"]}},
+                ]}}},
+            },
+            {"_index": "peraturan_indonesia", "_id": "UU_6_1975", "_score": 1.0, "_source": {"files": []}},
+        ],
+    },
+    "aggregations": {"tahun": {"buckets": []}},
+}
+
+
+def test_read_search_response_attaches_passages():
+    result = read_search_response(_stream(RESPONSE), passages=True)
+
+    assert result["total_hits"] == 2 and result["max_score"] == 2.0
+    assert result["hits"][0]["passages"] == ["<em>daerah</em>"]
+    assert "inner_hits" not in result["hits"][0]
+    assert result["hits"][1] == {"score": 1.0, "id": "UU_6_1975", "source": {"files": []}, "passages": []}
+    assert result["aggregations"] == {"tahun": {"buckets": []}}
+
+
+def test_read_search_response_cuts_or_drops_file_content_while_parsing():
+    cut = read_search_response(_stream(RESPONSE), content_chars=7)
+    assert cut["hits"][0]["source"]["files"] == [{"download_url": "/u", "content": "Pasal 1"}]
+    assert "passages" not in cut["hits"][0]
+
+    dropped = read_search_response(_stream(RESPONSE), content_chars=0)
+    assert dropped["hits"][0]["source"] == {"metadata": {"Judul": "Pemerintahan Daerah"}, "files": [{"download_url": "/u"}]}
+
+
+def test_streaming_reader_yields_hits_before_the_body_is_read():
+    # Larger than ijson's 64 KB read size, so reading only the first hit leaves most of the body unread
+    hits = [{"_id": f"UU_{i}_1975", "_source": {"files": [{"download_url": "/u", "content": "x" * 100_000}]}}
+            for i in range(5)]
+    stream = io.BytesIO(json.dumps({"hits": {"hits": hits}}).encode("utf-8"))
+    reader = StreamingSearchResponse(stream, source_excludes=["files.content"]).hits()
+
+    first = next(reader)
+    assert first == {"score": None, "id": "UU_0_1975", "source": {"files": [{"download_url": "/u"}]}}
+    assert stream.tell() < len(stream.getvalue()) // 2
+    assert [hit["id"] for hit in reader] == [f"UU_{i}_1975" for i in range(1, 5)]
@@ -0,0 +1,87 @@
+from src.model.search import QnA, QnAList
+from src.utils.cache import invalidate_corpus_update
+from src.utils.semantic_cache import SemanticAnswerCache, normalize_questions
+
+VECTORS = {
+    "apa syarat sah perjanjian menurut kuhperdata": [1.0, 0.0, 0.0],
+    "syarat sahnya perjanjian dalam kuhperdata": [0.99, 0.1, 0.0],
+    "berapa lama masa cuti melahirkan": [0.0, 1.0, 0.0],
+    "apa syarat sah perjanjian": [0.999, 0.05, 0.0],
+}
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return [VECTORS[text] for text in texts]
+
+
+def semantic_cache(name, **kwargs):
+    embedder = FakeEmbedder()
+    return SemanticAnswerCache(embed=embedder, enabled=True, threshold=0.95, name=name, **kwargs), embedder
+
+
+def answer_once(cache, question, documents):
+    probe = cache.probe([question])
+    planned = QnAList(is_sufficient=True, answers=[QnA(question=question, answer="Pasal 1320")])
+    probe.retrieved(documents, planned)
+    # The answering stage rewrites documents in place; the snapshot must not change
+    documents[0]["id"] = "rewritten"
+    cache.store(probe, {"content": "Empat syarat sah perjanjian", "citations": [], "documents": documents})
+    return probe
+
+
+def test_normalize_questions_ignores_order_case_and_punctuation():
+    assert normalize_questions(["B  lagi?", "a"]) == normalize_questions(["a.", "b lagi"]) == "a\nb lagi"
+
+
+def test_similar_question_replays_answer_and_documents():
+    cache, embedder = semantic_cache("semantic_test_hit")
+    miss = answer_once(cache, "Apa syarat sah perjanjian menurut KUHPerdata?", [{"id": "KUH_Perdata___1320"}])
+    assert miss.hit is None
+
+    probe = cache.probe(["syarat sahnya perjanjian dalam KUHPerdata"])
+    assert probe.similarity > 0.95
+    assert probe.hit["documents"] == [{"id": "KUH_Perdata___1320"}]
+    assert probe.hit["planned"]["answers"][0]["answer"] == "Pasal 1320"
+    assert probe.hit["answer"]["content"] == "Empat syarat sah perjanjian"
+
+    assert cache.probe(["Berapa lama masa cuti melahirkan"]).hit is None
+
+    calls = embedder.calls
+    assert cache.probe(["apa syarat sah perjanjian menurut kuhperdata"]).hit is not None
+    assert embedder.calls == calls
+
+
+def test_documents_mode_does_not_keep_final_answer():
+    cache, _ = semantic_cache("semantic_test_documents", reuse="documents")
+    answer_once(cache, "Apa syarat sah perjanjian menurut KUHPerdata?", [{"id": "KUH_Perdata___1320"}])
+    hit = cache.probe(["syarat sahnya perjanjian dalam KUHPerdata"]).hit
+    assert hit["answer"] is None and hit["documents"]
+
+
+def test_corpus_update_invalidates_entries():
+    cache, _ = semantic_cache("semantic_test_invalidate")
+    answer_once(cache, "Apa syarat sah perjanjian menurut KUHPerdata?", [{"id": "KUH_Perdata___1320"}])
+    assert invalidate_corpus_update("kuhper", []) >= 1
+    assert cache.probe(["syarat sahnya perjanjian dalam KUHPerdata"]).hit is None
+
+
+def test_disabled_cache_is_a_no_op():
+    cache = SemanticAnswerCache(embed=FakeEmbedder(), enabled=False, name="semantic_test_disabled")
+    assert cache.probe(["apa syarat sah perjanjian menurut kuhperdata"]) is None
+
+
+def test_stale_closer_row_does_not_hide_a_live_entry():
+    cache, _ = semantic_cache("semantic_test_stale")
+    answer_once(cache, "Apa syarat sah perjanjian menurut KUHPerdata?", [{"id": "KUH_Perdata___1320"}])
+    invalidate_corpus_update("kuhper", ["KUH_Perdata"])
+    answer_once(cache, "syarat sahnya perjanjian dalam KUHPerdata", [{"id": "KUH_Perdata___1338"}])
+
+    # The invalidated row is the closer one; the live entry still answers and the stale row is compacted away
+    probe = cache.probe(["apa syarat sah perjanjian"])
+    assert probe.hit is not None and probe.hit["documents"] == [{"id": "KUH_Perdata___1338"}]
+    assert len(cache._ids) == 1
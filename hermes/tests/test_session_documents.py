@@ -0,0 +1,84 @@
+from src.utils.cache import invalidate_corpus_update
+from src.utils.session_documents import SessionDocuments, passage_text
+
+VECTORS = {
+    "apa syarat sah perjanjian?": [1.0, 0.0, 0.0],
+    "apa akibat perjanjian yang tidak sah?": [0.9, 0.3, 0.0],
+    "berapa lama masa cuti melahirkan?": [0.0, 0.0, 1.0],
+    "Pasal 1320: untuk sahnya suatu perjanjian diperlukan empat syarat": [0.95, 0.1, 0.0],
+    "Pasal 1335: suatu perjanjian tanpa sebab tidak mempunyai kekuatan": [0.8, 0.5, 0.0],
+}
+
+DOCUMENTS = [
+    {"id": "KUHPerdata___1320", "score": 3.1,
+     "source": {"content": "Pasal 1320: untuk sahnya suatu perjanjian diperlukan empat syarat"}},
+    {"id": "KUHPerdata___1335", "values": [0.1] * 4,
+     "metadata": {"content": "Pasal 1335: suatu perjanjian tanpa sebab tidak mempunyai kekuatan"}},
+    # Metadata rows carry no article text and are never matched
+    {"_id": "KUH_Perdata", "_index": "kuhper", "title": "Kitab Undang-Undang Hukum Perdata"},
+]
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.append(list(texts))
+        return [VECTORS[text] for text in texts]
+
+
+def session_store(name):
+    embedder = FakeEmbedder()
+    return SessionDocuments(embed=embedder, threshold=0.9, top_k=5, enabled=True, name=name), embedder
+
+
+def test_passage_text_reads_every_document_shape():
+    assert passage_text(DOCUMENTS[0]).startswith("Pasal 1320")
+    assert passage_text(DOCUMENTS[1]).startswith("Pasal 1335")
+    assert passage_text({"_source": {"isi": "Pasal 1"}}) == "Pasal 1"
+    assert passage_text(DOCUMENTS[2]) == ""
+
+
+def test_covered_questions_reuse_documents_and_the_rest_are_retrieved():
+    store, embedder = session_store("session_documents_cover")
+    store.remember("session-1", [dict(document) for document in DOCUMENTS])
+
+    reuse = store.plan("session-1", ["apa akibat perjanjian yang tidak sah?", "berapa lama masa cuti melahirkan?"])
+    assert reuse.covered == ["apa akibat perjanjian yang tidak sah?"]
+    assert reuse.uncovered == ["berapa lama masa cuti melahirkan?"]
+    assert [document["id"] for document in reuse.documents] == ["KUHPerdata___1320", "KUHPerdata___1335"]
+    # The snapshot drops dense vectors
+    assert "values" not in reuse.documents[1]
+
+    # Passage embeddings carry over to the next turn, only the questions are embedded again
+    store.remember("session-1", reuse.documents, reuse)
+    store.plan("session-1", ["apa syarat sah perjanjian?"])
+    assert embedder.texts[-1] == ["apa syarat sah perjanjian?"]
+
+
+def test_previous_answer_is_loaded_when_the_process_has_no_entry():
+    store, _ = session_store("session_documents_load")
+    reuse = store.plan("session-2", ["apa syarat sah perjanjian?"], load_previous=lambda: DOCUMENTS)
+    assert reuse.uncovered == []
+    assert [document["id"] for document in reuse.documents] == ["KUHPerdata___1320"]
+
+    assert store.plan("session-3", ["apa syarat sah perjanjian?"]).uncovered == ["apa syarat sah perjanjian?"]
+
+
+def test_previous_documents_carry_forward_without_embedding():
+    store, embedder = session_store("session_documents_previous")
+    store.remember("session-5", [dict(document) for document in DOCUMENTS])
+    assert [document.get("id", document.get("_id")) for document in store.previous("session-5")] == [
+        "KUHPerdata___1320", "KUHPerdata___1335", "KUH_Perdata",
+    ]
+    assert store.previous("session-6", load_previous=lambda: DOCUMENTS[:1]) == DOCUMENTS[:1]
+    assert store.previous("session-7") == []
+    assert embedder.texts == []
+
+
+def test_corpus_update_drops_session_documents():
+    store, _ = session_store("session_documents_invalidate")
+    store.remember("session-4", [dict(document) for document in DOCUMENTS])
+    invalidate_corpus_update("kuhper", ["KUHPerdata"])
+    assert store.plan("session-4", ["apa syarat sah perjanjian?"]).uncovered == ["apa syarat sah perjanjian?"]
@@ -0,0 +1,69 @@
+import os
+
+from src.routing.small_talk import (
+    DATA_DIR,
+    FAREWELL,
+    GREETING,
+    META,
+    THANKS,
+    SmallTalkClassifier,
+    SmallTalkModel,
+    get_classifier,
+)
+from src.routing.train_small_talk import evaluate, read_examples
+
+
+def test_rules_route_without_a_model():
+    classifier = SmallTalkClassifier(model=None)
+    assert classifier.route("Halo kak!").kind == GREETING
+    assert classifier.route("makasih banyak ya").kind == THANKS
+    assert classifier.route("sampai jumpa").kind == FAREWELL
+    assert classifier.route("Halo kak!").source == "rule"
+    assert classifier.route("apa kabar kamu?") is None
+
+
+def test_follow_ups_only_take_the_rules():
+    classifier = get_classifier()
+    assert classifier.route("kamu siapa?").kind == META
+    assert classifier.route("kamu siapa?", follow_up=True) is None
+    for text in ("kamu bisa jelaskan lagi?", "dijelaskan lagi dong", "bisa diulang?", "oke lanjut"):
+        assert classifier.route(text, follow_up=True) is None
+    assert classifier.route("makasih ya kak", follow_up=True).source == "rule"
+
+
+def test_legal_terms_and_long_messages_always_need_retrieval():
+    classifier = get_classifier()
+    assert classifier.route("terima kasih, lalu apa sanksinya?") is None
+    assert classifier.route("halo, saya mau tanya soal pesangon") is None
+    assert classifier.route("halo halo halo halo halo halo halo halo halo") is None
+    assert classifier.route("") is None
+
+
+def test_requests_naming_a_topic_or_an_unknown_word_need_retrieval():
+    classifier = get_classifier()
+    for text in ("bisa bantu masalah utang piutang?", "bisa bantu saya soal KDRT?",
+                 "kamu bisa bantu soal warisan?", "kamu bisa bantu saya soal utang?"):
+        assert classifier.route(text) is None
+    # Every word of a routed message comes from the small-talk examples
+    assert classifier.model.knows(["kamu", "siapa"]) and not classifier.model.knows(["kamu", "warisan"])
+
+
+def test_model_round_trips_through_npz(tmp_path):
+    texts = ["halo kak", "hai semua", "apa itu somasi", "berapa lama masa cuti"]
+    model = SmallTalkModel.fit(texts, [1, 1, 0, 0], epochs=200)
+    path = os.path.join(tmp_path, "model.npz")
+    model.save(path)
+    loaded = SmallTalkModel.load(path)
+    assert loaded.vocab.tolist() == model.vocab.tolist()
+    assert loaded.small_talk_words.tolist() == ["hai", "halo", "kak", "semua"]
+    assert loaded.predict_proba(texts).tolist() == model.predict_proba(texts).tolist()
+    assert loaded.predict_proba(["hai kak"])[0] > 0.5 > loaded.predict_proba(["apa itu cuti"])[0]
+
+
+def test_committed_model_never_routes_a_held_out_legal_question():
+    classifier = get_classifier()
+    assert classifier.model is not None
+    report = evaluate(classifier, read_examples(os.path.join(DATA_DIR, "small_talk_eval.jsonl")))
+    assert report["precision"] == 1.0
+    assert report["recall"] >= 0.8
+    assert classifier.route("kamu ini chatbot apa?").kind == META
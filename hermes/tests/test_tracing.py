@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from src.common.executors import GEMINI, get_executor
+from src.utils import tracing
+
+
+def test_traceparent_round_trip_and_rejects_malformed_headers():
+    with tracing.start_span("publish", tracing.PRODUCER) as span:
+        headers = tracing.inject({"x-other": 1})
+    context = tracing.extract(headers)
+    assert (context.trace_id, context.span_id, context.sampled) == (span.context.trace_id, span.context.span_id, True)
+    assert tracing.extract({"traceparent": headers["traceparent"].encode()}).span_id == span.context.span_id
+
+    for value in (None, "", "00-abc-def-01", "00-" + "0" * 32 + "-" + "1" * 16 + "-01", "ff-" + "1" * 32 + "-" + "1" * 16 + "-01"):
+        assert tracing.parse_traceparent(value) is None
+    assert tracing.parse_traceparent("00-" + "a" * 32 + "-" + "b" * 16 + "-00").sampled is False
+
+
+def test_spans_nest_across_remote_parents_and_executor_threads():
+    remote = tracing.parse_traceparent("00-" + "a" * 32 + "-" + "b" * 16 + "-01")
+    with tracing.start_span("consume", tracing.CONSUMER, parent=remote) as root:
+        def child():
+            with tracing.start_span("search") as span:
+                return span
+        # The executors copy contextvars, so pool work nests under the submitter's span
+        span = get_executor(GEMINI).submit(child).result()
+    assert root.context.trace_id == "a" * 32 and root.parent_id == "b" * 16
+    assert span.context.trace_id == root.context.trace_id and span.parent_id == root.context.span_id
+    assert tracing.current_span() is None
+
+
+def test_errors_are_recorded_and_reraised():
+    with pytest.raises(ValueError):
+        with tracing.start_span("failing") as span:
+            raise ValueError("boom")
+    assert span.error == "ValueError: boom"
+    assert span.end_ns >= span.start_ns
+
+
+def test_file_export_and_otlp_payload(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORTER", "file")
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(path))
+
+    remote = tracing.parse_traceparent("00-" + "c" * 32 + "-" + "d" * 16 + "-01")
+    waited = tracing.record_span("rabbitmq.queue_wait", 1_000, 5_000_000, parent=remote, kind=tracing.CONSUMER)
+    with tracing.start_span("hermes.process_message", parent=remote, message_id="m-1"):
+        pass
+    tracing.flush()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["rabbitmq.queue_wait", "hermes.process_message"]
+    assert spans[0]["duration_ms"] == 4.999
+    assert {span["trace_id"] for span in spans} == {"c" * 32}
+    assert spans[1]["attributes"] == {"message_id": "m-1"}
+
+    payload = tracing.otlp_payload([waited])
+    otlp_span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert otlp_span["kind"] == 5 and otlp_span["parentSpanId"] == "d" * 16
+    assert otlp_span["startTimeUnixNano"] == "1000"
+
+
+def test_unsampled_traces_propagate_without_export(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORTER", "file")
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(path))
+    remote = tracing.parse_traceparent("00-" + "e" * 32 + "-" + "f" * 16 + "-00")
+    with tracing.start_span("hermes.process_message", parent=remote):
+        assert tracing.inject()["traceparent"].endswith("-00")
+    tracing.flush()
+    assert not path.exists()
@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+HERMES_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHRONOS_ROOT = os.path.join(os.path.dirname(HERMES_ROOT), "chronos")
+
+# Modules both services need but each image builds from its own directory: hermes path -> chronos path
+VENDORED = {
+    "src/utils/codec.py": "src/common/codec.py",
+    "src/utils/tracing.py": "src/common/tracing.py",
+}
+
+
+@pytest.mark.skipif(not os.path.isdir(CHRONOS_ROOT), reason="chronos is not checked out next to hermes")
+@pytest.mark.parametrize("hermes_path, chronos_path", sorted(VENDORED.items()))
+def test_vendored_copies_are_identical(hermes_path, chronos_path):
+    with open(os.path.join(HERMES_ROOT, hermes_path), "rb") as f:
+        hermes_copy = f.read()
+    with open(os.path.join(CHRONOS_ROOT, chronos_path), "rb") as f:
+        chronos_copy = f.read()
+    assert hermes_copy == chronos_copy, (
+        f"hermes/{hermes_path} and chronos/{chronos_path} differ; copy the edited one over the other"
+    )